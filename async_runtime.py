@@ -0,0 +1,135 @@
+"""
+asyncio运行时
+
+与EventScheduler相同的运行时接口（send、call_later、call_periodic、now、random），
+但按真实时间在asyncio事件循环中运行：每个路由器是一个从自己的收件队列
+(asyncio.Queue)中取LSA处理的协程，链路时延由loop.call_later在入队前实现，
+SPF节流和周期性摘要也是事件循环上的定时器。全部路由器共享一个线程，
+不再受每个路由器一个线程的限制。
+
+用法（必须在运行中的事件循环里创建）:
+    async def main():
+        runtime = AsyncioRuntime()
+        network.start_all_routers(runtime)
+        await runtime.wait_idle()  # 收敛
+        ...
+        network.stop_all_routers()
+        runtime.close()
+    asyncio.run(main())
+"""
+
+import asyncio
+import random
+
+class AsyncioRuntime:
+    """基于asyncio的协议运行时，每个路由器一个协程"""
+
+    def __init__(self, default_latency=0.001, seed=None, loop=None):
+        self.loop = loop if loop is not None else asyncio.get_running_loop()
+        self.random = random.Random(seed)
+        self.default_latency = default_latency  # 未单独设置时延的链路使用的默认时延（秒）
+        self.inboxes = {}  # 每个路由器的收件队列 {节点ID: asyncio.Queue}
+        self.tasks = {}  # 每个路由器的协程 {节点ID: asyncio.Task}
+        self.messages_delivered = 0
+        self.errors = []  # 处理LSA时抛出的异常 [(节点ID, 异常)]，路由器协程记录后继续运行
+        self.closed = False
+        self._start = self.loop.time()
+        self._pending = 0  # 在途的LSA和非周期性定时器数
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @property
+    def now(self):
+        """运行时启动以来的时间（秒）"""
+        return self.loop.time() - self._start
+
+    def _begin(self):
+        self._pending += 1
+        self._idle.clear()
+
+    def _done(self):
+        self._pending -= 1
+        if self._pending == 0:
+            self._idle.set()
+
+    def call_later(self, delay, callback, *args):
+        """运行时接口：延迟执行非周期性回调（如SPF节流），计入收敛判断"""
+        self._begin()
+        self.loop.call_later(delay, self._run_timer, callback, args)
+
+    def call_periodic(self, delay, callback, *args):
+        """运行时接口：延迟执行周期性回调（如LSDB摘要），不计入收敛判断"""
+        self.loop.call_later(delay, self._run_periodic, callback, args)
+
+    def _run_timer(self, callback, args):
+        try:
+            if not self.closed:
+                callback(*args)
+        finally:
+            self._done()
+
+    def _run_periodic(self, callback, args):
+        if not self.closed:
+            callback(*args)
+
+    def send(self, router, neighbor, lsa_data):
+        """运行时接口：经过链路时延后把LSA放入邻居的收件队列"""
+        latency = router.network.get_link_latency(router.node_id, neighbor, self.default_latency)
+        self._begin()
+        self.loop.call_later(latency, self._deliver, router.network, router.node_id, neighbor, lsa_data)
+    
+    def _deliver(self, network, source_id, neighbor, lsa_data):
+        """投递：到达时才查找邻居路由器（启动时邻居可能尚未创建），放入其收件队列"""
+        inbox = self.inboxes.get(neighbor)
+        if inbox is None:
+            neighbor_router = network.nodes.get_existing(neighbor)
+            if neighbor_router is None or self.closed:
+                self._done()
+                return
+            inbox = self._spawn(neighbor_router)
+        inbox.put_nowait((source_id, lsa_data))
+
+    def _spawn(self, router):
+        """为路由器创建收件队列和处理协程"""
+        inbox = asyncio.Queue()
+        self.inboxes[router.node_id] = inbox
+        self.tasks[router.node_id] = self.loop.create_task(self._router_main(router, inbox))
+        return inbox
+
+    async def _router_main(self, router, inbox):
+        """路由器协程：逐个处理收到的LSA，队列中已有的LSA连续处理，不再让出控制权"""
+        while True:
+            source_id, lsa_data = await inbox.get()
+            while True:
+                try:
+                    router.receive_lsa(source_id, lsa_data)
+                except Exception as e:
+                    # 协程退出后收件队列无人读取，在途计数不再归零，wait_idle会永远等待
+                    self.errors.append((router.node_id, e))
+                    self.loop.call_exception_handler({
+                        "message": f"路由器 {router.node_id} 处理来自 {source_id} 的LSA失败",
+                        "exception": e,
+                    })
+                finally:
+                    self.messages_delivered += 1
+                    self._done()
+                if inbox.empty():
+                    break
+                source_id, lsa_data = inbox.get_nowait()
+
+    def is_idle(self):
+        """是否没有在途的LSA和待执行的非周期性定时器"""
+        return self._pending == 0
+
+    async def wait_idle(self):
+        """等待网络收敛（只剩周期性摘要），返回收敛时的时间；处理失败的LSA见errors"""
+        await self._idle.wait()
+        return self.now
+
+    def close(self):
+        """停止所有路由器协程，之后到期的定时器不再执行"""
+        self.closed = True
+        for task in self.tasks.values():
+            task.cancel()
+        self.tasks.clear()
+        self.inboxes.clear()
\ No newline at end of file
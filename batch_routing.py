@@ -0,0 +1,108 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+
+def build_csr_from_lsdb(lsdb):
+    """
+    从链路状态数据库构建CSR邻接矩阵
+
+    参数:
+        lsdb: {node_id: {neighbor_id: cost, ...}, ...} 格式的链路状态数据库
+
+    返回:
+        (node_ids, csr矩阵)，矩阵的行列下标与node_ids中的顺序一致
+    """
+    node_ids = list(lsdb)
+    index = {node_id: i for i, node_id in enumerate(node_ids)}
+    for neighbors in lsdb.values():
+        for neighbor in neighbors:
+            if neighbor not in index:
+                index[neighbor] = len(node_ids)
+                node_ids.append(neighbor)
+
+    rows, cols, costs = [], [], []
+    for node_id, neighbors in lsdb.items():
+        row = index[node_id]
+        for neighbor, cost in neighbors.items():
+            rows.append(row)
+            cols.append(index[neighbor])
+            costs.append(cost)
+
+    size = len(node_ids)
+    matrix = csr_matrix(
+        (np.asarray(costs, dtype=np.float64), (np.asarray(rows, dtype=np.int32), np.asarray(cols, dtype=np.int32))),
+        shape=(size, size)
+    )
+    return node_ids, matrix
+
+def _first_hops(predecessors, sources):
+    """
+    由前驱矩阵计算下一跳矩阵
+
+    对每一行，令f(d)在d的前驱为源节点时等于d，否则等于d的前驱，
+    下一跳就是f的不动点。用指针倍增F = F[F]，迭代O(log 直径)次即可收敛。
+    """
+    columns = np.arange(predecessors.shape[1], dtype=np.int32)
+    fixed = (predecessors < 0) | (predecessors == sources[:, None])
+    hops = np.where(fixed, columns, predecessors).astype(np.int32)
+    while True:
+        jumped = np.take_along_axis(hops, hops, axis=1)
+        if np.array_equal(jumped, hops):
+            return hops
+        hops = jumped
+
+def compute_all_routing_tables(lsdb, sources=None, chunk_size=512):
+    """
+    使用向量化的Dijkstra一次性计算多个路由器的路由表
+
+    参数:
+        lsdb: 已收敛的链路状态数据库，各路由器的LSDB相同，只需构建一次矩阵
+        sources: 需要计算路由表的节点，默认为全部节点
+        chunk_size: 每批计算的源节点数，限制距离矩阵占用的内存
+
+    返回:
+        {source: {destination: (next_hop, distance), ...}, ...}
+    """
+    node_ids, matrix = build_csr_from_lsdb(lsdb)
+    names = np.empty(len(node_ids), dtype=object)
+    names[:] = node_ids
+    index = {node_id: i for i, node_id in enumerate(node_ids)}
+    if sources is None:
+        sources = node_ids
+    # 代价全部为整数时保持整数距离，与calculate_shortest_paths的结果一致
+    integral = bool(np.all(np.mod(matrix.data, 1) == 0))
+
+    tables = {}
+    for start in range(0, len(sources), chunk_size):
+        chunk = list(sources[start:start + chunk_size])
+        chunk_indices = np.fromiter((index[s] for s in chunk), dtype=np.int32, count=len(chunk))
+        distances, predecessors = dijkstra(matrix, directed=True, indices=chunk_indices, return_predecessors=True)
+        hops = _first_hops(predecessors, chunk_indices)
+
+        for row, source in enumerate(chunk):
+            reachable = np.isfinite(distances[row])
+            reachable[chunk_indices[row]] = False
+            destinations = np.flatnonzero(reachable)
+            row_distances = distances[row, destinations]
+            if integral:
+                row_distances = row_distances.astype(np.int64)
+            tables[source] = dict(zip(
+                names[destinations].tolist(),
+                zip(names[hops[row, destinations]].tolist(), row_distances.tolist())
+            ))
+    return tables
+
+def apply_converged_routes(network, lsdb=None, chunk_size=512):
+    """
+    用批量计算的结果填充网络中每个路由器的路由表
+
+    参数:
+        network: NetworkTopology对象
+        lsdb: 已收敛的链路状态数据库，默认由network.get_lsdb_snapshot()获取
+    """
+    if lsdb is None:
+        lsdb = network.get_lsdb_snapshot()
+    tables = compute_all_routing_tables(lsdb, [n for n in network.nodes if n in lsdb], chunk_size)
+    for node_id, routing_table in tables.items():
+        network.nodes[node_id].install_routing_table(routing_table)
+    return len(tables)
\ No newline at end of file
@@ -0,0 +1,152 @@
+"""
+链路状态协议收敛基准测试
+
+在离散事件仿真引擎（或asyncio运行时）上无界面运行，覆盖网格、环、Waxman随机图、
+Barabási–Albert无标度图和胖树拓扑。每次运行记录：
+    收敛时间（虚拟时间和实际耗时）、LSA发送/接收/丢弃数、SPF次数与耗时、
+    峰值内存，以及与参考全源最短路径结果的一致性。
+每个拓扑规模组合在单独的子进程中运行，峰值RSS只反映该次运行。
+结果以JSON格式写出，便于在版本之间追踪性能回归。
+
+运行方法（在项目根目录下）:
+    python -m benchmarks.convergence --topologies grid,ring --sizes 10,100,1000 --output results.json
+    python -m benchmarks.convergence --runtime asyncio --topologies ba --sizes 1000 --spf-throttle
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import platform
+import random
+import resource
+import sys
+import time
+import tracemalloc
+
+from async_runtime import AsyncioRuntime
+from dijkstra import calculate_shortest_paths
+from event_scheduler import EventScheduler
+from link_state import SPFThrottle
+import topology_generators
+
+def verify_routes(network, sample, seed):
+    """
+    与参考结果比较路由表
+
+    参考结果在真实拓扑上用calculate_shortest_paths计算。等价路径可能选择
+    不同的下一跳，因此只比较可达目的节点集合与距离。
+
+    返回:
+        (检查的路由器数, 路由表不一致的路由器数)
+    """
+    topology = {node_id: network.get_neighbors(node_id) for node_id in network.nodes}
+    sources = list(network.nodes)
+    if sample is not None and sample < len(sources):
+        sources = random.Random(seed).sample(sources, sample)
+    mismatched = 0
+    for source in sources:
+        expected = {dest: distance for dest, (_, distance) in calculate_shortest_paths(topology, source).items()}
+        actual = {dest: distance for dest, (_, distance) in network.nodes[source].get_routing_table().items()}
+        if actual != expected:
+            mismatched += 1
+    return len(sources), mismatched
+
+async def converge_asyncio(network, seed):
+    """在asyncio运行时上运行到收敛，返回(收敛时间, 处理的LSA数)"""
+    runtime = AsyncioRuntime(seed=seed)
+    network.start_all_routers(runtime)
+    convergence_time = await runtime.wait_idle()
+    runtime.close()
+    return convergence_time, runtime.messages_delivered
+
+def run_case(kind, size, args):
+    """运行一个拓扑规模组合，返回结果字典"""
+    nodes, links = topology_generators.generate(kind, size, seed=args.seed)
+    throttle = SPFThrottle() if args.spf_throttle else None
+    network = topology_generators.build_network(nodes, links, spf_throttle=throttle)
+
+    if args.trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    if args.runtime == "asyncio":
+        # asyncio运行时按真实时间运行，收敛时间包含链路时延和SPF节流等待
+        convergence_time, events = asyncio.run(converge_asyncio(network, args.seed))
+    else:
+        scheduler = EventScheduler(seed=args.seed)
+        network.start_all_routers(scheduler)
+        convergence_time = scheduler.run_until_idle()
+        events = scheduler.events_processed
+    wall_time = time.perf_counter() - started
+    peak_memory = tracemalloc.get_traced_memory()[1] if args.trace_memory else None
+    if args.trace_memory:
+        tracemalloc.stop()
+
+    protocols = [router.link_state_protocol for router in network.nodes.values()]
+    checked, mismatched = verify_routes(network, args.verify_sample, args.seed)
+    network.stop_all_routers()
+
+    return {
+        "topology": kind,
+        "requested_size": size,
+        "nodes": len(nodes),
+        "links": len(links),
+        "convergence_virtual_time": convergence_time,
+        "convergence_wall_time": wall_time,
+        "events": events,
+        "lsa_sent": sum(p.lsa_sent for p in protocols),
+        "lsa_received": sum(p.lsa_received for p in protocols),
+        "lsa_discarded": sum(p.lsa_discarded for p in protocols),
+        "spf_requests": sum(p.spf_requests for p in protocols),
+        "spf_runs": sum(p.spf_runs for p in protocols),
+        "spf_wall_time": sum(p.spf_time for p in protocols),
+        "peak_traced_memory": peak_memory,
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "routers_checked": checked,
+        "routes_mismatched": mismatched,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="链路状态协议收敛基准测试")
+    parser.add_argument("--topologies", default=",".join(topology_generators.GENERATORS),
+                        help="逗号分隔的拓扑类型: " + ", ".join(topology_generators.GENERATORS))
+    parser.add_argument("--sizes", default="10,100,1000", help="逗号分隔的节点规模，最大可到100000")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--runtime", default="events", choices=["events", "asyncio"],
+                        help="协议运行时: events为虚拟时钟的离散事件引擎，asyncio为真实时间的协程运行时")
+    parser.add_argument("--spf-throttle", action="store_true", help="启用默认参数的SPF节流")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="用tracemalloc统计每次运行的峰值内存（明显变慢）")
+    parser.add_argument("--verify-sample", type=int, default=200,
+                        help="随机抽取多少个路由器与参考结果比较，0表示不检查，-1表示全部检查")
+    parser.add_argument("--output", help="结果JSON文件，默认输出到标准输出")
+    args = parser.parse_args()
+    if args.verify_sample < 0:
+        args.verify_sample = None
+
+    results = []
+    for kind in args.topologies.split(","):
+        for size in (int(s) for s in args.sizes.split(",")):
+            # 每次运行使用新的进程，ru_maxrss是进程生命周期内的峰值，不能跨运行共用
+            with multiprocessing.Pool(1) as pool:
+                result = pool.apply(run_case, (kind, size, args))
+            results.append(result)
+            print(f"{kind:>9} n={result['nodes']:<7} 收敛 {result['convergence_wall_time']:.2f}s "
+                  f"SPF {result['spf_runs']} 不一致 {result['routes_mismatched']}", file=sys.stderr)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "seed": args.seed,
+        "runtime": args.runtime,
+        "spf_throttle": args.spf_throttle,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+    else:
+        json.dump(report, sys.stdout, indent=4)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,63 @@
+"""
+LSDB内存占用基准测试
+
+比较两种链路状态数据库表示在网络收敛后的内存占用：
+    shared: 当前实现，各路由器的LSDB共享同一批不可变LSA对象
+    copied: 旧的表示方式，每个路由器为每条LSA保存一份 {邻居ID: 代价} 字典
+
+运行方法（在项目根目录下）:
+    python -m benchmarks.lsdb_memory --size 30
+"""
+import argparse
+import sys
+
+import topology_generators
+from event_scheduler import EventScheduler
+
+def deep_size(roots):
+    """统计roots可达的所有对象的总字节数，共享对象只计一次"""
+    seen = set()
+    stack = list(roots)
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (tuple, list)):
+            stack.extend(obj)
+        elif hasattr(obj, '__slots__'):
+            stack.extend(getattr(obj, name) for name in obj.__slots__)
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description="LSDB内存占用基准测试")
+    parser.add_argument("--size", type=int, default=30, help="网格边长，节点数为size*size")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    nodes, links = topology_generators.grid(args.size * args.size, seed=args.seed)
+    network = topology_generators.build_network(nodes, links)
+    scheduler = EventScheduler(seed=args.seed)
+    network.start_all_routers(scheduler)
+    scheduler.run_until_idle()
+
+    databases = [router.link_state_protocol.link_state_database for router in network.nodes.values()]
+    shared = deep_size(databases)
+    copied = deep_size([
+        {node_id: dict(lsa.items()) for node_id, lsa in database.items()}
+        for database in databases
+    ])
+    unique_lsas = len({id(lsa) for database in databases for lsa in database.values()})
+
+    print(f"路由器数: {len(databases)}, 唯一LSA数: {unique_lsas}")
+    print(f"shared: {shared / 1024 / 1024:.2f} MiB")
+    print(f"copied: {copied / 1024 / 1024:.2f} MiB")
+    print(f"减少: {copied / shared:.1f}x")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
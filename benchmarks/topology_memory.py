@@ -0,0 +1,47 @@
+"""
+拓扑表示内存占用基准测试
+
+比较同一拓扑在两种表示下的内存占用（tracemalloc统计）：
+    network: NetworkTopology，字符串键字典，路由器未启动时不创建
+    compact: CompactTopology，节点ID驻留为整数下标，边存放在CSR数组中
+
+运行方法（在项目根目录下）:
+    python -m benchmarks.topology_memory --topology ba --size 100000
+"""
+import argparse
+import gc
+import tracemalloc
+
+from compact import CompactTopology
+import topology_generators
+
+def measure(build):
+    """返回build()构建的对象及其占用的内存字节数"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+def main():
+    parser = argparse.ArgumentParser(description="拓扑表示内存占用基准测试")
+    parser.add_argument("--topology", default="ba", choices=list(topology_generators.GENERATORS))
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    nodes, links = topology_generators.generate(args.topology, args.size, seed=args.seed)
+    network, network_bytes = measure(lambda: topology_generators.build_network(nodes, links))
+    compact, compact_bytes = measure(lambda: CompactTopology.from_edges(nodes, links))
+    assert compact.get_all_links() == network.get_all_links()
+
+    print(f"节点数: {len(nodes)}, 链路数: {len(links)}")
+    print(f"network: {network_bytes / 1024 / 1024:.1f} MiB")
+    print(f"compact: {compact_bytes / 1024 / 1024:.1f} MiB")
+    print(f"减少: {network_bytes / compact_bytes:.1f}x")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,82 @@
+"""
+LSA传输基准测试
+
+1. 编码大小: 收敛后全网LSA分别用二进制编码、pickle(旧的 (节点ID, 序列号, 邻居字典) 元组)
+   和JSON表示时的平均字节数，以及二进制编解码的速度。
+2. 传输吞吐: 同一拓扑分别用进程内直接投递和UdpTransport运行到收敛，比较每秒投递的LSA数，
+   报告数据报数、字节数和批量合并的效果，并检查两者的路由表是否一致。
+
+运行方法（在项目根目录下）:
+    python -m benchmarks.transport --topology grid --size 400
+"""
+import argparse
+import json
+import pickle
+import time
+
+from event_scheduler import EventScheduler
+from transport import LSACodec, UdpTransport
+import topology_generators
+
+def converge(nodes, links, seed, transport_options=None):
+    """运行到收敛，返回(网络, 实际耗时, 投递的LSA数, 传输对象或None)"""
+    network = topology_generators.build_network(nodes, links)
+    scheduler = EventScheduler(seed=seed)
+    transport = UdpTransport(scheduler, **transport_options) if transport_options is not None else None
+    started = time.perf_counter()
+    network.start_all_routers(transport or scheduler)
+    scheduler.run_until_idle()
+    elapsed = time.perf_counter() - started
+    delivered = sum(router.link_state_protocol.lsa_received for router in network.nodes.existing())
+    return network, elapsed, delivered, transport
+
+def routes(network):
+    return {router.node_id: {dest: distance for dest, (_, distance) in router.routing_table.items()}
+            for router in network.nodes.existing()}
+
+def main():
+    parser = argparse.ArgumentParser(description="LSA传输基准测试")
+    parser.add_argument("--topology", default="grid", choices=list(topology_generators.GENERATORS))
+    parser.add_argument("--size", type=int, default=400)
+    parser.add_argument("--flush-interval", type=float, default=0.001, help="批次的最长等待时间（秒）")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    nodes, links = topology_generators.generate(args.topology, args.size, seed=args.seed)
+    print(f"节点数: {len(nodes)}, 链路数: {len(links)}")
+
+    network, direct_time, direct_lsas, _ = converge(nodes, links, args.seed)
+    lsas = [router.link_state_protocol.link_state_database[router.node_id] for router in network.nodes.existing()]
+    codec = LSACodec()
+    started = time.perf_counter()
+    encoded = []
+    for lsa in lsas:
+        out = bytearray()
+        codec.encode(lsa, out)
+        encoded.append(out)
+    encode_time = time.perf_counter() - started
+    started = time.perf_counter()
+    for data in encoded:
+        codec.decode(data)
+    decode_time = time.perf_counter() - started
+    binary_size = sum(map(len, encoded)) / len(lsas)
+    pickle_size = sum(len(pickle.dumps((l.origin, l.seq, dict(l.items())), pickle.HIGHEST_PROTOCOL)) for l in lsas) / len(lsas)
+    json_size = sum(len(json.dumps([l.origin, l.seq, dict(l.items())])) for l in lsas) / len(lsas)
+    print(f"每个LSA平均字节数: 二进制 {binary_size:.1f}, pickle元组 {pickle_size:.1f}, JSON {json_size:.1f}")
+    print(f"二进制编码 {len(lsas) / encode_time / 1e3:.0f} k LSA/秒, 解码 {len(lsas) / decode_time / 1e3:.0f} k LSA/秒")
+    network.stop_all_routers()
+
+    udp_network, udp_time, udp_lsas, transport = converge(
+        nodes, links, args.seed, {"flush_interval": args.flush_interval})
+    stats = transport.stats()
+    transport.close()
+    print(f"进程内: 收敛 {direct_time:.2f}s, {direct_lsas / direct_time / 1e3:.0f} k LSA/秒")
+    print(f"UDP回环: 收敛 {udp_time:.2f}s, {udp_lsas / udp_time / 1e3:.0f} k LSA/秒, "
+          f"{stats['datagrams_sent'] / udp_time / 1e3:.1f} k 数据报/秒")
+    print(f"数据报 {stats['datagrams_sent']}, 每个数据报 {stats['messages_per_datagram']:.1f} 条消息, "
+          f"每条消息 {stats['bytes_per_message']:.1f} 字节, 丢失 {stats['datagrams_lost']}")
+    print("路由表一致" if routes(udp_network) == routes(network) else "路由表不一致")
+    udp_network.stop_all_routers()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,170 @@
+"""
+无界面命令行入口
+
+加载拓扑、在离散事件仿真引擎上启动所有路由器并运行到收敛，按顺序应用链路变化，
+最后以JSON格式输出路由表或协议统计。不导入PyQt5、matplotlib和networkx，
+适合在无图形环境的服务器上运行。
+
+示例:
+    python cli.py                                   # 默认拓扑，输出所有路由表
+    python cli.py topology/custom.json --node A     # 只输出A的路由表
+    python cli.py --generate grid:1000 --dump metrics
+    python cli.py --set-cost A B 10 --remove-link C D --dump routes
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from event_scheduler import EventScheduler
+from link_state import SPFThrottle
+from main import DEFAULT_TOPOLOGY, create_default_topology
+from network import NetworkTopology
+
+class AppendChange(argparse.Action):
+    """把链路变化以 (动作, 参数) 按命令行中出现的顺序追加到同一个列表"""
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        setattr(namespace, self.dest, getattr(namespace, self.dest) + [(self.const, values)])
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="链路状态路由协议仿真（无界面）")
+    parser.add_argument("topology", nargs="?", help="拓扑文件，默认为topology/default.json")
+    parser.add_argument("--generate", metavar="TYPE:N",
+                        help="生成合成拓扑代替拓扑文件，如grid:100、ba:1000")
+    parser.add_argument("--seed", type=int, default=None, help="仿真和拓扑生成的随机种子")
+    parser.add_argument("--spf-throttle", action="store_true", help="启用默认参数的SPF节流")
+    parser.add_argument("--add-link", nargs=3, action=AppendChange, dest="changes", const="add_link", default=[],
+                        metavar=("A", "B", "COST"), help="收敛后添加链路，可重复")
+    parser.add_argument("--set-cost", nargs=3, action=AppendChange, dest="changes", const="set_cost",
+                        metavar=("A", "B", "COST"), help="收敛后修改链路代价，可重复")
+    parser.add_argument("--remove-link", nargs=2, action=AppendChange, dest="changes", const="remove_link",
+                        metavar=("A", "B"), help="收敛后删除链路，可重复；各项变化按命令行中的顺序应用")
+    parser.add_argument("--dump", choices=["routes", "metrics", "prometheus", "none"], default="routes",
+                        help="输出内容，默认为routes；prometheus输出Prometheus文本格式的全网指标")
+    parser.add_argument("--node", action="append", default=[], help="只输出指定节点的路由表，可重复")
+    parser.add_argument("--output", help="输出文件，默认为标准输出")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="记录协议事件并写入追踪文件，可用 python tracing.py summary FILE 分析")
+    parser.add_argument("--trace-events", metavar="NAMES",
+                        help="只追踪这些事件类型（逗号分隔，如spf_full,spf_incremental,route_change），默认全部")
+    return parser.parse_args(argv)
+
+def load_network(args):
+    """按参数加载或生成拓扑"""
+    throttle = SPFThrottle() if args.spf_throttle else None
+    if args.generate:
+        import topology_generators
+        kind, _, size = args.generate.partition(":")
+        nodes, links = topology_generators.generate(kind, int(size or 100), seed=args.seed)
+        return topology_generators.build_network(nodes, links, spf_throttle=throttle)
+
+    network = NetworkTopology(spf_throttle=throttle)
+    filename = args.topology or DEFAULT_TOPOLOGY
+    if args.topology is None and not os.path.exists(filename):
+        # 只读运行，不把默认拓扑写入文件
+        create_default_topology(network, filename=None)
+    elif not network.load_from_file(filename):
+        sys.exit(f"无法加载拓扑 {filename}")
+    return network
+
+def parse_cost(value):
+    """把命令行中的代价转换为数值，整数保持为整数"""
+    cost = float(value)
+    return int(cost) if cost.is_integer() else cost
+
+def apply_changes(network, scheduler, args):
+    """按命令行中的顺序依次应用链路变化，每次变化后运行到重新收敛，返回每次变化的收敛记录"""
+    records = []
+    for action, params in args.changes:
+        if action != "remove_link":
+            params = (params[0], params[1], parse_cost(params[2]))
+        started = scheduler.now
+        if action == "add_link":
+            ok = network.add_link(*params)
+            if ok:
+                # 新链路需要两端路由器重新通告
+                network.nodes[params[0]].notify_link_change(params[1], params[2])
+                network.nodes[params[1]].notify_link_change(params[0], params[2])
+        elif action == "set_cost":
+            ok = network.update_link_cost(*params)
+        else:
+            ok = network.remove_link(*params)
+        if not ok:
+            print(f"忽略无效的变化: {action} {' '.join(map(str, params))}", file=sys.stderr)
+        scheduler.run_until_idle()
+        records.append({"action": action, "params": list(params), "applied": ok,
+                        "reconvergence_time": scheduler.now - started})
+    return records
+
+def collect_metrics(network, scheduler, convergence_time, wall_time, changes):
+    """汇总协议统计，路由器计数器和直方图取自NetworkMetrics.collect()"""
+    result = {
+        "nodes": len(network.nodes),
+        "links": len(network.get_all_links()),
+        "convergence_time": convergence_time,
+        "wall_time": wall_time,
+        "events": scheduler.events_processed,
+        "changes": changes,
+    }
+    result.update(network.metrics.collect())
+    return result
+
+def main(argv=None):
+    args = parse_args(argv)
+    network = load_network(args)
+    scheduler = EventScheduler(seed=args.seed)
+    if args.dump in ("metrics", "prometheus"):
+        network.enable_metrics()
+    if args.trace:
+        events = None
+        if args.trace_events:
+            import tracing
+            names = args.trace_events.split(",")
+            unknown = [name for name in names if name not in tracing.EVENT_KINDS]
+            if unknown:
+                sys.exit(f"未知的事件类型: {', '.join(unknown)}，可选: {', '.join(tracing.EVENT_KINDS)}")
+            events = [tracing.EVENT_KINDS[name] for name in names]
+        network.enable_tracing(events=events)
+
+    started = time.perf_counter()
+    network.start_all_routers(scheduler)
+    convergence_time = scheduler.run_until_idle()
+    changes = apply_changes(network, scheduler, args)
+    wall_time = time.perf_counter() - started
+
+    if args.dump == "routes":
+        node_ids = args.node or list(network.nodes)
+        result = {}
+        for node_id in node_ids:
+            if node_id not in network.nodes:
+                sys.exit(f"节点 {node_id} 不存在")
+            routing_table = network.nodes[node_id].get_routing_table()
+            result[node_id] = {dest: {"next_hop": hop, "cost": cost} for dest, (hop, cost) in routing_table.items()}
+    elif args.dump == "metrics":
+        result = collect_metrics(network, scheduler, convergence_time, wall_time, changes)
+    elif args.dump == "prometheus":
+        result = network.metrics.to_prometheus()
+    else:
+        result = None
+    network.stop_all_routers()
+    if args.trace:
+        network.tracer.flush(args.trace)
+
+    if isinstance(result, str):
+        if args.output:
+            with open(args.output, "w") as f:
+                f.write(result)
+        else:
+            sys.stdout.write(result)
+    elif result is not None:
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(result, f, indent=4, ensure_ascii=False)
+        else:
+            json.dump(result, sys.stdout, indent=4, ensure_ascii=False)
+            print()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
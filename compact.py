@@ -0,0 +1,211 @@
+"""
+紧凑的整数下标拓扑表示
+
+NetworkTopology使用以字符串为键的字典，适合交互式地增删节点和链路，但在十万
+节点规模下大部分内存都花在字典和元组的开销上。这里提供只读的紧凑表示：
+节点ID被驻留为连续的整数下标，边以CSR（压缩稀疏行）格式存放在array数组中。
+需要NumPy的代码可以用numpy.frombuffer零拷贝地访问这些数组。
+"""
+
+import sys
+from array import array
+
+class NodeIndex:
+    """节点ID与连续整数下标之间的双向映射"""
+
+    __slots__ = ('ids', 'index')
+
+    def __init__(self, node_ids=()):
+        self.ids = []  # 下标 -> 节点ID
+        self.index = {}  # 节点ID -> 下标
+        for node_id in node_ids:
+            self.intern(node_id)
+
+    def intern(self, node_id):
+        """返回节点ID对应的下标，不存在时分配新下标"""
+        i = self.index.get(node_id)
+        if i is None:
+            i = len(self.ids)
+            self.index[node_id] = i
+            self.ids.append(node_id)
+        return i
+
+    def id_of(self, node_id):
+        """节点ID对应的下标，不存在时抛出KeyError"""
+        return self.index[node_id]
+
+    def name_of(self, i):
+        """下标对应的节点ID"""
+        return self.ids[i]
+
+    def __contains__(self, node_id):
+        return node_id in self.index
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class CompactTopology:
+    """
+    CSR格式的只读拓扑
+
+    节点i的邻居为 targets[offsets[i]:offsets[i + 1]]，对应代价在costs的同一区间。
+    每条无向链路在两个端点的邻接区间中各出现一次。
+    通过get_neighbors、get_all_links等方法保留与NetworkTopology相同的字符串ID接口。
+    """
+
+    __slots__ = ('nodes', 'offsets', 'targets', 'costs')
+
+    def __init__(self, nodes, offsets, targets, costs):
+        self.nodes = nodes  # NodeIndex
+        self.offsets = offsets  # array('q')，长度为节点数+1
+        self.targets = targets  # array('i')，邻居下标
+        self.costs = costs  # array('d')，链路代价
+
+    @classmethod
+    def from_edges(cls, node_ids, links):
+        """
+        由节点列表和无向链路列表构建
+
+        参数:
+            node_ids: 节点ID序列
+            links: [(node1, node2, cost), ...]，链路端点必须在node_ids中
+        """
+        nodes = NodeIndex(node_ids)
+        sources = array('i')
+        destinations = array('i')
+        link_costs = array('d')
+        index = nodes.index
+        for node1, node2, cost in links:
+            sources.append(index[node1])
+            destinations.append(index[node2])
+            link_costs.append(cost)
+        return cls.from_arrays(nodes, sources, destinations, link_costs)
+
+    @classmethod
+    def from_arrays(cls, nodes, sources, destinations, link_costs):
+        """
+        由下标数组批量构建（计数排序，O(N + E)）
+
+        参数:
+            nodes: NodeIndex
+            sources, destinations, link_costs: 等长的无向链路数组
+        """
+        size = len(nodes)
+        degrees = array('q', [0]) * (size + 1)
+        for i in sources:
+            degrees[i + 1] += 1
+        for i in destinations:
+            degrees[i + 1] += 1
+
+        offsets = degrees
+        for i in range(size):
+            offsets[i + 1] += offsets[i]
+
+        total = offsets[size]
+        targets = array('i', [0]) * total
+        costs = array('d', [0.0]) * total
+        cursor = array('q', offsets[:size])
+        for src, dst, cost in zip(sources, destinations, link_costs):
+            position = cursor[src]
+            targets[position] = dst
+            costs[position] = cost
+            cursor[src] = position + 1
+            position = cursor[dst]
+            targets[position] = src
+            costs[position] = cost
+            cursor[dst] = position + 1
+        return cls(nodes, offsets, targets, costs)
+
+    @classmethod
+    def from_adjacency(cls, adjacency):
+        """
+        由邻接映射 {节点ID: {邻居ID: 代价}} 构建，如LSDB快照（LSA本身就是这样的映射）
+
+        按各节点自己通告的邻接逐行写入，O(N + E)，不要求两个方向一致；
+        只出现在邻接中的节点也会分配下标（没有邻居）。
+        """
+        nodes = NodeIndex(adjacency)
+        offsets = array('q', [0])
+        targets = array('i')
+        costs = array('d')
+        intern = nodes.intern
+        for neighbors in adjacency.values():
+            for neighbor, cost in neighbors.items():
+                targets.append(intern(neighbor))
+                costs.append(cost)
+            offsets.append(len(targets))
+        # 只作为邻居出现的节点排在最后，邻接区间为空
+        offsets.extend([len(targets)] * (len(nodes) + 1 - len(offsets)))
+        return cls(nodes, offsets, targets, costs)
+
+    @classmethod
+    def from_network(cls, network):
+        """由NetworkTopology构建"""
+        with network.lock:
+            return cls.from_edges(
+                list(network.nodes),
+                ((src, dst, cost) for (src, dst), cost in network.get_all_links().items())
+            )
+
+    def num_nodes(self):
+        return len(self.nodes)
+
+    def num_links(self):
+        """无向链路数（按两个方向都存在计算，from_adjacency构建的不对称邻接为近似值）"""
+        return len(self.targets) // 2
+
+    def degree(self, i):
+        return self.offsets[i + 1] - self.offsets[i]
+
+    def neighbors(self, i):
+        """按 (邻居下标, 代价) 遍历节点i的邻居"""
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return zip(self.targets[start:end], self.costs[start:end])
+
+    def get_neighbors(self, node_id):
+        """字符串ID接口：返回 {邻居ID: 代价}"""
+        names = self.nodes.ids
+        return {names[j]: _restore_cost(cost) for j, cost in self.neighbors(self.nodes.id_of(node_id))}
+
+    def get_all_nodes(self):
+        return list(self.nodes.ids)
+
+    def get_all_links(self):
+        """字符串ID接口：返回 {(src, dst): cost}，与NetworkTopology.get_all_links相同"""
+        names = self.nodes.ids
+        links = {}
+        for i in range(len(names)):
+            src = names[i]
+            for j, cost in self.neighbors(i):
+                dst = names[j]
+                if src < dst:
+                    links[(src, dst)] = _restore_cost(cost)
+        return links
+
+    def iter_links(self):
+        """按下标遍历每条无向链路一次: (i, j, cost)，i < j"""
+        offsets, targets, costs = self.offsets, self.targets, self.costs
+        for i in range(len(self.nodes)):
+            for position in range(offsets[i], offsets[i + 1]):
+                j = targets[position]
+                if i < j:
+                    yield i, j, costs[position]
+
+    def to_network(self, **kwargs):
+        """转换回可修改的NetworkTopology，kwargs传给NetworkTopology"""
+        from network import NetworkTopology
+        network = NetworkTopology(**kwargs)
+        names = self.nodes.ids
+        network.build(names, ((names[i], names[j], _restore_cost(cost)) for i, j, cost in self.iter_links()))
+        return network
+
+    def memory_usage(self):
+        """数组和ID映射占用的近似字节数"""
+        arrays = sum(a.itemsize * len(a) for a in (self.offsets, self.targets, self.costs))
+        return arrays + sys.getsizeof(self.nodes.ids) + sys.getsizeof(self.nodes.index)
+
+
+def _restore_cost(cost):
+    """代价以double存储，整数代价还原为int，与原始拓扑保持一致"""
+    return int(cost) if cost.is_integer() else cost
\ No newline at end of file
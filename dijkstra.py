@@ -1,59 +1,277 @@
-import heapq
-
-def calculate_shortest_paths(topology, source):
-    """
-    使用Dijkstra算法计算从source节点到所有其他节点的最短路径
-    
-    参数:
-        topology: {node_id: {neighbor_id: cost, ...}, ...} 格式的拓扑结构
-        source: 源节点ID
-    
-    返回:
-        {destination: (next_hop, distance), ...} 格式的路由表
-    """
-    # 初始化距离和前驱节点
-    distances = {node: float('infinity') for node in topology}
-    predecessors = {node: None for node in topology}
-    distances[source] = 0
-    
-    # 优先队列存储(距离, 节点)元组
-    priority_queue = [(0, source)]
-    
-    while priority_queue:
-        current_distance, current_node = heapq.heappop(priority_queue)
-        
-        # 如果已经找到更短的路径，则跳过
-        if current_distance > distances[current_node]:
-            continue
-        
-        # 检查当前节点的邻居
-        for neighbor, weight in topology.get(current_node, {}).items():
-            distance = current_distance + weight
-            
-            # 如果找到更短的路径
-            if distance < distances[neighbor]:
-                distances[neighbor] = distance
-                predecessors[neighbor] = current_node
-                heapq.heappush(priority_queue, (distance, neighbor))
-    
-    # 构建路由表
-    routing_table = {}
-    
-    for destination in topology:
-        if destination == source:
-            continue  # 跳过自身
-            
-        if distances[destination] == float('infinity'):
-            continue  # 目的地不可达
-        
-        # 查找从source到destination的第一跳
-        next_hop = destination
-        while predecessors[next_hop] != source and predecessors[next_hop] is not None:
-            next_hop = predecessors[next_hop]
-        
-        if predecessors[next_hop] is None:
-            continue  # 没有路径
-            
-        routing_table[destination] = (next_hop, distances[destination])
-    
-    return routing_table
\ No newline at end of file
+import heapq
+
+def _dijkstra(topology, source):
+    """运行Dijkstra算法，返回(distances, predecessors)"""
+    # 初始化距离和前驱节点
+    distances = {node: float('infinity') for node in topology}
+    predecessors = {node: None for node in topology}
+    distances[source] = 0
+    
+    # 优先队列存储(距离, 节点)元组
+    priority_queue = [(0, source)]
+    
+    while priority_queue:
+        current_distance, current_node = heapq.heappop(priority_queue)
+        
+        # 如果已经找到更短的路径，则跳过
+        if current_distance > distances[current_node]:
+            continue
+        
+        # 检查当前节点的邻居
+        for neighbor, weight in topology.get(current_node, {}).items():
+            distance = current_distance + weight
+            
+            # 如果找到更短的路径
+            if distance < distances[neighbor]:
+                distances[neighbor] = distance
+                predecessors[neighbor] = current_node
+                heapq.heappush(priority_queue, (distance, neighbor))
+    
+    return distances, predecessors
+
+def calculate_shortest_paths(topology, source):
+    """
+    使用Dijkstra算法计算从source节点到所有其他节点的最短路径
+    
+    参数:
+        topology: {node_id: {neighbor_id: cost, ...}, ...} 格式的拓扑结构
+        source: 源节点ID
+    
+    返回:
+        {destination: (next_hop, distance), ...} 格式的路由表
+    """
+    distances, predecessors = _dijkstra(topology, source)
+    
+    # 构建路由表
+    routing_table = {}
+    
+    for destination in topology:
+        if destination == source:
+            continue  # 跳过自身
+            
+        if distances[destination] == float('infinity'):
+            continue  # 目的地不可达
+        
+        # 查找从source到destination的第一跳
+        next_hop = destination
+        while predecessors[next_hop] != source and predecessors[next_hop] is not None:
+            next_hop = predecessors[next_hop]
+        
+        if predecessors[next_hop] is None:
+            continue  # 没有路径
+            
+        routing_table[destination] = (next_hop, distances[destination])
+    
+    return routing_table
+
+
+class IncrementalSPF:
+    """增量最短路径计算
+    
+    保存源节点的最短路径树（距离、前驱和子节点）以及拓扑副本，
+    当LSA只改变少量链路代价时，按Ramalingam-Reps动态单源最短路径的思路
+    只修复受影响的子树，而不是重新运行完整的Dijkstra算法。
+    变化过多或受影响的节点过多时回退到完整计算。
+    """
+    
+    __slots__ = (
+        'source', 'max_changes', 'max_affected_ratio', 'graph', 'reverse_graph', 'distances',
+        'predecessors', 'children', 'routing_table', 'full_runs', 'incremental_runs',
+    )
+    
+    def __init__(self, source, max_changes=16, max_affected_ratio=0.25):
+        self.source = source
+        self.max_changes = max_changes  # 单次增量计算允许的最大链路变化数
+        self.max_affected_ratio = max_affected_ratio  # 受影响节点比例超过该值时完整计算
+        self.graph = {}  # 出边: {node_id: {neighbor_id: cost}}
+        self.reverse_graph = {}  # 入边: {node_id: {predecessor_id: cost}}
+        self.distances = {}
+        self.predecessors = {}
+        self.children = {}  # 最短路径树: {node_id: set(子节点)}
+        self.routing_table = {}  # {destination: (next_hop, distance)}
+        self.full_runs = 0
+        self.incremental_runs = 0
+    
+    def reset(self, topology):
+        """用完整拓扑重建状态并运行完整计算
+        
+        返回:
+            路由表中发生变化的目的节点 {目的节点: 变化前的路由，新增时为None}
+        """
+        self.graph = {}
+        self.reverse_graph = {}
+        for node_id, neighbors in topology.items():
+            self._ensure_node(node_id)
+            for neighbor, cost in neighbors.items():
+                self._ensure_node(neighbor)
+                self.graph[node_id][neighbor] = cost
+                self.reverse_graph[neighbor][node_id] = cost
+        return self._full_run()
+    
+    def apply_changes(self, changes):
+        """应用链路代价变化并增量修复最短路径树
+        
+        参数:
+            changes: [(node_id, neighbor_id, cost), ...]，cost为inf表示链路删除
+        
+        返回:
+            路由表中发生变化的目的节点 {目的节点: 变化前的路由，新增时为None}
+        """
+        increased_roots = []
+        decreased = []
+        for node_id, neighbor, cost in changes:
+            self._ensure_node(node_id)
+            self._ensure_node(neighbor)
+            old_cost = self.graph[node_id].get(neighbor)
+            if cost == float('inf'):
+                if old_cost is None:
+                    continue
+                del self.graph[node_id][neighbor]
+                del self.reverse_graph[neighbor][node_id]
+            else:
+                self.graph[node_id][neighbor] = cost
+                self.reverse_graph[neighbor][node_id] = cost
+            
+            if old_cost is not None and cost > old_cost:
+                # 代价增加或链路删除只影响经过这条树边的子树
+                if self.predecessors.get(neighbor) == node_id:
+                    increased_roots.append(neighbor)
+            elif old_cost is None or cost < old_cost:
+                decreased.append((node_id, neighbor))
+        
+        if self.full_runs == 0 or len(changes) > self.max_changes:
+            return self._full_run()
+        
+        # 收集受影响的子树
+        affected = set()
+        stack = increased_roots
+        while stack:
+            node = stack.pop()
+            if node not in affected:
+                affected.add(node)
+                stack.extend(self.children[node])
+        
+        if len(affected) > self.max_affected_ratio * len(self.graph):
+            return self._full_run()
+        
+        self.incremental_runs += 1
+        infinity = float('infinity')
+        touched = set(affected)
+        priority_queue = []
+        
+        # 使受影响的节点失效
+        for node in affected:
+            self._set_predecessor(node, None)
+            self.distances[node] = infinity
+        
+        # 从未受影响的入边邻居中为受影响节点寻找新的上界
+        for node in affected:
+            best, best_pred = infinity, None
+            for pred, weight in self.reverse_graph[node].items():
+                if pred not in affected and self.distances[pred] + weight < best:
+                    best, best_pred = self.distances[pred] + weight, pred
+            if best_pred is not None:
+                self.distances[node] = best
+                self._set_predecessor(node, best_pred)
+                heapq.heappush(priority_queue, (best, node))
+        
+        # 代价降低或新增的链路可能带来更短的路径
+        for node_id, neighbor in decreased:
+            weight = self.graph[node_id].get(neighbor)
+            if weight is None:
+                continue  # 同一批变化中又被删除
+            distance = self.distances[node_id] + weight
+            if distance < self.distances[neighbor]:
+                self.distances[neighbor] = distance
+                self._set_predecessor(neighbor, node_id)
+                touched.add(neighbor)
+                heapq.heappush(priority_queue, (distance, neighbor))
+        
+        # 从种子节点继续运行Dijkstra，只扩展距离发生变化的节点
+        while priority_queue:
+            current_distance, current_node = heapq.heappop(priority_queue)
+            if current_distance > self.distances[current_node]:
+                continue
+            for neighbor, weight in self.graph[current_node].items():
+                distance = current_distance + weight
+                if distance < self.distances[neighbor]:
+                    self.distances[neighbor] = distance
+                    self._set_predecessor(neighbor, current_node)
+                    touched.add(neighbor)
+                    heapq.heappush(priority_queue, (distance, neighbor))
+        
+        return self._update_routes(touched)
+    
+    def _ensure_node(self, node_id):
+        """确保节点存在于拓扑副本和最短路径树中"""
+        if node_id not in self.graph:
+            self.graph[node_id] = {}
+            self.reverse_graph[node_id] = {}
+            self.children[node_id] = set()
+            self.predecessors[node_id] = None
+            self.distances[node_id] = 0 if node_id == self.source else float('infinity')
+    
+    def _set_predecessor(self, node_id, predecessor):
+        """修改前驱节点并维护子节点集合"""
+        old = self.predecessors[node_id]
+        if old is not None:
+            self.children[old].discard(node_id)
+        self.predecessors[node_id] = predecessor
+        if predecessor is not None:
+            self.children[predecessor].add(node_id)
+    
+    def _full_run(self):
+        """运行完整的Dijkstra并重建最短路径树"""
+        self.full_runs += 1
+        self._ensure_node(self.source)
+        self.distances, self.predecessors = _dijkstra(self.graph, self.source)
+        self.children = {node_id: set() for node_id in self.graph}
+        for node_id, pred in self.predecessors.items():
+            if pred is not None:
+                self.children[pred].add(node_id)
+        changed = self._update_routes(self.graph)
+        # 已离开拓扑的节点（以及安装的路由表中多出的目的节点）不再可达
+        graph = self.graph
+        for node in [node for node in self.routing_table if node not in graph]:
+            changed[node] = self.routing_table.pop(node)
+        return changed
+    
+    def _update_routes(self, nodes):
+        """重新计算nodes中各节点的下一跳，就地更新路由表，返回 {变化的目的节点: 变化前的路由}"""
+        next_hops = {}
+        for node in nodes:
+            # 沿前驱向上走，直到遇到源节点的直连邻居或路由未变化的节点
+            path = []
+            current = node
+            while (current not in next_hops and current in nodes
+                   and self.predecessors[current] not in (self.source, None)):
+                path.append(current)
+                current = self.predecessors[current]
+            
+            if current in next_hops:
+                hop = next_hops[current]
+            elif current not in nodes:
+                hop = self.routing_table[current][0]  # 路由未变化的祖先节点
+            elif self.predecessors[current] == self.source:
+                hop = current
+            else:
+                hop = None  # 源节点自身或目的地不可达
+            
+            next_hops[current] = hop
+            for path_node in path:
+                next_hops[path_node] = hop
+        
+        changed = {}
+        for node in nodes:
+            hop = next_hops[node]
+            if hop is None:
+                old_route = self.routing_table.pop(node, None)
+                if old_route is not None:
+                    changed[node] = old_route
+            else:
+                route = (hop, self.distances[node])
+                old_route = self.routing_table.get(node)
+                if old_route != route:
+                    self.routing_table[node] = route
+                    changed[node] = old_route
+        return changed
\ No newline at end of file
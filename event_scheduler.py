@@ -0,0 +1,98 @@
+import heapq
+import itertools
+import random
+
+class EventScheduler:
+    """离散事件仿真引擎
+
+    使用虚拟时钟和基于堆的事件队列驱动链路状态协议，替代每个路由器一个线程的
+    运行方式。所有事件在单线程中按时间顺序执行，给定相同的随机种子时结果可复现。
+
+    作为协议的运行时(runtime)，它需要提供两个接口：
+        send(router, neighbor, lsa_data): 按链路时延投递LSA
+        call_later(delay, callback, *args): 在虚拟时间delay之后执行回调
+    """
+
+    def __init__(self, seed=None, default_latency=0.001):
+        self.now = 0.0  # 虚拟时钟（秒）
+        self.random = random.Random(seed)
+        self.default_latency = default_latency  # 未单独设置时延的链路使用的默认时延
+        self.events_processed = 0
+        self._queue = []  # 事件堆: [(时间, 序号, 回调, 参数, 是否周期性)]
+        self._counter = itertools.count()  # 同一时刻的事件按加入顺序执行
+        self._pending = 0  # 队列中非周期性事件的数量
+
+    def schedule(self, delay, callback, *args, periodic=False):
+        """在当前虚拟时间之后delay秒执行回调
+
+        periodic为True的事件（如周期性LSDB摘要）不参与收敛判断。
+        """
+        heapq.heappush(self._queue, (self.now + delay, next(self._counter), callback, args, periodic))
+        if not periodic:
+            self._pending += 1
+
+    def call_later(self, delay, callback, *args):
+        """运行时接口：延迟执行非周期性事件"""
+        self.schedule(delay, callback, *args)
+
+    def call_periodic(self, delay, callback, *args):
+        """运行时接口：延迟执行周期性事件"""
+        self.schedule(delay, callback, *args, periodic=True)
+
+    def send(self, router, neighbor, lsa_data):
+        """运行时接口：按链路时延把LSA投递给邻居"""
+        latency = router.network.get_link_latency(router.node_id, neighbor, self.default_latency)
+        self.schedule(latency, self._deliver, router.network, router.node_id, neighbor, lsa_data)
+
+    def _deliver(self, network, source_id, neighbor, lsa_data):
+        """投递事件：邻居路由器接收LSA"""
+        neighbor_router = network.nodes.get_existing(neighbor)
+        if neighbor_router is not None:
+            neighbor_router.receive_lsa(source_id, lsa_data)
+
+    def step(self):
+        """执行下一个事件，队列为空时返回False"""
+        if not self._queue:
+            return False
+        event_time, _, callback, args, periodic = heapq.heappop(self._queue)
+        if not periodic:
+            self._pending -= 1
+        self.now = event_time
+        self.events_processed += 1
+        callback(*args)
+        return True
+
+    def run(self, until=None, max_events=None):
+        """运行事件直到队列为空、虚拟时间超过until或执行了max_events个事件"""
+        count = 0
+        while self._queue:
+            if until is not None and self._queue[0][0] > until:
+                self.now = until
+                break
+            if max_events is not None and count >= max_events:
+                break
+            self.step()
+            count += 1
+        return self.now
+
+    def run_until_idle(self, max_events=None):
+        """运行直到只剩周期性事件，即网络收敛
+
+        返回:
+            收敛时的虚拟时间
+        """
+        count = 0
+        while self._pending > 0:
+            if max_events is not None and count >= max_events:
+                break
+            self.step()
+            count += 1
+        return self.now
+
+    def is_idle(self):
+        """是否没有待处理的非周期性事件"""
+        return self._pending == 0
+
+    def pending_events(self):
+        """队列中的事件总数"""
+        return len(self._queue)
\ No newline at end of file
@@ -0,0 +1,45 @@
+import threading
+from collections import deque
+
+class FloodDispatcher:
+    """基于显式队列的LSA泛洪调度器
+    
+    路由器只把 (发送方, 邻居, LSA) 投递请求放入队列，由排空循环在不持有任何
+    路由器锁的情况下逐批交给邻居处理。邻居在处理过程中产生的转发同样只是入队，
+    因此泛洪不再形成深度等于网络直径的递归调用，也不会在持有一个路由器的锁时
+    去获取另一个路由器的锁。
+    """
+    
+    def __init__(self, network, batch_size=1024):
+        self.network = network
+        self.batch_size = batch_size  # 每批从队列取出的投递数
+        self.queue = deque()  # 待投递的 (发送方ID, 邻居ID, LSA)
+        self.delivered = 0  # 已投递的LSA数
+        self._drain_lock = threading.Lock()  # 保证同一时刻只有一个线程在排空队列
+        self._drain_owner = None  # 正在排空队列的线程ID
+    
+    def enqueue(self, source_id, neighbor, lsa_data):
+        """登记一次LSA投递，不立即执行"""
+        self.queue.append((source_id, neighbor, lsa_data))
+    
+    def drain(self):
+        """排空投递队列，返回时本线程之前登记的投递都已完成
+        
+        必须在不持有任何路由器协议锁时调用。若当前线程已在排空（即在某次投递的
+        处理过程中再次调用），直接返回，新入队的投递由外层循环处理；若其他线程
+        正在排空，则等待其结束后继续处理剩余的投递。
+        """
+        if self._drain_owner == threading.get_ident():
+            return
+        with self._drain_lock:
+            self._drain_owner = threading.get_ident()
+            try:
+                while self.queue:
+                    batch = [self.queue.popleft() for _ in range(min(self.batch_size, len(self.queue)))]
+                    for source_id, neighbor, lsa_data in batch:
+                        neighbor_router = self.network.nodes.get_existing(neighbor)
+                        if neighbor_router is not None:
+                            neighbor_router.receive_lsa(source_id, lsa_data)
+                    self.delivered += len(batch)
+            finally:
+                self._drain_owner = None
\ No newline at end of file
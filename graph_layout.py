@@ -0,0 +1,180 @@
+"""
+增量式力导向布局
+
+networkx的spring_layout每次都从随机位置重新计算，拓扑稍有变化节点就会整体跳动，
+几百个节点时一次布局就要数秒。这里缓存上一次的节点位置，拓扑变化时以旧位置为初值：
+新节点放在已布置邻居的重心附近，然后只让新节点和增删边的端点迭代少量几轮，
+其余节点保持不动（相当于spring_layout的fixed参数），增量更新的开销与变化的规模成正比。
+节点集合和边集合都没有变化（例如只修改了链路代价）时直接返回缓存的位置。
+
+坐标以理想边长为单位（不归一化到单位正方形），节点增多时布局自然变大，
+绘图端可以使用固定的缩放比例。斥力在节点较少时精确计算所有节点对，节点较多时
+每轮对随机抽样的节点计算并按比例放大，完整布局每轮开销为 O(N * sample_size)。
+
+只依赖NumPy，不依赖Qt，可以在后台线程中运行。
+"""
+
+import random
+from collections import deque
+
+import numpy as np
+
+class IncrementalLayout:
+    """缓存节点位置、以上一次布局为初值的Fruchterman-Reingold布局"""
+
+    def __init__(self, seed=None, iterations=50, incremental_iterations=15,
+                 exact_limit=2000, sample_size=512):
+        self.random = random.Random(seed)
+        self.rng = np.random.default_rng(seed)
+        self.iterations = iterations  # 没有旧位置时的迭代轮数
+        self.incremental_iterations = incremental_iterations  # 以旧位置为初值时的迭代轮数
+        self.exact_limit = exact_limit  # 移动节点数与节点数之积不超过其平方时精确计算斥力
+        self.sample_size = sample_size  # 超过时每轮参与斥力计算的抽样节点数
+        self.positions = {}  # {节点ID: (x, y)}，每次布局后整体替换，可被其他线程读取
+        self.node_set = frozenset()
+        self.edge_set = frozenset()
+
+    @staticmethod
+    def edge_key(src, dst):
+        """无向边的规范键"""
+        return (src, dst) if src <= dst else (dst, src)
+
+    @classmethod
+    def normalize(cls, nodes, links):
+        """返回 (节点集合, 边集合)：边按规范键去重，忽略自环和端点不在节点中的链路"""
+        node_set = frozenset(nodes)
+        edge_key = cls.edge_key
+        edge_set = frozenset(edge_key(src, dst) for src, dst in links
+                             if src != dst and src in node_set and dst in node_set)
+        return node_set, edge_set
+    
+    def is_current(self, nodes, links):
+        """节点集合和边集合是否与上一次布局相同"""
+        return self.normalize(nodes, links) == (self.node_set, self.edge_set)
+
+    def update(self, nodes, links):
+        """
+        按当前拓扑更新布局
+
+        参数:
+            nodes: 节点ID列表
+            links: 链路 (src, dst) 的可迭代对象（可以是 {(src, dst): 代价} 字典）
+
+        返回:
+            dict: {节点ID: (x, y)}
+        """
+        node_set, edge_set = self.normalize(nodes, links)
+        if node_set == self.node_set and edge_set == self.edge_set:
+            return self.positions
+
+        node_list = sorted(node_set)
+        index = {node_id: i for i, node_id in enumerate(node_list)}
+        n = len(node_list)
+        edges = np.array([(index[src], index[dst]) for src, dst in edge_set],
+                         dtype=np.intp).reshape(-1, 2)
+
+        old = self.positions
+        placed = np.zeros(n, dtype=bool)
+        pos = np.zeros((n, 2))
+        for i, node_id in enumerate(node_list):
+            p = old.get(node_id)
+            if p is not None:
+                pos[i] = p
+                placed[i] = True
+
+        # 新节点和增删边的端点参与迭代，其余节点保持原位
+        moving = ~placed
+        for src, dst in edge_set.symmetric_difference(self.edge_set):
+            for node_id in (src, dst):
+                i = index.get(node_id)
+                if i is not None:
+                    moving[i] = True
+        new_count = n - int(placed.sum())
+        if new_count:
+            self._place_new(node_list, edge_set, index, pos, placed)
+
+        if n > 1:
+            if new_count == n:
+                # 没有可沿用的位置：完整布局
+                self._relax(pos, edges, self.iterations, 0.1 * np.sqrt(n))
+            elif moving.any():
+                # 以旧位置为初值：只有受影响的节点以较低温度少量迭代
+                self._relax(pos, edges, self.incremental_iterations, 0.5, np.flatnonzero(moving))
+
+        self.positions = {node_id: (float(pos[i, 0]), float(pos[i, 1]))
+                          for i, node_id in enumerate(node_list)}
+        self.node_set = node_set
+        self.edge_set = edge_set
+        return self.positions
+
+    def _place_new(self, node_list, edge_set, index, pos, placed):
+        """把新节点放在已布置邻居的重心附近，整个连通分量都是新节点时随机选一个起点"""
+        n = len(node_list)
+        adjacency = [[] for _ in range(n)]
+        for src, dst in edge_set:
+            i, j = index[src], index[dst]
+            adjacency[i].append(j)
+            adjacency[j].append(i)
+
+        rand = self.random.uniform
+        half = np.sqrt(n) / 2  # 理想边长为1时n个节点大致占据的正方形半边长
+        center = pos[placed].mean(axis=0) if placed.any() else np.zeros(2)
+
+        # 从已布置的节点出发按BFS顺序放置，保证链状的新节点也能落在邻居旁边
+        queue = deque(np.flatnonzero(placed).tolist())
+        cursor = 0
+        while True:
+            while queue:
+                i = queue.popleft()
+                for j in adjacency[i]:
+                    if not placed[j]:
+                        neighbors = [k for k in adjacency[j] if placed[k]]
+                        pos[j] = pos[neighbors].mean(axis=0) + (rand(-0.5, 0.5), rand(-0.5, 0.5))
+                        placed[j] = True
+                        queue.append(j)
+            # 剩余新节点与已布置节点不连通，随机放置一个作为新的起点
+            while cursor < n and placed[cursor]:
+                cursor += 1
+            if cursor == n:
+                break
+            pos[cursor] = center + (rand(-half, half), rand(-half, half))
+            placed[cursor] = True
+            queue.append(cursor)
+
+    def _relax(self, pos, edges, iterations, temperature, moving=None):
+        """Fruchterman-Reingold迭代，理想边长为1，每轮位移不超过当前温度；moving为参与移动的节点下标，None表示全部"""
+        n = len(pos)
+        if moving is None:
+            moving = np.arange(n)
+        exact = len(moving) * n <= self.exact_limit * self.exact_limit
+        scale = 1.0 if exact else n / self.sample_size
+        cooling = temperature / (iterations + 1)
+        src, dst = edges[:, 0], edges[:, 1]
+        for _ in range(iterations):
+            displacement = np.zeros_like(pos)
+
+            # 斥力 k^2/d（k=1）：位移方向为 delta/d，大小为 1/d，即 delta/d^2
+            others = pos if exact else pos[self.rng.choice(n, self.sample_size, replace=False)]
+            ox, oy = others[:, 0], others[:, 1]
+            for start in range(0, len(moving), 256):
+                rows = moving[start:start + 256]
+                dx = pos[rows, 0, None] - ox
+                dy = pos[rows, 1, None] - oy
+                inverse = dx * dx + dy * dy
+                np.maximum(inverse, 1e-4, out=inverse)
+                np.reciprocal(inverse, out=inverse)
+                displacement[rows, 0] = (dx * inverse).sum(axis=1) * scale
+                displacement[rows, 1] = (dy * inverse).sum(axis=1) * scale
+
+            # 引力 d^2/k：沿边方向，大小为 d^2，即 delta*d
+            if len(edges):
+                delta = pos[src] - pos[dst]
+                force = delta * np.sqrt(np.einsum('ij,ij->i', delta, delta))[:, None]
+                np.subtract.at(displacement, src, force)
+                np.add.at(displacement, dst, force)
+
+            step = displacement[moving]
+            length = np.sqrt(np.einsum('ij,ij->i', step, step))
+            np.maximum(length, 1e-9, out=length)
+            pos[moving] += step * (np.minimum(length, temperature) / length)[:, None]
+            temperature -= cooling
\ No newline at end of file
@@ -1,160 +1,419 @@
-import threading
-import time
-import copy
-import random
-
-class LinkStateProtocol:
-    """链路状态协议实现类"""
-    
-    def __init__(self, router):
-        self.router = router
-        self.link_state_database = {}  # 链路状态数据库: {节点ID: {邻居ID: 代价}}
-        self.sequence_numbers = {}  # 序列号: {节点ID: 序号}
-        self.lsa_thread = None
-        self.running = False
-        self.lock = threading.RLock()
-    
-    def start(self):
-        """启动链路状态协议"""
-        with self.lock:
-            if not self.running:
-                self.running = True
-                # 初始化链路状态数据库
-                self.link_state_database = {}
-                self.sequence_numbers = {}
-                
-                # 添加本节点的链路状态
-                neighbors = self.router.get_neighbors()
-                self.link_state_database[self.router.node_id] = neighbors
-                self.sequence_numbers[self.router.node_id] = 1
-                
-                # 启动链路状态广告线程
-                self.lsa_thread = threading.Thread(target=self._lsa_sender_thread)
-                self.lsa_thread.daemon = True
-                self.lsa_thread.start()
-                
-                # 首次发送LSA
-                self._send_lsa()
-    
-    def stop(self):
-        """停止链路状态协议"""
-        with self.lock:
-            if self.running:
-                self.running = False
-                if self.lsa_thread and self.lsa_thread.is_alive():
-                    self.lsa_thread.join(1.0)  # 等待线程结束，最多1秒
-    
-    def update_link_state(self, neighbor, cost):
-        """更新本地链路状态"""
-        with self.lock:
-            if not self.running:
-                return
-                
-            neighbors = self.link_state_database.get(self.router.node_id, {})
-            if cost == float('inf'):  # 链路断开
-                if neighbor in neighbors:
-                    del neighbors[neighbor]
-            else:
-                neighbors[neighbor] = cost
-                
-            self.link_state_database[self.router.node_id] = neighbors
-            
-            # 增加序列号
-            seq = self.sequence_numbers.get(self.router.node_id, 0) + 1
-            self.sequence_numbers[self.router.node_id] = seq
-            
-            # 立即发送LSA
-            self._send_lsa()
-            
-            # 重新计算路由表
-            self._recalculate_routes()
-    
-    def process_lsa(self, source_id, lsa_data):
-        """处理接收到的链路状态通告"""
-        with self.lock:
-            if not self.running:
-                return
-                
-            node_id, seq_num, neighbors = lsa_data
-            
-            # 检查序列号，避免处理旧的LSA
-            current_seq = self.sequence_numbers.get(node_id, 0)
-            if seq_num <= current_seq:
-                return  # 忽略旧的或重复的LSA
-                
-            # 更新链路状态数据库和序列号
-            self.link_state_database[node_id] = neighbors
-            self.sequence_numbers[node_id] = seq_num
-            
-            # 转发LSA给除了源节点外的所有邻居
-            for neighbor in self.router.get_neighbors():
-                if neighbor != source_id:
-                    self._forward_lsa_to_neighbor(neighbor, lsa_data)
-            
-            # 重新计算路由表
-            self._recalculate_routes()
-    
-    def _send_lsa(self):
-        """发送链路状态通告给所有邻居"""
-        if not self.running:
-            return
-            
-        neighbors = self.router.get_neighbors()
-        if not neighbors:
-            return
-            
-        # 准备LSA数据
-        lsa_data = (
-            self.router.node_id,
-            self.sequence_numbers.get(self.router.node_id, 1),
-            copy.deepcopy(self.link_state_database.get(self.router.node_id, {}))
-        )
-        
-        # 发送给所有邻居
-        for neighbor in neighbors:
-            self._forward_lsa_to_neighbor(neighbor, lsa_data)
-    
-    def _forward_lsa_to_neighbor(self, neighbor, lsa_data):
-        """转发LSA到指定邻居"""
-        # 在实际网络中，这里会通过网络发送消息
-        # 在仿真中，我们直接调用邻居的接收方法
-        if neighbor in self.router.network.nodes:
-            neighbor_router = self.router.network.nodes[neighbor]
-            neighbor_router.receive_lsa(self.router.node_id, lsa_data)
-    
-    def _lsa_sender_thread(self):
-        """周期性发送LSA的后台线程"""
-        while self.running:
-            # 随机等待一段时间，避免同步发送
-            time.sleep(random.uniform(5, 15))
-            
-            with self.lock:
-                if self.running:
-                    self._send_lsa()
-    
-    def _recalculate_routes(self):
-        """重新计算路由表"""
-        # 将链路状态数据库转换为适合Dijkstra算法的拓扑结构
-        topology = self._build_topology_from_lsdb()
-        
-        # 更新路由表
-        self.router.update_routing_table(topology)
-    
-    def _build_topology_from_lsdb(self):
-        """从链路状态数据库构建拓扑结构"""
-        topology = {}
-        
-        # 对于链路状态数据库中的每个节点
-        for node_id, neighbors in self.link_state_database.items():
-            if node_id not in topology:
-                topology[node_id] = {}
-                
-            # 添加该节点到其邻居的连接
-            for neighbor, cost in neighbors.items():
-                topology[node_id][neighbor] = cost
-                
-                # 确保邻居节点也在拓扑中
-                if neighbor not in topology:
-                    topology[neighbor] = {}
-        
+import threading
+import time
+import random
+import tracing
+from lsa import DIGEST_MASK, LSA, LSARequest, LSDBDigest, LSDBSummary, lsa_hash
+
+# 周期性LSDB摘要的发送间隔范围（秒）
+LSA_REFRESH_INTERVAL = (5, 15)
+# 每条数据库描述或LSA请求最多携带的项数
+SYNC_CHUNK = 1000
+
+class SPFThrottle:
+    """OSPF风格的SPF节流参数
+    
+    安静期后的第一次路由计算等待initial_delay；此后保持期内再次触发时，
+    等待到上次计算后hold_time为止，且保持时间每次翻倍，最多为max_wait。
+    超过max_wait没有新的触发时恢复初始状态。等待期间到达的LSA合并为一次计算。
+    """
+    
+    def __init__(self, initial_delay=0.05, hold_time=0.2, max_wait=5.0):
+        self.initial_delay = initial_delay  # 首次触发后的等待时间（秒）
+        self.hold_time = hold_time  # 两次计算之间的初始保持时间（秒）
+        self.max_wait = max_wait  # 保持时间的上限（秒）
+
+class LinkStateProtocol:
+    """链路状态协议实现类"""
+    
+    # 每个路由器一个实例，使用__slots__省去实例字典
+    __slots__ = (
+        'router', 'link_state_database', 'sequence_numbers', 'lsa_thread', 'runtime',
+        'pending_changes', 'full_spf_needed', 'spf_requests', 'spf_runs', 'spf_time',
+        'lsa_sent', 'lsa_originated', 'lsa_forwarded', 'lsa_received', 'lsa_discarded',
+        'spf_scheduled', 'spf_timer', 'lsdb_digest', 'sync_sent', 'sync_received', 'digest_matches',
+        'spf_hold', 'last_spf_time', 'running', 'lock',
+    )
+    
+    def __init__(self, router):
+        self.router = router
+        self.link_state_database = {}  # 链路状态数据库: {节点ID: LSA}，LSA可作为 {邻居ID: 代价} 只读映射
+        self.sequence_numbers = {}  # 序列号: {节点ID: 序号}
+        self.lsa_thread = None
+        self.runtime = None  # 运行时（如EventScheduler），为None时使用线程
+        self.pending_changes = []  # 上次路由计算以来的链路变化 [(节点ID, 邻居ID, 代价)]
+        self.full_spf_needed = True  # 为True时下次路由计算使用完整的Dijkstra
+        self.spf_requests = 0  # 触发路由计算的次数
+        self.spf_runs = 0  # 实际执行路由计算的次数
+        self.spf_time = 0.0  # 路由计算累计耗时（秒）
+        self.lsa_sent = 0  # 发出的LSA数（含转发）
+        self.lsa_originated = 0  # 本路由器发起LSA通告的次数
+        self.lsa_forwarded = 0  # 转发给邻居的LSA数
+        self.lsa_received = 0  # 收到的LSA数
+        self.lsa_discarded = 0  # 因序列号不新而丢弃的LSA数
+        self.lsdb_digest = 0  # LSDB中各LSA哈希之和，随LSDB增量维护
+        self.sync_sent = 0  # 发出的数据库同步消息数（摘要、数据库描述、LSA请求）
+        self.sync_received = 0  # 收到的数据库同步消息数
+        self.digest_matches = 0  # 与本地LSDB一致、无需加锁处理的摘要数
+        self.spf_scheduled = False  # 是否已有节流中的路由计算
+        self.spf_timer = None  # 线程模式下的节流定时器
+        self.spf_hold = 0  # 当前保持时间
+        self.last_spf_time = None  # 上次路由计算的时间
+        self.running = False
+        self.lock = threading.RLock()
+    
+    def start(self, runtime=None):
+        """启动链路状态协议
+        
+        参数:
+            runtime: 可选的运行时（如EventScheduler）。为None时每个路由器
+                使用一个后台线程周期性发送LSDB摘要；否则由运行时调度摘要和LSA投递。
+        """
+        with self.lock:
+            if not self.running:
+                self.running = True
+                self.runtime = runtime
+                # 初始化链路状态数据库
+                self.link_state_database = {}
+                self.sequence_numbers = {}
+                self.lsdb_digest = 0
+                self.pending_changes = []
+                self.full_spf_needed = True
+                self.spf_scheduled = False
+                self.last_spf_time = None
+                
+                # 添加本节点的链路状态
+                self._store_lsa(LSA(self.router.node_id, 1, self.router.get_neighbors()))
+                
+                if runtime is None:
+                    # 启动链路状态广告线程
+                    self.lsa_thread = threading.Thread(target=self._lsa_sender_thread)
+                    self.lsa_thread.daemon = True
+                    self.lsa_thread.start()
+                else:
+                    self._schedule_refresh()
+                
+                # 首次发送LSA，并与邻居交换数据库描述，取得启动前已在网络中的LSA
+                self._send_lsa()
+                for neighbor in tuple(self.router.get_neighbors()):
+                    self._send_summary(neighbor, respond=True)
+        self._drain_floods()
+    
+    def stop(self):
+        """停止链路状态协议"""
+        with self.lock:
+            if self.running:
+                self.running = False
+                if self.spf_timer is not None:
+                    self.spf_timer.cancel()
+                    self.spf_timer = None
+                self.spf_scheduled = False
+                if self.lsa_thread and self.lsa_thread.is_alive():
+                    self.lsa_thread.join(1.0)  # 等待线程结束，最多1秒
+    
+    def update_link_state(self, neighbor, cost):
+        """更新本地链路状态"""
+        with self.lock:
+            if not self.running:
+                return
+                
+            # 生成序列号加一的新LSA（cost为inf表示链路断开），旧LSA保持不变
+            own_lsa = self.link_state_database[self.router.node_id]
+            adjacency_up = cost != float('inf') and neighbor not in own_lsa
+            self._store_lsa(own_lsa.with_link(neighbor, cost))
+            self.pending_changes.append((self.router.node_id, neighbor, cost))
+            
+            # 立即发送LSA
+            self._send_lsa()
+            if adjacency_up:
+                # 新邻接建立时批量同步LSDB
+                self._send_summary(neighbor, respond=True)
+            
+            # 重新计算路由表
+            self._request_spf()
+        self._drain_floods()
+    
+    def process_lsa(self, source_id, lsa_data):
+        """处理接收到的链路状态通告(LSA对象)或数据库同步消息"""
+        if lsa_data.__class__ is not LSA:
+            self._process_sync(source_id, lsa_data)
+            return
+        with self.lock:
+            if not self.running:
+                return
+                
+            node_id, seq_num, neighbors = lsa_data.origin, lsa_data.seq, lsa_data
+            self.lsa_received += 1
+            tracer = self.router.network.tracer
+            
+            # 检查序列号，避免处理旧的LSA
+            current_seq = self.sequence_numbers.get(node_id, 0)
+            if seq_num <= current_seq:
+                self.lsa_discarded += 1
+                if tracer is not None and tracing.LSA_DROP in tracer.events:
+                    tracer.record(self._now(), tracing.LSA_DROP, self.router.node_id, source_id, node_id, seq_num)
+                return  # 忽略旧的或重复的LSA
+            if node_id == self.router.node_id:
+                # 网络中仍有重启前发出的、序列号更大的本节点LSA：不接受，以更大的序列号重新生成
+                self._reoriginate(seq_num)
+                return
+            if tracer is not None and tracing.LSA_ACCEPT in tracer.events:
+                tracer.record(self._now(), tracing.LSA_ACCEPT, self.router.node_id, source_id, node_id, seq_num)
+                
+            # 记录链路变化，供增量路由计算使用
+            old_neighbors = self.link_state_database.get(node_id, {})
+            for neighbor, cost in neighbors.items():
+                if old_neighbors.get(neighbor) != cost:
+                    self.pending_changes.append((node_id, neighbor, cost))
+            for neighbor in old_neighbors:
+                if neighbor not in neighbors:
+                    self.pending_changes.append((node_id, neighbor, float('inf')))
+            
+            # 更新链路状态数据库和序列号（共享同一个LSA对象）
+            self._store_lsa(lsa_data)
+            
+            # 转发LSA给除了源节点外的所有邻居
+            fanout = 0
+            for neighbor in tuple(self.router.get_neighbors()):
+                if neighbor != source_id:
+                    self._forward_lsa_to_neighbor(neighbor, lsa_data)
+                    fanout += 1
+            self.lsa_forwarded += fanout
+            metrics = self.router.network.metrics
+            if metrics is not None:
+                metrics.flood_fanout.observe(fanout)
+            if tracer is not None and fanout and tracing.LSA_SEND in tracer.events:
+                tracer.record(self._now(), tracing.LSA_SEND, self.router.node_id, None, node_id, seq_num, fanout)
+            
+            # 重新计算路由表
+            self._request_spf()
+        self._drain_floods()
+    
+    def _reoriginate(self, peer_seq):
+        """邻居持有序列号为peer_seq的本节点LSA（如重启前发出的）：以peer_seq+1重新生成并泛洪自己的LSA"""
+        own_lsa = self.link_state_database[self.router.node_id]
+        self._store_lsa(LSA(self.router.node_id, peer_seq + 1, own_lsa))
+        self._send_lsa()
+    
+    def _store_lsa(self, lsa):
+        """把LSA写入链路状态数据库，同时更新序列号和LSDB摘要"""
+        old_seq = self.sequence_numbers.get(lsa.origin)
+        digest = self.lsdb_digest + lsa_hash(lsa.origin, lsa.seq)
+        if old_seq is not None:
+            digest -= lsa_hash(lsa.origin, old_seq)
+        self.lsdb_digest = digest & DIGEST_MASK
+        self.link_state_database[lsa.origin] = lsa
+        self.sequence_numbers[lsa.origin] = lsa.seq
+    
+    def _process_sync(self, source_id, message):
+        """
+        处理数据库同步消息
+        
+        摘要与本地LSDB一致时直接返回，不获取锁；不一致时回送数据库描述。
+        收到数据库描述时请求其中比本地新的LSA，respond为True时再回送自己的数据库描述，
+        这样双方各自取得对方较新的LSA。收到请求时把对应的LSA发给请求方。
+        """
+        self.sync_received += 1
+        if message.__class__ is LSDBDigest:
+            if (self.running and message.count == len(self.link_state_database)
+                    and message.digest == self.lsdb_digest):
+                self.digest_matches += 1
+                return
+        with self.lock:
+            if not self.running:
+                return
+            if message.__class__ is LSDBDigest:
+                self._send_summary(source_id, respond=True)
+            elif message.__class__ is LSDBSummary:
+                sequence_numbers = self.sequence_numbers
+                own_id = self.router.node_id
+                wanted = []
+                for origin, seq in message.entries:
+                    if seq > sequence_numbers.get(origin, 0):
+                        if origin == own_id:
+                            self._reoriginate(seq)  # 不请求自己的旧LSA
+                        else:
+                            wanted.append(origin)
+                for i in range(0, len(wanted), SYNC_CHUNK):
+                    self._send_sync(source_id, LSARequest(tuple(wanted[i:i + SYNC_CHUNK])))
+                if message.respond:
+                    self._send_summary(source_id)
+            elif message.__class__ is LSARequest:
+                for origin in message.origins:
+                    lsa = self.link_state_database.get(origin)
+                    if lsa is not None:
+                        self._forward_lsa_to_neighbor(source_id, lsa)
+        self._drain_floods()
+    
+    def _send_summary(self, neighbor, respond=False):
+        """把本地LSDB的数据库描述分块发给邻居，respond只设置在最后一块上"""
+        entries = tuple(self.sequence_numbers.items())
+        last = max(len(entries) - SYNC_CHUNK, 0)
+        for i in range(0, len(entries), SYNC_CHUNK):
+            self._send_sync(neighbor, LSDBSummary(entries[i:i + SYNC_CHUNK], respond and i >= last))
+    
+    def _send_digest(self):
+        """向所有邻居发送LSDB摘要，代替周期性地重发完整的LSA"""
+        digest = LSDBDigest(len(self.link_state_database), self.lsdb_digest)
+        for neighbor in tuple(self.router.get_neighbors()):
+            self._send_sync(neighbor, digest)
+    
+    def _send_sync(self, neighbor, message):
+        """发送数据库同步消息，与LSA走同一条投递路径"""
+        self.sync_sent += 1
+        if self.runtime is not None:
+            self.runtime.send(self.router, neighbor, message)
+        else:
+            self.router.network.flooding.enqueue(self.router.node_id, neighbor, message)
+    
+    def _send_lsa(self):
+        """发送链路状态通告给所有邻居"""
+        if not self.running:
+            return
+            
+        neighbors = tuple(self.router.get_neighbors())  # 邻接视图是实时的，遍历快照
+        if not neighbors:
+            return
+            
+        # LSA不可变，直接发送数据库中的对象，无需拷贝
+        lsa_data = self.link_state_database[self.router.node_id]
+        self.lsa_originated += 1
+        tracer = self.router.network.tracer
+        if tracer is not None and tracing.LSA_SEND in tracer.events:
+            tracer.record(self._now(), tracing.LSA_SEND, self.router.node_id, None,
+                          lsa_data.origin, lsa_data.seq, len(neighbors))
+        
+        # 发送给所有邻居
+        for neighbor in neighbors:
+            self._forward_lsa_to_neighbor(neighbor, lsa_data)
+    
+    def _forward_lsa_to_neighbor(self, neighbor, lsa_data):
+        """转发LSA到指定邻居"""
+        # 在实际网络中，这里会通过网络发送消息（transport.UdpTransport包装运行时后即经UDP发送）
+        # 在仿真中，由运行时按链路时延投递，或放入网络的泛洪队列，
+        # 在释放本路由器的锁之后再由_drain_floods交给邻居
+        self.lsa_sent += 1
+        if self.runtime is not None:
+            self.runtime.send(self.router, neighbor, lsa_data)
+        else:
+            self.router.network.flooding.enqueue(self.router.node_id, neighbor, lsa_data)
+    
+    def _drain_floods(self):
+        """在不持有协议锁时排空泛洪队列（线程模式）"""
+        if self.runtime is None:
+            self.router.network.flooding.drain()
+    
+    def _lsa_sender_thread(self):
+        """周期性发送LSDB摘要的后台线程"""
+        while self.running:
+            # 随机等待一段时间，避免同步发送
+            time.sleep(random.uniform(*LSA_REFRESH_INTERVAL))
+            
+            with self.lock:
+                if self.running:
+                    self._send_digest()
+            self._drain_floods()
+    
+    def _schedule_refresh(self):
+        """在运行时中安排下一次周期性摘要发送"""
+        self.runtime.call_periodic(self.runtime.random.uniform(*LSA_REFRESH_INTERVAL), self._periodic_refresh)
+    
+    def _periodic_refresh(self):
+        """运行时驱动的周期性摘要发送"""
+        with self.lock:
+            if self.running:
+                self._send_digest()
+                self._schedule_refresh()
+        self._drain_floods()
+    
+    @property
+    def spf_saved(self):
+        """被节流合并而省去的路由计算次数"""
+        return self.spf_requests - self.spf_runs - (1 if self.spf_scheduled else 0)
+    
+    def _now(self):
+        """当前时间：运行时的虚拟时钟或系统单调时钟"""
+        if self.runtime is not None:
+            return self.runtime.now
+        return time.monotonic()
+    
+    def _request_spf(self):
+        """请求路由计算，配置了SPF节流时合并短时间内的多次请求"""
+        self.spf_requests += 1
+        throttle = self.router.network.spf_throttle
+        if throttle is None:
+            self.spf_runs += 1
+            self._recalculate_routes()
+            return
+        if self.spf_scheduled:
+            return  # 已有等待中的计算，合并本次请求
+        
+        now = self._now()
+        if self.last_spf_time is None or now - self.last_spf_time > throttle.max_wait:
+            # 安静期后的首次触发
+            delay = throttle.initial_delay
+            self.spf_hold = throttle.hold_time
+        else:
+            delay = max(throttle.initial_delay, self.last_spf_time + self.spf_hold - now)
+            self.spf_hold = min(self.spf_hold * 2, throttle.max_wait)
+        
+        self.spf_scheduled = True
+        if self.runtime is not None:
+            self.runtime.call_later(delay, self._run_throttled_spf)
+        else:
+            self.spf_timer = threading.Timer(delay, self._run_throttled_spf)
+            self.spf_timer.daemon = True
+            self.spf_timer.start()
+    
+    def _run_throttled_spf(self):
+        """节流等待结束后执行路由计算"""
+        with self.lock:
+            if not self.running or not self.spf_scheduled:
+                return
+            self.spf_scheduled = False
+            self.spf_timer = None
+            self.last_spf_time = self._now()
+            self.spf_runs += 1
+            self._recalculate_routes()
+    
+    def _recalculate_routes(self):
+        """重新计算路由表"""
+        started = time.perf_counter()
+        changes = self.pending_changes
+        self.pending_changes = []
+        
+        full = self.full_spf_needed or not self.router.network.incremental_spf
+        if full:
+            # 将链路状态数据库转换为适合Dijkstra算法的拓扑结构
+            topology = self._build_topology_from_lsdb()
+            
+            # 更新路由表
+            self.router.update_routing_table(topology)
+            self.full_spf_needed = False
+        else:
+            # 只把变化的链路交给增量SPF
+            self.router.apply_link_changes(changes)
+        elapsed = time.perf_counter() - started
+        self.spf_time += elapsed
+        metrics = self.router.network.metrics
+        if metrics is not None:
+            metrics.observe_spf(elapsed, full)
+        tracer = self.router.network.tracer
+        if tracer is not None:
+            event = tracing.SPF_FULL if full else tracing.SPF_INCREMENTAL
+            if event in tracer.events:
+                tracer.record(self._now(), event, self.router.node_id, None, None, 0, elapsed)
+    
+    def _build_topology_from_lsdb(self):
+        """从链路状态数据库构建拓扑结构
+        
+        LSA本身就是只读的 {邻居ID: 代价} 映射，直接引用而不拷贝邻接关系。
+        """
+        topology = dict(self.link_state_database)
+        
+        # 确保只作为邻居出现的节点也在拓扑中
+        for lsa in self.link_state_database.values():
+            for neighbor in lsa:
+                if neighbor not in topology:
+                    topology[neighbor] = {}
+        
         return topology
\ No newline at end of file
@@ -0,0 +1,113 @@
+import zlib
+from collections.abc import Mapping
+
+DIGEST_MASK = (1 << 64) - 1
+
+def lsa_hash(origin, seq):
+    """LSA实例 (源节点, 序列号) 的64位哈希，与进程无关，LSDB摘要为各LSA哈希之和"""
+    data = f"{origin}\x00{seq}".encode("utf-8")
+    return zlib.crc32(data) | zlib.crc32(data, 0x9E3779B9) << 32
+
+class LSA(Mapping):
+    """不可变的链路状态通告
+
+    LSA在源路由器生成时创建一次，之后被泛洪路径上所有接受它的路由器的
+    链路状态数据库共享引用，不再逐跳或逐路由器拷贝。邻接关系保存为一个
+    私有字典（每条LSA只有一份），对外表现为只读的 {邻居ID: 代价} 映射，
+    可以直接作为Dijkstra算法的拓扑输入。
+    """
+
+    __slots__ = ('origin', 'seq', '_neighbors')
+
+    def __init__(self, origin, seq, neighbors):
+        """
+        参数:
+            origin: 生成该LSA的节点ID
+            seq: 序列号
+            neighbors: {邻居ID: 代价} 或 (邻居ID, 代价) 序列
+        """
+        items = neighbors.items() if isinstance(neighbors, Mapping) else neighbors
+        object.__setattr__(self, 'origin', origin)
+        object.__setattr__(self, 'seq', seq)
+        object.__setattr__(self, '_neighbors', dict(items))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("LSA是不可变对象")
+
+    def __reduce__(self):
+        return (LSA, (self.origin, self.seq, self._neighbors))
+
+    def __getitem__(self, neighbor):
+        return self._neighbors[neighbor]
+
+    def __contains__(self, neighbor):
+        return neighbor in self._neighbors
+
+    def get(self, neighbor, default=None):
+        return self._neighbors.get(neighbor, default)
+
+    def __iter__(self):
+        return iter(self._neighbors)
+
+    def __len__(self):
+        return len(self._neighbors)
+
+    def keys(self):
+        return self._neighbors.keys()
+
+    def values(self):
+        return self._neighbors.values()
+
+    def items(self):
+        """(邻居ID, 代价)的只读视图，供Dijkstra等热路径使用"""
+        return self._neighbors.items()
+
+    def with_link(self, neighbor, cost):
+        """生成序列号加一、修改了一条链路的新LSA，cost为inf表示删除该链路"""
+        neighbors = dict(self.items())
+        if cost == float('inf'):
+            neighbors.pop(neighbor, None)
+        else:
+            neighbors[neighbor] = cost
+        return LSA(self.origin, self.seq + 1, neighbors)
+
+    def __repr__(self):
+        return f"LSA({self.origin!r}, seq={self.seq}, {dict(self.items())!r})"
+
+
+class LSDBDigest:
+    """周期性发给邻居的LSDB摘要：LSA数与各LSA哈希之和（模2^64）"""
+
+    __slots__ = ('count', 'digest')
+
+    def __init__(self, count, digest):
+        self.count = count
+        self.digest = digest
+
+    def __repr__(self):
+        return f"LSDBDigest(count={self.count}, digest={self.digest:#018x})"
+
+
+class LSDBSummary:
+    """数据库描述：发送方LSDB中的 (源节点, 序列号) 列表，较大的LSDB分成多条发送"""
+
+    __slots__ = ('entries', 'respond')
+
+    def __init__(self, entries, respond=False):
+        self.entries = entries  # ((源节点, 序列号), ...)
+        self.respond = respond  # 为True时接收方处理后回送自己的数据库描述
+
+    def __repr__(self):
+        return f"LSDBSummary({len(self.entries)} 项, respond={self.respond})"
+
+
+class LSARequest:
+    """请求邻居发送这些源节点的LSA"""
+
+    __slots__ = ('origins',)
+
+    def __init__(self, origins):
+        self.origins = origins  # (源节点, ...)
+
+    def __repr__(self):
+        return f"LSARequest({self.origins!r})"
\ No newline at end of file
@@ -0,0 +1,197 @@
+"""
+协议指标
+
+每个LinkStateProtocol本身就维护整数计数器（LSA发出/转发/接收/丢弃、SPF请求/执行
+次数与耗时），这里把它们汇总成按路由器和全网的视图，并增加需要分布信息的指标：
+SPF耗时直方图（完整/增量分开）和LSA泛洪扇出直方图。
+
+直方图只在调用NetworkTopology.enable_metrics()后才记录，未启用时协议中只多一次
+属性判断。结果可以通过collect()以字典形式取得，或导出为JSON和Prometheus文本格式。
+"""
+
+import bisect
+import json
+import threading
+
+# SPF耗时直方图的桶上界（秒）
+SPF_LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+# 泛洪扇出（一次转发发给的邻居数）直方图的桶上界
+FANOUT_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128)
+
+# 各路由器协议对象上的计数器: 属性名 -> 说明
+ROUTER_COUNTERS = {
+    "lsa_sent": "发出的LSA数（含转发）",
+    "lsa_originated": "本路由器发起的LSA通告次数",
+    "lsa_forwarded": "转发给邻居的LSA数",
+    "lsa_received": "收到的LSA数",
+    "lsa_discarded": "因序列号不新（重复或过期）而丢弃的LSA数",
+    "sync_sent": "发出的数据库同步消息数（摘要、数据库描述、LSA请求）",
+    "sync_received": "收到的数据库同步消息数",
+    "digest_matches": "与本地LSDB一致、无需加锁处理的摘要数",
+    "spf_requests": "触发路由计算的次数",
+    "spf_runs": "实际执行路由计算的次数",
+    "spf_time": "路由计算累计耗时（秒）",
+}
+
+class Histogram:
+    """固定桶的直方图，桶计数不累积，导出时再累加"""
+
+    __slots__ = ('buckets', 'counts', 'count', 'sum', 'lock')
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)  # 升序的桶上界，最后隐含一个+Inf桶
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += value
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                "buckets": list(self.buckets),
+                "counts": list(self.counts),
+                "count": self.count,
+                "sum": self.sum,
+            }
+
+
+class NetworkMetrics:
+    """网络的指标汇总，由NetworkTopology.enable_metrics()创建"""
+
+    def __init__(self, network):
+        self.network = network
+        self.spf_latency = {
+            "full": Histogram(SPF_LATENCY_BUCKETS),
+            "incremental": Histogram(SPF_LATENCY_BUCKETS),
+        }
+        self.flood_fanout = Histogram(FANOUT_BUCKETS)
+
+    def observe_spf(self, elapsed, full):
+        """记录一次路由计算的耗时"""
+        self.spf_latency["full" if full else "incremental"].observe(elapsed)
+
+    def collect(self, per_router=True):
+        """
+        取得当前指标
+
+        参数:
+            per_router: 是否包含每个路由器的计数器，路由器很多时可以关闭
+
+        返回:
+            {"totals": {...}, "lsdb": {...}, "histograms": {...}, "routers": {...}}
+            尚未创建的路由器没有运行过协议，不计入
+        """
+        totals = dict.fromkeys(ROUTER_COUNTERS, 0)
+        totals["spf_full_runs"] = totals["spf_incremental_runs"] = 0
+        routers = {}
+        lsdb_sizes = []
+        for router in self.network.nodes.existing():
+            protocol = router.link_state_protocol
+            values = {name: getattr(protocol, name) for name in ROUTER_COUNTERS}
+            values["spf_full_runs"] = router.spf.full_runs
+            values["spf_incremental_runs"] = router.spf.incremental_runs
+            values["lsdb_size"] = len(protocol.link_state_database)
+            values["routes"] = len(router.routing_table)
+            lsdb_sizes.append(values["lsdb_size"])
+            for name in totals:
+                totals[name] += values[name]
+            if per_router:
+                routers[router.node_id] = values
+
+        histograms = {"spf_latency_" + kind: histogram.to_dict() for kind, histogram in self.spf_latency.items()}
+        histograms["flood_fanout"] = self.flood_fanout.to_dict()
+        return {
+            "totals": totals,
+            "lsdb": {
+                "routers": len(lsdb_sizes),
+                "total_entries": sum(lsdb_sizes),
+                "max_entries": max(lsdb_sizes, default=0),
+                "min_entries": min(lsdb_sizes, default=0),
+            },
+            "histograms": histograms,
+            "routers": routers,
+        }
+
+    def to_json(self, per_router=True, **kwargs):
+        """导出为JSON字符串，kwargs传给json.dumps"""
+        return json.dumps(self.collect(per_router), ensure_ascii=False, **kwargs)
+
+    def to_prometheus(self, per_router=False, prefix="lsr"):
+        """
+        导出为Prometheus文本格式
+
+        参数:
+            per_router: 是否输出带router标签的每路由器指标，路由器很多时会非常大
+            prefix: 指标名前缀
+        """
+        snapshot = self.collect(per_router)
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{prefix}_{name}{_format_labels(labels)} {_format_value(value)}")
+
+        descriptions = dict(ROUTER_COUNTERS)
+        descriptions["spf_full_runs"] = "完整Dijkstra计算次数"
+        descriptions["spf_incremental_runs"] = "增量SPF计算次数"
+        # 按路由器输出时不再输出无标签的合计，避免聚合时重复计算
+        for name, total in snapshot["totals"].items():
+            suffix = "_seconds_total" if name == "spf_time" else "_total"
+            if per_router:
+                samples = [({"router": node_id}, values[name]) for node_id, values in snapshot["routers"].items()]
+            else:
+                samples = [({}, total)]
+            metric(name.replace("_time", "") + suffix, "counter", descriptions[name], samples)
+
+        metric("lsdb_entries", "gauge", "全网LSDB中的LSA数（合计、单个路由器最大和最小）",
+               [({"stat": stat}, snapshot["lsdb"][stat + "_entries"]) for stat in ("total", "max", "min")])
+        if per_router:
+            metric("router_lsdb_entries", "gauge", "路由器LSDB中的LSA数",
+                   [({"router": node_id}, values["lsdb_size"]) for node_id, values in snapshot["routers"].items()])
+        metric("routers_active", "gauge", "已创建的路由器数", [({}, snapshot["lsdb"]["routers"])])
+
+        lines.append(f"# HELP {prefix}_spf_duration_seconds 路由计算耗时（秒），kind为full或incremental")
+        lines.append(f"# TYPE {prefix}_spf_duration_seconds histogram")
+        for kind in self.spf_latency:
+            lines.extend(_histogram_lines(f"{prefix}_spf_duration_seconds", {"kind": kind},
+                                          snapshot["histograms"]["spf_latency_" + kind]))
+        lines.append(f"# HELP {prefix}_flood_fanout 每次泛洪转发的邻居数")
+        lines.append(f"# TYPE {prefix}_flood_fanout histogram")
+        lines.extend(_histogram_lines(f"{prefix}_flood_fanout", {}, snapshot["histograms"]["flood_fanout"]))
+        return "\n".join(lines) + "\n"
+
+
+def _histogram_lines(name, labels, histogram):
+    """Prometheus直方图样本：累积桶计数、_sum和_count"""
+    lines = []
+    cumulative = 0
+    for bound, count in zip(list(histogram["buckets"]) + [float("inf")], histogram["counts"]):
+        cumulative += count
+        le = "+Inf" if bound == float("inf") else _format_value(bound)
+        lines.append(f"{name}_bucket{_format_labels(dict(labels, le=le))} {cumulative}")
+    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(histogram['sum'])}")
+    lines.append(f"{name}_count{_format_labels(labels)} {histogram['count']}")
+    return lines
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (f'{key}="{_escape(value)}"' for key, value in labels.items())
+    return "{" + ",".join(escaped) + "}"
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
\ No newline at end of file
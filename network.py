@@ -1,128 +1,416 @@
-import json
-import os
-import threading
-import time
-
-class NetworkTopology:
-    """网络拓扑类，用于管理网络节点和链路"""
-    
-    def __init__(self):
-        self.nodes = {}  # 存储网络中的节点 {节点ID: 节点对象}
-        self.links = {}  # 存储网络中的链路 {(node1, node2): cost}
-        self.lock = threading.RLock()  # 用于同步访问
-        
-    def add_node(self, node_id):
-        """添加节点到拓扑中"""
-        with self.lock:
-            if node_id not in self.nodes:
-                from router import Router
-                self.nodes[node_id] = Router(node_id, self)
-                return True
-            return False
-    
-    def add_link(self, node1, node2, cost):
-        """添加链路到拓扑中"""
-        with self.lock:
-            if node1 in self.nodes and node2 in self.nodes:
-                self.links[(node1, node2)] = cost
-                self.links[(node2, node1)] = cost
-                return True
-            return False
-    
-    def update_link_cost(self, node1, node2, cost):
-        """更新链路代价"""
-        with self.lock:
-            if (node1, node2) in self.links:
-                self.links[(node1, node2)] = cost
-                self.links[(node2, node1)] = cost
-                # 通知节点链路变化
-                self.nodes[node1].notify_link_change(node2, cost)
-                self.nodes[node2].notify_link_change(node1, cost)
-                return True
-            return False
-    
-    def remove_link(self, node1, node2):
-        """移除链路"""
-        with self.lock:
-            if (node1, node2) in self.links:
-                del self.links[(node1, node2)]
-                del self.links[(node2, node1)]
-                # 通知节点链路变化
-                self.nodes[node1].notify_link_change(node2, float('inf'))
-                self.nodes[node2].notify_link_change(node1, float('inf'))
-                return True
-            return False
-    
-    def get_neighbors(self, node_id):
-        """获取节点的邻居节点及链路代价"""
-        neighbors = {}
-        for (src, dst), cost in self.links.items():
-            if src == node_id:
-                neighbors[dst] = cost
-        return neighbors
-    
-    def get_all_nodes(self):
-        """获取所有节点ID"""
-        return list(self.nodes.keys())
-    
-    def get_all_links(self):
-        """获取所有链路信息，用于可视化"""
-        unique_links = {}
-        for (src, dst), cost in self.links.items():
-            if src < dst:  # 只返回单向链路，避免重复
-                unique_links[(src, dst)] = cost
-        return unique_links
-    
-    def save_to_file(self, filename):
-        """将拓扑保存到文件"""
-        with self.lock:
-            topology_data = {
-                "nodes": list(self.nodes.keys()),
-                "links": []
-            }
-            
-            for (src, dst), cost in self.links.items():
-                if src < dst:  # 只保存单向链路，避免重复
-                    topology_data["links"].append({
-                        "source": src,
-                        "target": dst,
-                        "cost": cost
-                    })
-            
-            os.makedirs(os.path.dirname(filename), exist_ok=True)
-            with open(filename, 'w') as f:
-                json.dump(topology_data, f, indent=4)
-    
-    def load_from_file(self, filename):
-        """从文件加载拓扑"""
-        with self.lock:
-            try:
-                with open(filename, 'r') as f:
-                    topology_data = json.load(f)
-                
-                # 清空当前拓扑
-                self.nodes.clear()
-                self.links.clear()
-                
-                # 添加节点
-                for node_id in topology_data["nodes"]:
-                    self.add_node(node_id)
-                
-                # 添加链路
-                for link in topology_data["links"]:
-                    self.add_link(link["source"], link["target"], link["cost"])
-                
-                return True
-            except Exception as e:
-                print(f"加载拓扑失败: {e}")
-                return False
-    
-    def start_all_routers(self):
-        """启动所有路由器的链路状态协议"""
-        for router in self.nodes.values():
-            router.start_link_state_protocol()
-    
-    def stop_all_routers(self):
-        """停止所有路由器的链路状态协议"""
-        for router in self.nodes.values():
+import json
+import os
+import threading
+import time
+import warnings
+from collections.abc import Mapping
+from types import MappingProxyType
+from flooding import FloodDispatcher
+from path_cache import PathCache
+from router import RouteChangeStream, Router
+
+_EMPTY_NEIGHBORS = MappingProxyType({})
+
+class RouterMap(Mapping):
+    """节点ID到路由器对象的映射，路由器在第一次访问时才创建
+    
+    只做路由分析的大型拓扑不需要为每个节点都构建Router、LinkStateProtocol
+    和锁。按键访问、values()和items()会创建路由器；遍历键、len和in不会。
+    未创建的路由器一定没有运行，泛洪和停止等只关心运行中路由器的代码
+    应使用get_existing和existing。
+    """
+    
+    __slots__ = ('network', '_routers')
+    
+    def __init__(self, network):
+        self.network = network
+        self._routers = {}  # {节点ID: 路由器对象或None（尚未创建）}
+    
+    def __getitem__(self, node_id):
+        router = self._routers[node_id]
+        if router is None:
+            with self.network.lock:
+                router = self._routers[node_id]
+                if router is None:
+                    router = self._routers[node_id] = Router(node_id, self.network)
+        return router
+    
+    def __iter__(self):
+        return iter(self._routers)
+    
+    def __len__(self):
+        return len(self._routers)
+    
+    def __contains__(self, node_id):
+        return node_id in self._routers
+    
+    def add(self, node_id):
+        """登记节点，不创建路由器"""
+        self._routers[node_id] = None
+    
+    def update(self, node_ids):
+        """批量登记节点"""
+        self._routers.update(dict.fromkeys(node_ids))
+    
+    def clear(self):
+        self._routers.clear()
+    
+    def get_existing(self, node_id):
+        """返回已创建的路由器，尚未创建或不存在时返回None"""
+        return self._routers.get(node_id)
+    
+    def existing(self):
+        """遍历已创建的路由器"""
+        return [router for router in self._routers.values() if router is not None]
+
+class NetworkTopology:
+    """网络拓扑类，用于管理网络节点和链路"""
+    
+    def __init__(self, incremental_spf=True, spf_throttle=None):
+        self.nodes = RouterMap(self)  # 存储网络中的节点 {节点ID: 节点对象}，路由器按需创建
+        self.adjacency = {}  # 邻接索引 {节点ID: 只读的 {邻居ID: 代价}}，每个节点一个固定的只读视图
+        self._neighbors = {}  # 只读视图背后可修改的邻接字典 {节点ID: {邻居ID: 代价}}，链路只存这一份
+        self._links_version = 0  # 链路每次变化时递增，用于links的缓存失效
+        self._links_cache = (-1, None)  # (版本, links的只读字典)
+        self.link_latencies = {}  # 链路时延（秒） {(node1, node2): latency}，用于离散事件仿真
+        self.lock = threading.RLock()  # 用于同步访问
+        self.flooding = FloodDispatcher(self)  # 线程模式下的LSA泛洪队列
+        self.incremental_spf = incremental_spf  # 路由器是否使用增量SPF
+        self.spf_throttle = spf_throttle  # SPF节流参数(SPFThrottle)，为None时每个LSA立即计算
+        self.path_cache = PathCache(self)  # 路径查询缓存，由路由器的路由变化定向失效
+        self.route_listeners = ()  # 全网路由变化回调，写时复制的元组
+        self.metrics = None  # 协议指标(NetworkMetrics)，调用enable_metrics后记录直方图
+        self.tracer = None  # 事件追踪(tracing.Tracer)，调用enable_tracing后记录
+        
+    def add_node(self, node_id):
+        """添加节点到拓扑中"""
+        with self.lock:
+            if node_id not in self.nodes:
+                self.nodes.add(node_id)
+                self._add_adjacency(node_id, {})
+                return True
+            return False
+    
+    def add_link(self, node1, node2, cost):
+        """添加链路到拓扑中"""
+        with self.lock:
+            if node1 in self.nodes and node2 in self.nodes:
+                self._set_adjacency(node1, node2, cost)
+                self._set_adjacency(node2, node1, cost)
+                return True
+            return False
+    
+    def update_link_cost(self, node1, node2, cost):
+        """更新链路代价"""
+        with self.lock:
+            if self.has_link(node1, node2):
+                self._set_adjacency(node1, node2, cost)
+                self._set_adjacency(node2, node1, cost)
+                # 通知节点链路变化
+                self._notify_link_change(node1, node2, cost)
+                self._notify_link_change(node2, node1, cost)
+                return True
+            return False
+    
+    def remove_link(self, node1, node2):
+        """移除链路"""
+        with self.lock:
+            if self.has_link(node1, node2):
+                self.link_latencies.pop((node1, node2), None)
+                self.link_latencies.pop((node2, node1), None)
+                self._set_adjacency(node1, node2, None)
+                self._set_adjacency(node2, node1, None)
+                # 通知节点链路变化
+                self._notify_link_change(node1, node2, float('inf'))
+                self._notify_link_change(node2, node1, float('inf'))
+                return True
+            return False
+    
+    def _notify_link_change(self, node_id, neighbor, cost):
+        """通知路由器链路变化，尚未创建的路由器没有运行，无需通知"""
+        router = self.nodes.get_existing(node_id)
+        if router is not None:
+            router.notify_link_change(neighbor, cost)
+    
+    @property
+    def links(self):
+        """所有有向链路 {(node1, node2): cost}，每条链路两个方向各一项
+        
+        已弃用，请使用has_link、get_neighbors或get_all_links。链路只保存在邻接索引中，
+        这里生成O(E)的只读字典并缓存到下次链路变化，仅为兼容保留。
+        """
+        warnings.warn("NetworkTopology.links is deprecated; use has_link, get_neighbors or get_all_links",
+                      DeprecationWarning, stacklevel=2)
+        with self.lock:
+            version, links = self._links_cache
+            if version != self._links_version:
+                links = MappingProxyType({(src, dst): cost for src, neighbors in self.adjacency.items()
+                                          for dst, cost in neighbors.items()})
+                self._links_cache = (self._links_version, links)
+            return links
+    
+    def has_link(self, node1, node2):
+        """判断两个节点之间是否存在链路"""
+        return node2 in self.adjacency.get(node1, _EMPTY_NEIGHBORS)
+    
+    def _add_adjacency(self, node_id, neighbors):
+        """登记节点的邻接字典及其固定的只读视图"""
+        self._neighbors[node_id] = neighbors
+        self.adjacency[node_id] = MappingProxyType(neighbors)
+    
+    def _set_adjacency(self, node_id, neighbor, cost):
+        """就地更新邻接索引，O(1)（cost为None表示删除）"""
+        self._links_version += 1
+        neighbors = self._neighbors.get(node_id)
+        if neighbors is None:
+            neighbors = {}
+            self._add_adjacency(node_id, neighbors)
+        if cost is None:
+            neighbors.pop(neighbor, None)
+        else:
+            neighbors[neighbor] = cost
+    
+    def _discard_adjacency(self, node_id):
+        """删除节点的邻接索引"""
+        self._links_version += 1
+        self._neighbors.pop(node_id, None)
+        self.adjacency.pop(node_id, None)
+    
+    def get_neighbors(self, node_id):
+        """获取节点的邻居节点及链路代价
+        
+        返回只读视图，调用者无法修改拓扑，无需防御性拷贝。视图是实时的，
+        每个节点始终是同一个对象；可能与拓扑修改并发遍历时（线程模式）应遍历其快照。
+        """
+        return self.adjacency.get(node_id, _EMPTY_NEIGHBORS)
+    
+    def get_path(self, src, dst):
+        """查询按各路由器当前路由表转发时从src到dst的完整路径
+        
+        结果经过缓存，路径上的路由器对dst的路由变化时才重新计算。
+        
+        返回:
+            节点ID列表 [src, ..., dst]；没有路由或存在环路时返回None
+        """
+        return self.path_cache.get_path(src, dst)
+    
+    def set_link_latency(self, node1, node2, latency):
+        """设置链路时延（秒），仅在离散事件仿真中生效"""
+        with self.lock:
+            if self.has_link(node1, node2):
+                self.link_latencies[(node1, node2)] = latency
+                self.link_latencies[(node2, node1)] = latency
+                return True
+            return False
+    
+    def get_link_latency(self, node1, node2, default=None):
+        """获取链路时延，未设置时返回default"""
+        return self.link_latencies.get((node1, node2), default)
+    
+    def get_all_nodes(self):
+        """获取所有节点ID"""
+        return list(self.nodes.keys())
+    
+    def get_all_links(self):
+        """获取所有链路信息，用于可视化"""
+        unique_links = {}
+        for src, neighbors in self.adjacency.items():
+            for dst, cost in neighbors.items():
+                if src < dst:  # 只返回单向链路，避免重复
+                    unique_links[(src, dst)] = cost
+        return unique_links
+    
+    def save_to_file(self, filename):
+        """将拓扑保存到文件，扩展名为.bin时使用二进制格式（不保存链路时延）"""
+        with self.lock:
+            if filename.endswith(".bin"):
+                import topology_io
+                topology_io.write_binary(
+                    filename,
+                    self.get_all_nodes(),
+                    ((src, dst, cost) for (src, dst), cost in self.get_all_links().items())
+                )
+                return
+            
+            topology_data = {
+                "nodes": list(self.nodes.keys()),
+                "links": []
+            }
+            
+            for (src, dst), cost in self.get_all_links().items():
+                link = {
+                    "source": src,
+                    "target": dst,
+                    "cost": cost
+                }
+                if (src, dst) in self.link_latencies:
+                    link["latency"] = self.link_latencies[(src, dst)]
+                topology_data["links"].append(link)
+            
+            os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+            with open(filename, 'w') as f:
+                json.dump(topology_data, f, indent=4)
+    
+    def load_from_file(self, filename):
+        """从文件加载拓扑
+        
+        根据文件头自动识别二进制格式；JSON文件较大时使用流式读取。
+        所有节点和链路在一次加锁中批量载入。
+        """
+        import topology_io
+        try:
+            if topology_io.is_binary_topology(filename):
+                compact = topology_io.read_binary(filename)
+                node_ids = compact.nodes.ids
+                adjacency = {node_id: compact.get_neighbors(node_id) for node_id in node_ids}
+                latencies = {}
+            else:
+                node_ids, links = topology_io.read_json(filename)
+                adjacency = {node_id: {} for node_id in node_ids}
+                latencies = {}
+                for link in links:
+                    src, dst, cost = link["source"], link["target"], link["cost"]
+                    if src not in adjacency or dst not in adjacency:
+                        continue
+                    adjacency[src][dst] = cost
+                    adjacency[dst][src] = cost
+                    if "latency" in link:
+                        latencies[(src, dst)] = latencies[(dst, src)] = link["latency"]
+            
+            self._reset_topology(node_ids, adjacency, latencies)
+            return True
+        except Exception as e:
+            print(f"加载拓扑失败: {e}")
+            return False
+    
+    def build(self, node_ids, links, latencies=None):
+        """
+        批量构建拓扑，替换当前的全部节点和链路
+        
+        与逐个调用add_node、add_link相比只加一次锁，每个节点的邻接视图只生成一次，
+        也不创建路由器对象（路由器在第一次访问或start_all_routers时创建）。
+        
+        参数:
+            node_ids: 节点ID序列
+            links: [(node1, node2, cost), ...] 无向链路，端点不在node_ids中的链路被忽略
+            latencies: 可选的链路时延 {(node1, node2): latency}
+        """
+        adjacency = {node_id: {} for node_id in node_ids}
+        for node1, node2, cost in links:
+            if node1 in adjacency and node2 in adjacency:
+                adjacency[node1][node2] = cost
+                adjacency[node2][node1] = cost
+        link_latencies = {}
+        for (node1, node2), latency in (latencies or {}).items():
+            link_latencies[(node1, node2)] = link_latencies[(node2, node1)] = latency
+        self._reset_topology(adjacency.keys(), adjacency, link_latencies)
+    
+    def _reset_topology(self, node_ids, adjacency, latencies):
+        """用给定的节点、邻接表和链路时延整体替换当前拓扑（一次加锁）"""
+        with self.lock:
+            # 清空当前拓扑
+            self.nodes.clear()
+            self.adjacency.clear()
+            self._neighbors.clear()
+            self._links_version += 1
+            self.link_latencies.clear()
+            
+            self.nodes.update(node_ids)
+            for node_id in self.nodes:
+                neighbors = adjacency.get(node_id)
+                self._add_adjacency(node_id, neighbors if type(neighbors) is dict else dict(neighbors or {}))
+            self.link_latencies.update(latencies)
+            self.path_cache.clear()
+    
+    def subscribe_routes(self, callback):
+        """订阅所有路由器的路由变化，callback以RouteDelta调用（见Router.subscribe）"""
+        with self.lock:
+            self.route_listeners = self.route_listeners + (callback,)
+    
+    def unsubscribe_routes(self, callback):
+        """取消全网路由变化订阅"""
+        with self.lock:
+            self.route_listeners = tuple(c for c in self.route_listeners if c != callback)
+    
+    def route_changes(self, maxlen=None):
+        """创建订阅所有路由器路由变化的RouteChangeStream"""
+        return RouteChangeStream(self.subscribe_routes, self.unsubscribe_routes, maxlen)
+    
+    def enable_metrics(self):
+        """启用SPF耗时和泛洪扇出直方图，返回NetworkMetrics；已启用时返回现有对象"""
+        if self.metrics is None:
+            from metrics import NetworkMetrics
+            self.metrics = NetworkMetrics(self)
+        return self.metrics
+    
+    def disable_metrics(self):
+        """停止记录直方图，协议自身的计数器不受影响"""
+        self.metrics = None
+    
+    def enable_tracing(self, capacity=1 << 20, events=None):
+        """开始把协议事件记录到环形缓冲区，返回Tracer；已启用时返回现有对象
+        
+        events为要记录的事件类型（tracing中的常量）集合，默认全部记录。
+        """
+        if self.tracer is None:
+            from tracing import Tracer
+            self.tracer = Tracer(capacity, events)
+        return self.tracer
+    
+    def disable_tracing(self):
+        """停止记录事件，已记录的内容仍可通过之前返回的Tracer写出"""
+        self.tracer = None
+    
+    def partitioned(self, workers=None, **kwargs):
+        """
+        按当前拓扑创建多进程分区仿真(partition.PartitionedSimulation)
+        
+        图被划分为workers个分区，每个工作进程运行一个分区的路由器，跨分区的LSA
+        成批经管道交换。kwargs传给PartitionedSimulation，如assignment、seed。
+        """
+        from partition import PartitionedSimulation
+        return PartitionedSimulation(self, workers, **kwargs)
+    
+    def to_compact(self):
+        """转换为整数下标、CSR格式的只读紧凑拓扑(CompactTopology)"""
+        from compact import CompactTopology
+        return CompactTopology.from_network(self)
+    
+    def get_compact_lsdb(self):
+        """取得紧凑的LSDB快照(CompactTopology)，适合大规模拓扑的离线分析
+        
+        与get_lsdb_snapshot内容相同，但以整数下标和CSR数组存放，
+        不再为每个节点保留一个字典。
+        """
+        from compact import CompactTopology
+        return CompactTopology.from_adjacency(self.get_lsdb_snapshot())
+    
+    def get_lsdb_snapshot(self):
+        """取得一份链路状态数据库快照 {节点ID: {邻居ID: 代价}}
+        
+        网络收敛后各路由器的LSDB相同，取第一个运行中路由器的LSDB即可；
+        没有运行中的路由器时使用真实拓扑。
+        """
+        for router in self.nodes.existing():
+            protocol = router.link_state_protocol
+            if protocol.running:
+                with protocol.lock:
+                    return dict(protocol.link_state_database)
+        return {node_id: dict(self.get_neighbors(node_id)) for node_id in self.nodes}
+    
+    def start_all_routers(self, runtime=None):
+        """启动所有路由器的链路状态协议
+        
+        参数:
+            runtime: 可选的运行时。传入EventScheduler时协议在单线程中由虚拟时钟
+                驱动，调用runtime.run_until_idle()即可运行到收敛；传入AsyncioRuntime时
+                每个路由器是事件循环中的一个协程，按真实时间运行，await runtime.wait_idle()
+                等待收敛；为None时每个路由器启动一个后台线程。
+        """
+        for router in self.nodes.values():
+            router.start_link_state_protocol(runtime)
+    
+    def stop_all_routers(self):
+        """停止所有路由器的链路状态协议"""
+        for router in self.nodes.existing():
             router.stop_link_state_protocol()
\ No newline at end of file
@@ -0,0 +1,74 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dijkstra import calculate_shortest_paths
+
+_worker_topology = None  # 工作进程中的拓扑快照，由_init_worker设置
+
+def _init_worker(topology):
+    """工作进程初始化：每个进程只接收一次拓扑快照"""
+    global _worker_topology
+    _worker_topology = topology
+
+def _compute_chunk(sources):
+    """在工作进程中计算一批源节点的路由表"""
+    return [(source, calculate_shortest_paths(_worker_topology, source)) for source in sources]
+
+def compute_routing_tables_parallel(topology, sources=None, workers=None, chunks_per_worker=4):
+    """
+    使用进程池并行计算多个路由器的路由表
+
+    参数:
+        topology: {node_id: {neighbor_id: cost, ...}, ...} 格式的拓扑快照（LSA对象亦可）
+        sources: 需要计算路由表的节点，默认为全部节点
+        workers: 工作进程数，默认为CPU核心数
+        chunks_per_worker: 每个进程分到的批次数，批次越多负载越均衡
+
+    返回:
+        {source: {destination: (next_hop, distance), ...}, ...}
+    """
+    if sources is None:
+        sources = list(topology)
+    else:
+        sources = list(sources)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(sources)))
+
+    if workers == 1:
+        return {source: calculate_shortest_paths(topology, source) for source in sources}
+
+    # 按轮转方式划分源节点，相邻编号的节点分到不同批次
+    chunk_count = workers * chunks_per_worker
+    chunks = [sources[i::chunk_count] for i in range(chunk_count)]
+    chunks = [chunk for chunk in chunks if chunk]
+
+    tables = {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(topology,)) as executor:
+        for results in executor.map(_compute_chunk, chunks):
+            tables.update(results)
+    return tables
+
+def recompute_routes_parallel(network, lsdb=None, workers=None):
+    """
+    并行重新计算网络中所有路由器的路由表并安装
+
+    参数:
+        network: NetworkTopology对象
+        lsdb: 已收敛的链路状态数据库快照，默认由network.get_lsdb_snapshot()获取
+        workers: 工作进程数，默认为CPU核心数
+
+    返回:
+        更新了路由表的路由器数量
+    """
+    if lsdb is None:
+        lsdb = network.get_lsdb_snapshot()
+    topology = dict(lsdb)
+    for neighbors in lsdb.values():
+        for neighbor in neighbors:
+            if neighbor not in topology:
+                topology[neighbor] = {}
+
+    tables = compute_routing_tables_parallel(topology, [n for n in network.nodes if n in lsdb], workers)
+    for node_id, routing_table in tables.items():
+        network.nodes[node_id].install_routing_table(routing_table)
+    return len(tables)
\ No newline at end of file
@@ -0,0 +1,390 @@
+"""
+多进程分区仿真
+
+把拓扑划分为若干分区，每个工作进程只持有自己分区的路由器和它们的链路状态协议，
+在本进程的离散事件仿真引擎上运行。发往其他分区邻居的LSA不直接投递，而是按目标
+分区攒成批次，经管道交给协调进程转发。
+
+协调进程按轮推进：每一轮各工作进程并行处理收到的批次并运行到本地收敛，
+然后交回新产生的跨分区批次。工作进程只在被推进时运行，因此某一轮结束后没有任何
+跨分区批次时，全网即已收敛（周期性摘要不参与判断）。各分区的虚拟时钟相互独立，
+收敛结果（LSDB和路由表）与单进程运行一致，但虚拟时间不再反映全网的收敛时刻。
+
+用法:
+    with network.partitioned(workers=8) as simulation:
+        simulation.start()
+        table = simulation.get_routing_table("A")
+        simulation.update_link_cost("A", "B", 10)  # 运行到重新收敛
+"""
+
+import multiprocessing
+import os
+import pickle
+import time
+import traceback
+from collections import deque
+
+from event_scheduler import EventScheduler
+from lsa import LSA
+
+def partition_graph(adjacency, parts, refine_passes=4, imbalance=0.03):
+    """
+    把图划分为大小均衡、跨分区链路较少的分区
+
+    先按广度优先遍历顺序把节点切成大小相同的连续段（相邻节点大多落在同一段），
+    再做几轮贪心的边界调整：边界节点的多数邻居在另一个分区且该分区未超出
+    容量上限时，把它移过去。
+
+    参数:
+        adjacency: {节点ID: {邻居ID: 代价}}
+        parts: 分区数
+        refine_passes: 边界调整的最多轮数
+        imbalance: 允许分区大小超过平均值的比例
+
+    返回:
+        {节点ID: 分区号}，分区号为 0 .. parts-1
+    """
+    count = len(adjacency)
+    parts = max(1, min(parts, count))
+    order = []
+    seen = set()
+    for start in adjacency:
+        if start in seen:
+            continue
+        seen.add(start)
+        queue = deque([start])
+        while queue:
+            node_id = queue.popleft()
+            order.append(node_id)
+            for neighbor in adjacency[node_id]:
+                if neighbor not in seen and neighbor in adjacency:
+                    seen.add(neighbor)
+                    queue.append(neighbor)
+
+    assignment = {node_id: i * parts // count for i, node_id in enumerate(order)}
+    if parts == 1:
+        return assignment
+    sizes = [0] * parts
+    for part in assignment.values():
+        sizes[part] += 1
+    limit = int(-(-count // parts) * (1 + imbalance))
+
+    for _ in range(refine_passes):
+        moved = 0
+        for node_id in order:
+            part = assignment[node_id]
+            counts = {}
+            for neighbor in adjacency[node_id]:
+                neighbor_part = assignment.get(neighbor)
+                if neighbor_part is not None:
+                    counts[neighbor_part] = counts.get(neighbor_part, 0) + 1
+            if not counts:
+                continue
+            best = max(counts, key=counts.get)
+            if (best != part and counts[best] > counts.get(part, 0)
+                    and sizes[best] < limit and sizes[part] > 1):
+                assignment[node_id] = best
+                sizes[part] -= 1
+                sizes[best] += 1
+                moved += 1
+        if not moved:
+            break
+    return assignment
+
+def edge_cut(adjacency, assignment):
+    """跨分区的无向链路数"""
+    cut = 0
+    for node_id, neighbors in adjacency.items():
+        part = assignment[node_id]
+        for neighbor in neighbors:
+            if assignment[neighbor] != part:
+                cut += 1
+    return cut // 2
+
+
+class _PartitionRuntime(EventScheduler):
+    """工作进程中的运行时：分区内的LSA按事件投递，发往其他分区的LSA攒入发件批次"""
+
+    def __init__(self, remote, seed=None, default_latency=0.001):
+        super().__init__(seed=seed, default_latency=default_latency)
+        self.remote = remote  # 其他分区的邻居 {节点ID: 分区号}
+        self.outbox = {}  # {目标分区号: [(源节点, 邻居, LSA, 链路时延)]}
+        self.lsas = {}  # 收到的最新LSA {源节点: LSA}，同一LSA在本进程内只保留一个对象
+        self.messages_sent = 0
+        self.messages_received = 0
+
+    def send(self, router, neighbor, lsa_data):
+        part = self.remote.get(neighbor)
+        if part is None:
+            super().send(router, neighbor, lsa_data)
+            return
+        latency = router.network.get_link_latency(router.node_id, neighbor, self.default_latency)
+        self.outbox.setdefault(part, []).append((router.node_id, neighbor, lsa_data, latency))
+        self.messages_sent += 1
+
+    def receive(self, network, batch):
+        """把其他分区转来的一批LSA和同步消息按链路时延加入事件队列"""
+        lsas = self.lsas
+        for source_id, neighbor, lsa_data, latency in batch:
+            if lsa_data.__class__ is LSA:
+                # 反序列化得到的是新对象，换成本进程中已有的同一实例，使LSDB共享引用
+                known = lsas.get(lsa_data.origin)
+                if known is not None and known.seq == lsa_data.seq:
+                    lsa_data = known
+                elif known is None or known.seq < lsa_data.seq:
+                    lsas[lsa_data.origin] = lsa_data
+            self.schedule(latency, self._deliver, network, source_id, neighbor, lsa_data)
+        self.messages_received += len(batch)
+
+    def run_round(self):
+        """运行到本地收敛，返回(处理的事件数, {目标分区号: 序列化的批次})"""
+        before = self.events_processed
+        self.run_until_idle()
+        outbox = {part: pickle.dumps(batch, pickle.HIGHEST_PROTOCOL) for part, batch in self.outbox.items()}
+        self.outbox = {}
+        return self.events_processed - before, outbox
+
+
+def _worker_main(conn, node_ids, adjacency, remote, latencies, options):
+    """工作进程：持有一个分区的路由器，执行协调进程发来的命令"""
+    from network import NetworkTopology
+
+    network = NetworkTopology(incremental_spf=options["incremental_spf"], spf_throttle=options["spf_throttle"])
+    network._reset_topology(node_ids, adjacency, latencies)
+    runtime = _PartitionRuntime(remote, seed=options["seed"], default_latency=options["default_latency"])
+    del adjacency, latencies
+
+    while True:
+        command, args = conn.recv()
+        try:
+            if command == "start":
+                network.start_all_routers(runtime)
+                reply = runtime.run_round()
+            elif command == "deliver":
+                for data in args:
+                    runtime.receive(network, pickle.loads(data))
+                reply = runtime.run_round()
+            elif command in ("update_link_cost", "remove_link"):
+                # 第一个端点属于本分区；另一端在其他分区时，邻接表中只保留本分区节点
+                neighbor = args[1]
+                applied = getattr(network, command)(*args)
+                if neighbor not in network.nodes:
+                    network._discard_adjacency(neighbor)
+                reply = (applied, runtime.run_round())
+            elif command == "tables":
+                wanted = network.nodes if args is None else [n for n in args if n in network.nodes]
+                reply = {node_id: dict(network.nodes[node_id].routing_table) for node_id in wanted}
+            elif command == "stats":
+                reply = _worker_stats(network, runtime)
+            elif command == "stop":
+                network.stop_all_routers()
+                conn.send(("ok", None))
+                break
+            else:
+                raise ValueError(f"未知命令: {command}")
+        except Exception:
+            conn.send(("error", traceback.format_exc()))
+        else:
+            conn.send(("ok", reply))
+    conn.close()
+
+def _worker_stats(network, runtime):
+    protocols = [router.link_state_protocol for router in network.nodes.existing()]
+    return {
+        "routers": len(protocols),
+        "events": runtime.events_processed,
+        "messages_sent": runtime.messages_sent,
+        "messages_received": runtime.messages_received,
+        "lsa_sent": sum(p.lsa_sent for p in protocols),
+        "lsa_received": sum(p.lsa_received for p in protocols),
+        "lsa_discarded": sum(p.lsa_discarded for p in protocols),
+        "spf_runs": sum(p.spf_runs for p in protocols),
+        "spf_time": sum(p.spf_time for p in protocols),
+    }
+
+
+class PartitionedSimulation:
+    """
+    多进程分区仿真的协调进程，由NetworkTopology.partitioned()创建
+
+    创建时按当前拓扑启动工作进程，之后工作进程持有协议状态，
+    对原NetworkTopology的修改不会同步过去，链路变化应通过本对象的方法进行。
+    """
+
+    def __init__(self, network, workers=None, assignment=None, seed=None, default_latency=0.001,
+                 start_method=None):
+        """
+        参数:
+            network: 提供拓扑、链路时延和SPF选项的NetworkTopology
+            workers: 工作进程数，默认为CPU核心数
+            assignment: 预先计算的 {节点ID: 分区号}，默认由partition_graph划分
+            seed: 各工作进程事件引擎的随机种子（分区号会加到种子上）
+            default_latency: 未单独设置时延的链路使用的默认时延（秒）
+            start_method: multiprocessing的启动方式，默认为平台默认值
+        """
+        adjacency = network.adjacency
+        if assignment is None:
+            assignment = partition_graph(adjacency, workers or os.cpu_count() or 1)
+        self.assignment = assignment
+        self.parts = max(assignment.values(), default=0) + 1
+        self.rounds = 0  # 累计的交换轮数
+        self.batches = 0  # 累计转发的跨分区批次数
+        self.closed = False
+
+        owned = [[] for _ in range(self.parts)]
+        for node_id, part in assignment.items():
+            owned[part].append(node_id)
+        context = multiprocessing.get_context(start_method)
+        self._connections = []
+        self._processes = []
+        for part, node_ids in enumerate(owned):
+            part_adjacency = {node_id: dict(adjacency[node_id]) for node_id in node_ids}
+            remote = {}
+            for neighbors in part_adjacency.values():
+                for neighbor in neighbors:
+                    neighbor_part = assignment[neighbor]
+                    if neighbor_part != part:
+                        remote[neighbor] = neighbor_part
+            latencies = {key: latency for key, latency in network.link_latencies.items()
+                         if assignment.get(key[0]) == part}
+            options = {
+                "incremental_spf": network.incremental_spf,
+                "spf_throttle": network.spf_throttle,
+                "seed": None if seed is None else seed + part,
+                "default_latency": default_latency,
+            }
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(target=_worker_main, daemon=True,
+                                      args=(child_conn, node_ids, part_adjacency, remote, latencies, options))
+            process.start()
+            child_conn.close()
+            self._connections.append(parent_conn)
+            self._processes.append(process)
+
+    def _call(self, commands):
+        """向多个工作进程发送命令 {分区号: (命令, 参数)}，并行执行后收集结果"""
+        for part, command in commands.items():
+            self._connections[part].send(command)
+        results = {}
+        errors = []
+        for part in commands:
+            status, reply = self._connections[part].recv()
+            if status == "error":
+                errors.append(f"分区 {part}:\n{reply}")
+            results[part] = reply
+        if errors:
+            raise RuntimeError("工作进程执行失败\n" + "\n".join(errors))
+        return results
+
+    def _broadcast(self, command, args=None):
+        return self._call({part: (command, args) for part in range(self.parts)})
+
+    def _exchange(self, rounds):
+        """
+        转发跨分区批次直到没有新的批次，即全网收敛
+
+        参数:
+            rounds: 上一步各工作进程的结果 {分区号: (事件数, {目标分区号: 批次})}
+
+        返回:
+            {"rounds": 轮数, "events": 处理的事件数, "batches": 转发的批次数}
+        """
+        stats = {"rounds": 0, "events": 0, "batches": 0}
+        while True:
+            inbound = {}
+            for events, outbox in rounds.values():
+                stats["events"] += events
+                for part, data in outbox.items():
+                    inbound.setdefault(part, []).append(data)
+            if not inbound:
+                break
+            stats["rounds"] += 1
+            stats["batches"] += sum(len(batches) for batches in inbound.values())
+            rounds = self._call({part: ("deliver", batches) for part, batches in inbound.items()})
+        self.rounds += stats["rounds"]
+        self.batches += stats["batches"]
+        return stats
+
+    def start(self):
+        """启动所有路由器并运行到全网收敛，返回本次的轮数、事件数、批次数和实际耗时"""
+        started = time.perf_counter()
+        stats = self._exchange(self._broadcast("start"))
+        stats["wall_time"] = time.perf_counter() - started
+        return stats
+
+    def _change_link(self, command, node1, node2, *args):
+        parts = {self.assignment[node1]: (command, (node1, node2) + args)}
+        parts.setdefault(self.assignment[node2], (command, (node2, node1) + args))
+        started = time.perf_counter()
+        results = self._call(parts)
+        applied = all(result[0] for result in results.values())
+        stats = self._exchange({part: result[1] for part, result in results.items()})
+        stats["applied"] = applied
+        stats["wall_time"] = time.perf_counter() - started
+        return stats
+
+    def update_link_cost(self, node1, node2, cost):
+        """修改链路代价并运行到重新收敛，返回统计信息，"applied"为False表示链路不存在"""
+        return self._change_link("update_link_cost", node1, node2, cost)
+
+    def remove_link(self, node1, node2):
+        """删除链路并运行到重新收敛，返回统计信息，"applied"为False表示链路不存在"""
+        return self._change_link("remove_link", node1, node2)
+
+    def get_routing_table(self, node_id):
+        """单个路由器的路由表 {目的节点: (下一跳, 距离)}"""
+        part = self.assignment[node_id]
+        return self._call({part: ("tables", [node_id])})[part][node_id]
+
+    def collect_routing_tables(self, node_ids=None):
+        """
+        收集路由表
+
+        参数:
+            node_ids: 需要的节点，默认为全部节点（规模很大时结果也很大）
+
+        返回:
+            {节点ID: {目的节点: (下一跳, 距离)}}
+        """
+        if node_ids is None:
+            results = self._broadcast("tables")
+        else:
+            wanted = {}
+            for node_id in node_ids:
+                wanted.setdefault(self.assignment[node_id], []).append(node_id)
+            results = self._call({part: ("tables", ids) for part, ids in wanted.items()})
+        tables = {}
+        for part_tables in results.values():
+            tables.update(part_tables)
+        return tables
+
+    def stats(self):
+        """各分区计数器的合计，以及分区数、交换轮数和批次数"""
+        totals = {}
+        for part_stats in self._broadcast("stats").values():
+            for name, value in part_stats.items():
+                totals[name] = totals.get(name, 0) + value
+        totals.update(partitions=self.parts, rounds=self.rounds, batches=self.batches)
+        return totals
+
+    def close(self):
+        """停止所有工作进程"""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self._broadcast("stop")
+        except (EOFError, OSError):
+            pass
+        for conn in self._connections:
+            conn.close()
+        for process in self._processes:
+            process.join(5)
+            if process.is_alive():
+                process.terminate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
\ No newline at end of file
@@ -0,0 +1,151 @@
+"""
+路径查询缓存
+
+按路由器的路由表逐跳求出从源到目的的完整转发路径，并以LRU方式缓存。
+一条路径只取决于路径上各路由器去往该目的节点的路由，因此缓存项只在这些路由器
+中某一个对该目的节点的路由发生变化时失效；其余路由变化（包括路径之外的链路
+变化）不影响缓存项。
+"""
+
+import threading
+from collections import OrderedDict
+
+class PathCache:
+    """
+    带定向失效的LRU路径缓存
+
+    每个缓存项记录计算时的路由版本。路由器路由变化时调用invalidate_routes，
+    版本号加一，并通过 路由器 -> 经过它的缓存项 的反向索引删除受影响的项。
+    计算路径期间发生过路由变化时，结果不写入缓存，避免缓存过期的路径。
+    """
+
+    def __init__(self, network, maxsize=4096):
+        self.network = network
+        self.maxsize = maxsize
+        self.entries = OrderedDict()  # {(src, dst): (路径, 版本, 依赖的节点)}，按最近使用排序
+        self.through = {}  # 反向索引 {节点ID: set((src, dst))}，缓存路径经过该节点
+        self.version = 0  # 路由版本，每次路由变化加一
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0  # 被路由变化删除的缓存项数
+        self.lock = threading.Lock()
+
+    def get_path(self, src, dst):
+        """
+        查询从src到dst的转发路径
+
+        返回:
+            节点ID列表 [src, ..., dst]；没有路由或存在环路时返回None
+        """
+        key = (src, dst)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            version = self.version
+
+        nodes = self.network.nodes
+        if src not in nodes or dst not in nodes:
+            return None  # 节点不存在时不缓存
+        path, visited = self._trace(src, dst)
+
+        with self.lock:
+            if self.version == version and self.maxsize > 0:
+                self._store(key, path, version, visited)
+        return path
+
+    def _trace(self, src, dst):
+        """
+        沿各路由器的路由表逐跳求路径，不获取路由器锁
+
+        返回:
+            (路径或None, 查询过路由的节点列表)
+        """
+        nodes = self.network.nodes
+        visited = []
+        seen = set()
+        current = src
+        while current != dst:
+            visited.append(current)
+            seen.add(current)
+            router = nodes.get_existing(current)
+            route = router.routing_table.get(dst) if router is not None else None
+            if route is None:
+                return None, visited  # 黑洞
+            current = route[0]
+            if current in seen:
+                return None, visited  # 环路
+        return visited + [dst], visited
+
+    def _store(self, key, path, version, depends):
+        """写入缓存项并维护反向索引，超出容量时淘汰最久未使用的项"""
+        old = self.entries.get(key)
+        if old is not None:
+            # 两个线程同时未命中同一项时，后写入的覆盖先写入的，先撤销旧项的反向索引
+            self._unindex(key, old[2])
+        self.entries[key] = (path, version, depends)
+        for node_id in depends:
+            self.through.setdefault(node_id, set()).add(key)
+        while len(self.entries) > self.maxsize:
+            old_key, (_, _, old_depends) = self.entries.popitem(last=False)
+            self._unindex(old_key, old_depends)
+
+    def _unindex(self, key, depends):
+        for node_id in depends:
+            keys = self.through.get(node_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.through[node_id]
+
+    def invalidate_routes(self, node_id, destinations=None):
+        """
+        路由器node_id的路由发生变化
+
+        参数:
+            destinations: 路由变化的目的节点集合，为None时表示整张路由表被替换
+        """
+        with self.lock:
+            self.version += 1
+            keys = self.through.get(node_id)
+            if not keys:
+                return
+            if destinations is None:
+                stale = list(keys)
+            else:
+                stale = [key for key in keys if key[1] in destinations]
+            removed = 0
+            for key in stale:
+                entry = self.entries.pop(key, None)
+                if entry is None:
+                    keys.discard(key)  # 缓存项已不存在，只清理残留的索引
+                    continue
+                self._unindex(key, entry[2])
+                removed += 1
+            if not keys:
+                self.through.pop(node_id, None)
+            self.invalidations += removed
+
+    def clear(self):
+        """清空缓存（拓扑被整体替换时）"""
+        with self.lock:
+            self.version += 1
+            self.entries.clear()
+            self.through.clear()
+
+    def stats(self):
+        """命中率等统计信息"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self.entries),
+                "maxsize": self.maxsize,
+                "version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
\ No newline at end of file
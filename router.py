@@ -1,57 +1,243 @@
-import threading
-import time
-from link_state import LinkStateProtocol
-from dijkstra import calculate_shortest_paths
-
-class Router:
-    """路由器类，代表网络中的一个节点"""
-    
-    def __init__(self, node_id, network):
-        self.node_id = node_id
-        self.network = network
-        self.routing_table = {}  # 路由表: {目的节点: (下一跳, 距离)}
-        self.link_state_protocol = LinkStateProtocol(self)
-        self.is_running = False
-        self.lock = threading.RLock()
-    
-    def start_link_state_protocol(self):
-        """启动链路状态协议"""
-        self.is_running = True
-        self.link_state_protocol.start()
-    
-    def stop_link_state_protocol(self):
-        """停止链路状态协议"""
-        self.is_running = False
-        self.link_state_protocol.stop()
-    
-    def get_neighbors(self):
-        """获取邻居节点"""
-        return self.network.get_neighbors(self.node_id)
-    
-    def notify_link_change(self, neighbor, cost):
-        """通知链路状态变化"""
-        if self.is_running:
-            self.link_state_protocol.update_link_state(neighbor, cost)
-    
-    def receive_lsa(self, source_id, lsa_data):
-        """接收并处理链路状态通告"""
-        self.link_state_protocol.process_lsa(source_id, lsa_data)
-    
-    def update_routing_table(self, topology):
-        """基于拓扑信息更新路由表"""
-        with self.lock:
-            self.routing_table = calculate_shortest_paths(topology, self.node_id)
-    
-    def get_routing_table(self):
-        """获取路由表"""
-        with self.lock:
-            return self.routing_table.copy()
-    
-    def forward_packet(self, destination):
-        """转发数据包到指定目的地（仿真）"""
-        with self.lock:
-            if destination in self.routing_table:
-                next_hop, distance = self.routing_table[destination]
-                return next_hop
-            else:
+import threading
+import time
+from collections import deque
+import tracing
+from link_state import LinkStateProtocol
+from dijkstra import IncrementalSPF
+
+class RouteDelta:
+    """一次路由计算引起的路由表变化"""
+    
+    __slots__ = ('router_id', 'version', 'added', 'removed', 'changed')
+    
+    def __init__(self, router_id, version, added, removed, changed):
+        self.router_id = router_id  # 路由表所属的路由器
+        self.version = version  # 变化后的路由表版本
+        self.added = added  # 新增的路由 {目的节点: (下一跳, 距离)}
+        self.removed = removed  # 删除的路由 {目的节点: 删除前的(下一跳, 距离)}
+        self.changed = changed  # 变化的路由 {目的节点: (变化前的路由, 变化后的路由)}
+    
+    @classmethod
+    def from_changes(cls, router_id, version, changes, routing_table):
+        """由 {目的节点: 变化前的路由或None} 和变化后的路由表生成"""
+        added, removed, changed = {}, {}, {}
+        for destination, old_route in changes.items():
+            route = routing_table.get(destination)
+            if route is None:
+                if old_route is not None:
+                    removed[destination] = old_route
+            elif old_route is None:
+                added[destination] = route
+            else:
+                changed[destination] = (old_route, route)
+        return cls(router_id, version, added, removed, changed)
+    
+    def __len__(self):
+        return len(self.added) + len(self.removed) + len(self.changed)
+    
+    def apply(self, routing_table):
+        """把变化应用到一份路由表副本 {目的节点: (下一跳, 距离)} 上"""
+        routing_table.update(self.added)
+        for destination, (_, route) in self.changed.items():
+            routing_table[destination] = route
+        for destination in self.removed:
+            routing_table.pop(destination, None)
+    
+    def __repr__(self):
+        return (f"RouteDelta({self.router_id!r}, version={self.version}, added={len(self.added)}, "
+                f"removed={len(self.removed)}, changed={len(self.changed)})")
+
+
+class RouteChangeStream:
+    """
+    路由变化流，由Router.changes()或NetworkTopology.route_changes()创建
+    
+    订阅后把每次的RouteDelta放入队列，消费者在自己的线程中逐个取出。
+    设置maxlen时队列满后丢弃最旧的变化并置overflowed，消费者应重新读取完整路由表。
+    """
+    
+    __slots__ = ('_unsubscribe', 'deltas', 'maxlen', 'overflowed')
+    
+    def __init__(self, subscribe, unsubscribe, maxlen=None):
+        self.deltas = deque()
+        self.maxlen = maxlen
+        self.overflowed = False
+        self._unsubscribe = unsubscribe
+        subscribe(self._append)
+    
+    def _append(self, delta):
+        if self.maxlen is not None and len(self.deltas) >= self.maxlen:
+            self.deltas.popleft()
+            self.overflowed = True
+        self.deltas.append(delta)
+    
+    def __iter__(self):
+        """取出已到达的全部变化（迭代到队列为空为止）"""
+        deltas = self.deltas
+        while deltas:
+            yield deltas.popleft()
+    
+    def __len__(self):
+        return len(self.deltas)
+    
+    def close(self):
+        """取消订阅"""
+        self._unsubscribe(self._append)
+
+
+class Router:
+    """路由器类，代表网络中的一个节点"""
+    
+    __slots__ = (
+        'node_id', 'network', 'routing_table', 'table_version', 'subscribers', 'spf',
+        'link_state_protocol', 'is_running', 'lock',
+    )
+    
+    def __init__(self, node_id, network):
+        self.node_id = node_id
+        self.network = network
+        self.routing_table = {}  # 路由表: {目的节点: (下一跳, 距离)}
+        self.table_version = 0  # 路由表版本，每次路由变化加一
+        self.subscribers = ()  # 路由变化回调，写时复制的元组
+        self.spf = IncrementalSPF(node_id)  # 保存最短路径树，支持增量计算
+        self.link_state_protocol = LinkStateProtocol(self)
+        self.is_running = False
+        self.lock = threading.RLock()
+    
+    def start_link_state_protocol(self, runtime=None):
+        """启动链路状态协议"""
+        self.is_running = True
+        self.link_state_protocol.start(runtime)
+    
+    def stop_link_state_protocol(self):
+        """停止链路状态协议"""
+        self.is_running = False
+        self.link_state_protocol.stop()
+    
+    def get_neighbors(self):
+        """获取邻居节点"""
+        return self.network.get_neighbors(self.node_id)
+    
+    def notify_link_change(self, neighbor, cost):
+        """通知链路状态变化"""
+        if self.is_running:
+            self.link_state_protocol.update_link_state(neighbor, cost)
+    
+    def receive_lsa(self, source_id, lsa_data):
+        """接收并处理链路状态通告"""
+        self.link_state_protocol.process_lsa(source_id, lsa_data)
+    
+    def update_routing_table(self, topology):
+        """基于拓扑信息更新路由表（完整计算）"""
+        with self.lock:
+            changed = self.spf.reset(topology)
+            self.routing_table = self.spf.routing_table
+            delta = self._new_version(changed) if changed else None
+        if changed:
+            self._routes_changed(changed, delta)
+    
+    def apply_link_changes(self, changes):
+        """基于链路变化增量更新路由表
+        
+        参数:
+            changes: [(node_id, neighbor_id, cost), ...]，cost为inf表示链路删除
+        """
+        with self.lock:
+            changed = self.spf.apply_changes(changes)
+            self.routing_table = self.spf.routing_table
+            delta = self._new_version(changed) if changed else None
+        if changed:
+            self._routes_changed(changed, delta)
+    
+    def install_routing_table(self, routing_table):
+        """安装外部计算好的路由表（如批量计算的结果）
+        
+        routing_table归路由器所有，同时作为增量计算的路由表，下一次完整计算与它比较得到变化；
+        此时最短路径树与路由表不再一致，下一次路由计算使用完整的Dijkstra。
+        """
+        with self.lock:
+            old_table = self.routing_table
+            self.routing_table = self.spf.routing_table = routing_table
+            self.link_state_protocol.full_spf_needed = True
+            delta = self._new_version(None, old_table)
+        self._routes_changed(None, delta)
+    
+    def _new_version(self, destinations, old_table=None):
+        """
+        持有路由器锁时调用：路由表版本加一，有订阅者时生成对应的RouteDelta
+        
+        参数:
+            destinations: {变化的目的节点: 变化前的路由}，为None表示整张路由表被替换
+            old_table: 整张路由表被替换时的旧路由表
+        """
+        self.table_version += 1
+        if not (self.subscribers or self.network.route_listeners):
+            return None
+        if destinations is None:
+            # 只有存在订阅者时才逐项比较新旧路由表
+            destinations = {dest: route for dest, route in old_table.items() if self.routing_table.get(dest) != route}
+            destinations.update((dest, None) for dest in self.routing_table if dest not in old_table)
+        return RouteDelta.from_changes(self.node_id, self.table_version, destinations, self.routing_table)
+    
+    def _routes_changed(self, destinations, delta=None):
+        """
+        路由变化后使路径缓存失效、通知订阅者并记录追踪事件（释放路由器锁后调用）
+        
+        参数:
+            destinations: {变化的目的节点: 变化前的路由}，为None表示整张路由表被替换
+            delta: 持有锁时生成的RouteDelta，没有订阅者时为None
+        """
+        self.network.path_cache.invalidate_routes(self.node_id, destinations)
+        if delta is not None:
+            for callback in self.subscribers + self.network.route_listeners:
+                callback(delta)
+        tracer = self.network.tracer
+        if tracer is not None and tracing.ROUTE_CHANGE in tracer.events:
+            now = self.link_state_protocol._now()
+            record, event, node_id, routing_table = tracer.record, tracing.ROUTE_CHANGE, self.node_id, self.routing_table
+            if destinations is None:
+                record(now, event, node_id, None, None, 0, len(routing_table))
+                return
+            for destination in destinations:
+                route = routing_table.get(destination)
+                if route is None:
+                    record(now, event, node_id, None, destination, 0, 0.0)
+                else:
+                    record(now, event, node_id, route[0], destination, 0, route[1])
+    
+    def get_routing_table(self):
+        """获取路由表"""
+        with self.lock:
+            return self.routing_table.copy()
+    
+    def get_versioned_routing_table(self):
+        """获取 (路由表版本, 路由表副本)，之后只需应用版本号更大的RouteDelta"""
+        with self.lock:
+            return self.table_version, self.routing_table.copy()
+    
+    def subscribe(self, callback):
+        """
+        订阅路由变化，每次路由表变化后以RouteDelta调用callback
+        
+        回调在执行路由计算的线程（或运行时）中、持有协议锁时同步调用，应尽快返回。
+        """
+        with self.lock:
+            self.subscribers = self.subscribers + (callback,)
+    
+    def unsubscribe(self, callback):
+        """取消订阅"""
+        with self.lock:
+            self.subscribers = tuple(s for s in self.subscribers if s != callback)
+    
+    def changes(self, maxlen=None):
+        """创建订阅本路由器路由变化的RouteChangeStream"""
+        return RouteChangeStream(self.subscribe, self.unsubscribe, maxlen)
+    
+    def forward_packet(self, destination):
+        """转发数据包到指定目的地（仿真）"""
+        with self.lock:
+            if destination in self.routing_table:
+                next_hop, distance = self.routing_table[destination]
+                return next_hop
+            else:
                 return None  # 目的地不可达
\ No newline at end of file
@@ -0,0 +1,137 @@
+"""
+标准合成拓扑生成器
+
+每个生成器返回 (nodes, links)：
+    nodes: 节点ID列表（字符串）
+    links: [(node1, node2, cost), ...] 无向链路列表
+可以用build_network把结果加载进NetworkTopology。
+"""
+
+import math
+import random
+from network import NetworkTopology
+
+def grid(n, seed=None, max_cost=10):
+    """近似正方形的网格拓扑，共n个节点"""
+    rng = random.Random(seed)
+    side = max(1, math.ceil(math.sqrt(n)))
+    nodes = [str(i) for i in range(n)]
+    links = []
+    for i in range(n):
+        col = i % side
+        if col + 1 < side and i + 1 < n:
+            links.append((nodes[i], nodes[i + 1], rng.randint(1, max_cost)))
+        if i + side < n:
+            links.append((nodes[i], nodes[i + side], rng.randint(1, max_cost)))
+    return nodes, links
+
+def ring(n, seed=None, max_cost=10):
+    """环形拓扑"""
+    rng = random.Random(seed)
+    nodes = [str(i) for i in range(n)]
+    links = []
+    if n > 1:
+        for i in range(n if n > 2 else 1):
+            links.append((nodes[i], nodes[(i + 1) % n], rng.randint(1, max_cost)))
+    return nodes, links
+
+def waxman(n, seed=None, alpha=0.4, degree=4, max_cost=10):
+    """
+    Waxman随机拓扑
+
+    节点随机分布在单位正方形内，节点对(u, v)成边的概率正比于exp(-d / (alpha * L))，
+    d为两点距离，L为最大距离。为了在大规模下保持O(E)的生成代价，这里固定期望
+    平均度degree，随机抽取节点对并按上述概率接受，直到边数达到 n * degree / 2。
+    链路代价与距离成正比。
+    """
+    rng = random.Random(seed)
+    nodes = [str(i) for i in range(n)]
+    if n < 2:
+        return nodes, []
+    points = [(rng.random(), rng.random()) for _ in range(n)]
+    max_distance = math.sqrt(2)
+    target = min(n * degree // 2, n * (n - 1) // 2)
+    edges = set()
+    links = []
+    while len(links) < target:
+        u, v = rng.randrange(n), rng.randrange(n)
+        if u == v:
+            continue
+        key = (u, v) if u < v else (v, u)
+        if key in edges:
+            continue
+        (x1, y1), (x2, y2) = points[u], points[v]
+        distance = math.hypot(x1 - x2, y1 - y2)
+        if rng.random() < math.exp(-distance / (alpha * max_distance)):
+            edges.add(key)
+            cost = max(1, round(distance / max_distance * max_cost))
+            links.append((nodes[key[0]], nodes[key[1]], cost))
+    return nodes, links
+
+def barabasi_albert(n, seed=None, m=2, max_cost=10):
+    """Barabási–Albert无标度拓扑，每个新节点按度优先连接m个已有节点"""
+    rng = random.Random(seed)
+    nodes = [str(i) for i in range(n)]
+    m = max(1, min(m, n - 1)) if n > 1 else 0
+    links = []
+    repeated = []  # 每个节点按其度出现多次，用于按度采样
+    # 初始为m+1个节点的完全图
+    for i in range(min(m + 1, n)):
+        for j in range(i):
+            links.append((nodes[j], nodes[i], rng.randint(1, max_cost)))
+            repeated.extend((i, j))
+    for i in range(m + 1, n):
+        targets = set()
+        while len(targets) < m:
+            targets.add(rng.choice(repeated))
+        for target in targets:
+            links.append((nodes[target], nodes[i], rng.randint(1, max_cost)))
+            repeated.extend((i, target))
+    return nodes, links
+
+def fat_tree(n, seed=None):
+    """
+    k叉胖树（只包含交换机，不含主机）
+
+    选取满足 5k²/4 >= n 的最小偶数k，因此实际节点数可能大于n。
+    核心层 (k/2)² 个，每个pod包含k/2个汇聚交换机和k/2个边缘交换机，链路代价均为1。
+    """
+    k = 2
+    while 5 * k * k // 4 < n:
+        k += 2
+    half = k // 2
+    core = [f"c{i}" for i in range(half * half)]
+    nodes = list(core)
+    links = []
+    for pod in range(k):
+        aggregation = [f"a{pod}_{i}" for i in range(half)]
+        edge = [f"e{pod}_{i}" for i in range(half)]
+        nodes.extend(aggregation)
+        nodes.extend(edge)
+        for i, agg in enumerate(aggregation):
+            for switch in edge:
+                links.append((agg, switch, 1))
+            # 第i个汇聚交换机连接第i组核心交换机
+            for j in range(half):
+                links.append((agg, core[i * half + j], 1))
+    return nodes, links
+
+GENERATORS = {
+    "grid": grid,
+    "ring": ring,
+    "waxman": waxman,
+    "ba": barabasi_albert,
+    "fat_tree": fat_tree,
+}
+
+def generate(kind, n, seed=None):
+    """按名称生成拓扑，kind为GENERATORS中的键"""
+    if kind not in GENERATORS:
+        raise ValueError(f"未知的拓扑类型: {kind}")
+    return GENERATORS[kind](n, seed=seed)
+
+def build_network(nodes, links, **kwargs):
+    """把生成的节点和链路加载进新的NetworkTopology，kwargs传给NetworkTopology"""
+    network = NetworkTopology(**kwargs)
+    network.build(nodes, links)
+    return network
\ No newline at end of file
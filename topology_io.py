@@ -0,0 +1,238 @@
+"""
+拓扑文件读写
+
+支持两种格式：
+    JSON: {"nodes": [...], "links": [{"source", "target", "cost"}, ...]}，用于交换，
+          提供流式读取器，不必把整个文档解析成对象树
+    二进制: 便于内存映射和批量加载的紧凑格式，布局如下（小端）：
+        文件头 32字节: 魔数b"LSRT", 版本(u16), 保留(u16), 节点数(u64), 链路数(u64), 字符串表字节数(u64)
+        节点偏移表: (节点数 + 1) 个u64，第i个节点的ID为字符串表[偏移i:偏移i+1]
+        字符串表: UTF-8编码的节点ID，按8字节补齐
+        链路记录: 每条无向链路16字节: 端点下标(u32), 端点下标(u32), 代价(f64)
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from compact import CompactTopology, NodeIndex
+
+MAGIC = b"LSRT"
+VERSION = 1
+_HEADER = struct.Struct("<4sHHQQQ")
+_LINK = struct.Struct("<IId")
+
+# 超过该大小的JSON文件使用流式读取
+STREAMING_THRESHOLD = 64 * 1024 * 1024
+
+def is_binary_topology(filename):
+    """根据魔数判断文件是否为二进制拓扑"""
+    with open(filename, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+def write_binary(filename, node_ids, links):
+    """
+    写出二进制拓扑
+
+    参数:
+        node_ids: 节点ID序列，非字符串ID会被转换为字符串
+        links: [(node1, node2, cost), ...] 无向链路
+    """
+    names = [str(node_id) for node_id in node_ids]
+    index = {name: i for i, name in enumerate(names)}
+    encoded = [name.encode("utf-8") for name in names]
+    offsets = array("Q", [0]) * (len(encoded) + 1)
+    for i, data in enumerate(encoded):
+        offsets[i + 1] = offsets[i] + len(data)
+    string_table = b"".join(encoded)
+    padding = -len(string_table) % 8
+
+    records = bytearray()
+    count = 0
+    for node1, node2, cost in links:
+        records += _LINK.pack(index[str(node1)], index[str(node2)], cost)
+        count += 1
+
+    if sys.byteorder != "little":
+        offsets.byteswap()
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+    with open(filename, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, 0, len(names), count, len(string_table)))
+        f.write(offsets.tobytes())
+        f.write(string_table)
+        f.write(b"\0" * padding)
+        f.write(records)
+
+def read_binary(filename):
+    """
+    以内存映射方式读取二进制拓扑
+
+    链路记录按列切片（带步长的memoryview）后一次性拷贝进数组，
+    不需要逐条解析，因此加载时间主要花在创建节点ID字符串上。
+
+    返回:
+        CompactTopology
+    """
+    with open(filename, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        magic, version, _, node_count, link_count, string_size = _HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{filename} 不是二进制拓扑文件")
+        if version != VERSION:
+            raise ValueError(f"不支持的二进制拓扑版本: {version}")
+
+        view = memoryview(mapped)
+        try:
+            position = _HEADER.size
+            offsets = array("Q")
+            offsets.frombytes(view[position:position + 8 * (node_count + 1)])
+            if sys.byteorder != "little":
+                offsets.byteswap()
+            position += 8 * (node_count + 1)
+
+            strings = view[position:position + string_size].tobytes()
+            position += string_size + (-string_size % 8)
+            nodes = NodeIndex(strings[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(node_count))
+
+            # 每条16字节的记录可以看作4个u32或2个f64，按步长取出各列
+            records = view[position:position + _LINK.size * link_count]
+            words = records.cast("I")
+            sources = array("i")
+            sources.frombytes(words[0::4].tobytes())
+            destinations = array("i")
+            destinations.frombytes(words[1::4].tobytes())
+            costs = array("d")
+            costs.frombytes(records.cast("d")[1::2].tobytes())
+            if sys.byteorder != "little":
+                for column in (sources, destinations, costs):
+                    column.byteswap()
+            del words, records
+        finally:
+            view.release()
+
+    return CompactTopology.from_arrays(nodes, sources, destinations, costs)
+
+def iter_json_topology(f, chunk_size=1 << 20):
+    """
+    流式读取JSON拓扑
+
+    逐个解析顶层对象中"nodes"和"links"数组的元素，内存中只保留当前读入的
+    一块文本，而不是整个文档及其对象树。其他键的值被解析后忽略。
+
+    参数:
+        f: 以文本模式打开的文件对象
+
+    返回:
+        生成器，依次产生 ("nodes", 节点ID) 或 ("links", 链路字典)
+    """
+    reader = _JSONStreamReader(f, chunk_size)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        key = reader.value()
+        reader.expect(":")
+        if key in ("nodes", "links") and reader.peek() == "[":
+            reader.expect("[")
+            if reader.peek() == "]":
+                reader.expect("]")
+            else:
+                while True:
+                    yield key, reader.value()
+                    if reader.peek() == ",":
+                        reader.expect(",")
+                    else:
+                        reader.expect("]")
+                        break
+        else:
+            reader.value()
+        if reader.peek() == ",":
+            reader.expect(",")
+        else:
+            reader.expect("}")
+            return
+
+def read_json(filename, streaming=None):
+    """
+    读取JSON拓扑
+
+    参数:
+        streaming: 是否使用流式读取，默认在文件超过STREAMING_THRESHOLD时使用
+
+    返回:
+        (节点ID列表, 链路字典列表)
+    """
+    if streaming is None:
+        streaming = os.path.getsize(filename) > STREAMING_THRESHOLD
+    with open(filename, "r") as f:
+        if not streaming:
+            topology_data = json.load(f)
+            return topology_data["nodes"], topology_data["links"]
+        nodes, links = [], []
+        for key, item in iter_json_topology(f):
+            (nodes if key == "nodes" else links).append(item)
+        return nodes, links
+
+
+class _JSONStreamReader:
+    """按块读取文本并用raw_decode逐个解析JSON值"""
+
+    _WHITESPACE = " \t\r\n"
+    _NUMBER_CHARS = "0123456789.eE+-"
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        """再读入一块文本，同时丢弃已解析的部分"""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        return True
+
+    def peek(self):
+        """跳过空白，返回下一个字符，文件结束时返回空字符串"""
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in self._WHITESPACE:
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"JSON格式错误: 期望 {char!r}，实际为 {found!r}")
+        self.position += 1
+
+    def value(self):
+        """解析下一个完整的JSON值"""
+        self.peek()
+        while True:
+            try:
+                result, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # 数字可能被块边界截断（如"1.25e3"只读到"1."），
+            # 数字之后没有出现分隔符时读入更多再解析
+            if (isinstance(result, (int, float)) and not isinstance(result, bool)
+                    and (end == len(self.buffer) or self.buffer[end] in self._NUMBER_CHARS)
+                    and self._fill()):
+                continue
+            self.position = end
+            return result
\ No newline at end of file
@@ -0,0 +1,260 @@
+"""
+事件追踪
+
+把协议事件（LSA发送、接收后的接受/丢弃、SPF计算、路由变化）写入预先分配的
+环形缓冲区。每条记录为定长的二进制结构，节点ID驻留为整数下标，记录时只做一次
+struct.pack_into，缓冲区写满后覆盖最旧的记录，因此可以在大规模运行中一直开启。
+调用flush把缓冲区中的记录按时间顺序写入文件，再用本模块的命令行离线分析：
+
+    python tracing.py summary trace.bin
+    python tracing.py timeline trace.bin A --seq 3     # 节点A第3号LSA的泛洪过程
+    python tracing.py dump trace.bin --limit 100
+"""
+
+import argparse
+import itertools
+import json
+import struct
+import sys
+import threading
+
+# 事件类型。为了减少记录数，一次泛洪只记一条发送，接收只记处理结果：
+# 逐条链路的传递可以由接收方记录中的peer还原
+LSA_SEND = 1  # router把origin的seq号LSA泛洪给value个邻居（发起或转发）
+LSA_ACCEPT = 2  # router收到peer转来的LSA，序列号更新，写入LSDB
+LSA_DROP = 3  # router收到peer转来的LSA，序列号不新，丢弃
+SPF_FULL = 4  # 一次完整的路由计算（Dijkstra）：时间为结束时刻，value为耗时（秒）
+ROUTE_CHANGE = 5  # router去往origin的路由变为经peer，value为距离；peer为NONE表示路由删除，
+                  # origin为NONE表示整张路由表被替换，value为新表的路由数
+FLUSH = 6  # flush时写入的标记，value为已分配的记录数
+SPF_INCREMENTAL = 7  # 一次增量路由计算，字段同SPF_FULL
+
+EVENT_NAMES = {
+    LSA_SEND: "lsa_send",
+    LSA_ACCEPT: "lsa_accept",
+    LSA_DROP: "lsa_drop",
+    SPF_FULL: "spf_full",
+    ROUTE_CHANGE: "route_change",
+    FLUSH: "flush",
+    SPF_INCREMENTAL: "spf_incremental",
+}
+EVENT_KINDS = {name: event for event, name in EVENT_NAMES.items() if event != FLUSH}
+
+NONE = 0xFFFFFFFF  # 节点下标字段为空
+
+MAGIC = b"LSRTRACE"
+VERSION = 2  # 文件格式版本：文件头 + 节点名表 + 定长记录
+# 文件头: 魔数, 版本, 节点名表字节数(JSON), 记录数, 被覆盖丢失的记录数
+_HEADER = struct.Struct("<8sIIQQ")
+# 记录: 时间(f64), 事件(u8), 路由器, 对端, LSA源节点(或目的节点), 序列号, 数值(f64)
+_RECORD = struct.Struct("<dB3xIIIId")
+_SIZE = _RECORD.size
+
+class Tracer:
+    """
+    环形缓冲区追踪器，由NetworkTopology.enable_tracing()创建
+
+    写入位置由itertools.count按记录大小递增分配（next在CPython中是原子的），多个路由器线程可以
+    并发记录而不需要加锁。只有第一次出现的节点ID在锁内驻留。
+
+    events为要记录的事件类型集合，调用方在取时间戳之前先检查
+    ``event in tracer.events``，未启用的事件类型不产生任何开销。
+    """
+
+    def __init__(self, capacity=1 << 20, events=None):
+        self.capacity = capacity  # 最多保留的记录数
+        self.events = frozenset(EVENT_KINDS.values() if events is None else events)  # 记录的事件类型
+        self.buffer = bytearray(_RECORD.size * capacity)
+        self.names = []  # 下标 -> 节点ID
+        self.index = {None: NONE}  # 节点ID -> 下标，None对应空字段
+        self._span = _SIZE * capacity  # 缓冲区字节数
+        self._offsets = itertools.count(0, _SIZE)  # 第n条记录分配到 n * _SIZE，写在其对 _span 取模处
+        self._pack = _RECORD.pack_into
+        self._lock = threading.Lock()
+
+    def _intern(self, node_id):
+        i = self.index.get(node_id)
+        if i is None:
+            with self._lock:
+                i = self.index.get(node_id)
+                if i is None:
+                    i = len(self.names)
+                    self.names.append(node_id)
+                    self.index[node_id] = i
+        return i
+
+    def record(self, timestamp, event, router, peer=None, origin=None, seq=0, value=0.0):
+        """记录一个事件，节点参数为节点ID，可为None（热路径，调用方应按位置传参）"""
+        index = self.index
+        try:
+            router_i, peer_i, origin_i = index[router], index[peer], index[origin]
+        except KeyError:
+            router_i, peer_i, origin_i = self._intern(router), self._intern(peer), self._intern(origin)
+        self._pack(self.buffer, next(self._offsets) % self._span,
+                   timestamp, event, router_i, peer_i, origin_i, seq, value)
+
+    def flush(self, filename):
+        """
+        把缓冲区中的记录按写入顺序写入文件，返回写出的记录数
+
+        计数器不能在不分配的情况下读取，因此flush自己分配一条FLUSH标记记录，
+        它之前的记录即为要写出的内容。
+        """
+        allocated = next(self._offsets) // _SIZE + 1
+        _RECORD.pack_into(self.buffer, (allocated - 1) % self.capacity * _RECORD.size,
+                          0.0, FLUSH, NONE, NONE, NONE, 0, float(allocated))
+        count = min(allocated, self.capacity)
+        start = (allocated - count) % self.capacity
+        names = json.dumps(self.names, ensure_ascii=False).encode("utf-8")
+        with open(filename, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, len(names), count, allocated - count))
+            f.write(names)
+            # 环形缓冲区从最旧的记录开始分两段写出
+            end = start + count
+            if end <= self.capacity:
+                f.write(self.buffer[start * _RECORD.size:end * _RECORD.size])
+            else:
+                f.write(self.buffer[start * _RECORD.size:])
+                f.write(self.buffer[:(end - self.capacity) * _RECORD.size])
+        return count
+
+    def clear(self):
+        """丢弃已记录的内容"""
+        self._offsets = itertools.count(0, _SIZE)
+
+
+def read_trace(filename):
+    """
+    读取追踪文件
+
+    返回:
+        (事件列表, 丢失的记录数)。事件为字典，节点字段已还原为节点ID，按时间排序
+    """
+    with open(filename, "rb") as f:
+        data = f.read()
+    magic, version, names_size, count, lost = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{filename} 不是追踪文件")
+    if version != VERSION:
+        raise ValueError(f"不支持的追踪文件版本: {version}")
+    position = _HEADER.size
+    names = json.loads(data[position:position + names_size].decode("utf-8"))
+    position += names_size
+
+    def name(i):
+        return None if i == NONE else names[i]
+
+    events = []
+    for timestamp, event, router, peer, origin, seq, value in _RECORD.iter_unpack(
+            data[position:position + count * _RECORD.size]):
+        if event == FLUSH:
+            continue  # 之前flush留下的标记
+        events.append({
+            "time": timestamp,
+            "event": EVENT_NAMES.get(event, str(event)),
+            "router": name(router),
+            "peer": name(peer),
+            "origin": name(origin),
+            "seq": seq,
+            "value": value,
+        })
+    # 线程模式下不同路由器的记录可能与时间顺序略有出入；sort是稳定的，同一时刻保持写入顺序
+    events.sort(key=lambda e: e["time"])
+    return events, lost
+
+def summarize(events):
+    """按事件类型、SPF耗时和路由变化汇总"""
+    counts = {}
+    for event in events:
+        counts[event["event"]] = counts.get(event["event"], 0) + 1
+    spf_times = sorted(e["value"] for e in events if e["event"] in ("spf_full", "spf_incremental"))
+    routers = {e["router"] for e in events}
+    summary = {
+        "events": len(events),
+        "routers": len(routers),
+        "start": events[0]["time"] if events else None,
+        "end": events[-1]["time"] if events else None,
+        "counts": counts,
+        "lsa_instances": len({(e["origin"], e["seq"]) for e in events if e["event"] == "lsa_accept"}),
+    }
+    if spf_times:
+        summary["spf"] = {
+            "runs": len(spf_times),
+            "full_runs": counts.get("spf_full", 0),
+            "total": sum(spf_times),
+            "p50": spf_times[len(spf_times) // 2],
+            "p99": spf_times[min(len(spf_times) - 1, int(len(spf_times) * 0.99))],
+            "max": spf_times[-1],
+        }
+    last_route_change = [e["time"] for e in events if e["event"] == "route_change"]
+    if last_route_change:
+        summary["last_route_change"] = last_route_change[-1]
+    return summary
+
+def lsa_timeline(events, origin, seq=None):
+    """
+    某个LSA实例的泛洪过程
+
+    参数:
+        origin: LSA源节点
+        seq: 序列号，默认为追踪中该节点最新的序列号
+
+    返回:
+        (序列号, 按时间排序的相关事件列表)。第一个lsa_accept之后各路由器的接受
+        时间即为该LSA的传播时间线
+    """
+    related = [e for e in events if e["origin"] == origin and e["event"].startswith("lsa_")]
+    if seq is None:
+        seq = max((e["seq"] for e in related), default=None)
+    return seq, [e for e in related if e["seq"] == seq]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="离线分析协议追踪文件")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True  # add_subparsers的required参数需要Python 3.7
+    summary_parser = subparsers.add_parser("summary", help="事件统计、SPF耗时和收敛时间")
+    summary_parser.add_argument("trace")
+    timeline_parser = subparsers.add_parser("timeline", help="某个LSA的泛洪时间线")
+    timeline_parser.add_argument("trace")
+    timeline_parser.add_argument("origin", help="LSA源节点")
+    timeline_parser.add_argument("--seq", type=int, help="序列号，默认为最新")
+    dump_parser = subparsers.add_parser("dump", help="按时间顺序输出事件")
+    dump_parser.add_argument("trace")
+    dump_parser.add_argument("--router", help="只输出该路由器的事件")
+    dump_parser.add_argument("--limit", type=int, help="最多输出的事件数")
+    args = parser.parse_args(argv)
+
+    events, lost = read_trace(args.trace)
+    if lost:
+        print(f"注意: 环形缓冲区已覆盖 {lost} 条较早的记录", file=sys.stderr)
+
+    if args.command == "summary":
+        json.dump(summarize(events), sys.stdout, indent=4, ensure_ascii=False)
+        print()
+    elif args.command == "timeline":
+        seq, timeline = lsa_timeline(events, args.origin, args.seq)
+        if not timeline:
+            sys.exit(f"追踪中没有节点 {args.origin} 的LSA")
+        start = timeline[0]["time"]
+        print(f"LSA {args.origin}#{seq}")
+        for event in timeline:
+            if event["event"] == "lsa_send":
+                peer = f" -> {int(event['value'])} 个邻居"
+            else:
+                peer = f" <- {event['peer']}"
+            print(f"{event['time'] - start:12.6f}  {event['event']:<12} {event['router']}{peer}")
+        accepted = [e for e in timeline if e["event"] == "lsa_accept"]
+        if accepted:
+            print(f"{len(accepted)} 个路由器接受，传播耗时 {accepted[-1]['time'] - start:.6f}s")
+    else:
+        for event in events:
+            if args.router is not None and event["router"] != args.router:
+                continue
+            print(json.dumps(event, ensure_ascii=False))
+            if args.limit is not None:
+                args.limit -= 1
+                if args.limit <= 0:
+                    break
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
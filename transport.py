@@ -0,0 +1,375 @@
+"""
+LSA传输层与二进制编码
+
+默认情况下运行时把LSA对象直接交给邻居路由器（进程内引用传递），无法体现序列化
+和传输的开销。UdpTransport包装一个运行时（EventScheduler或AsyncioRuntime），
+接管其send：每个路由器绑定一个回环地址上的UDP套接字，LSA和数据库同步消息按紧凑的
+二进制格式编码，同一刷新间隔内发往同一邻居的消息合并到一个数据报中，接收方解码后
+再按链路时延投递。
+定时器、时钟和随机数仍由被包装的运行时提供。
+
+    scheduler = EventScheduler()
+    transport = UdpTransport(scheduler)
+    network.start_all_routers(transport)
+    scheduler.run_until_idle()
+    transport.close()
+
+数据报格式（整数均为LEB128变长整数），一个数据报中的消息类型相同:
+    版本(1字节) | 消息类型(1字节) | 发送方 | 消息数 | 消息 ...
+消息格式:
+    LSA:        源节点 | 序列号 | 邻居数 | (邻居差值, 代价) ...
+    LSDB摘要:   LSA数 | 哈希(8字节)
+    数据库描述: respond(1字节) | 项数 | (源节点, 序列号) ...
+    LSA请求:    源节点数 | 源节点 ...
+节点以NodeIndex中的整数下标表示。邻居下标按与前一个邻居的差值做zigzag编码，
+保持原有的邻居顺序；整数代价编码为 zigzag(代价)<<1，其他代价编码为1后跟8字节double。
+"""
+
+import socket
+import struct
+
+from compact import NodeIndex
+from lsa import LSA, LSARequest, LSDBDigest, LSDBSummary
+
+WIRE_VERSION = 2
+# 消息类型
+MESSAGE_LSA = 0
+MESSAGE_DIGEST = 1
+MESSAGE_SUMMARY = 2
+MESSAGE_REQUEST = 3
+MESSAGE_TYPES = {LSA: MESSAGE_LSA, LSDBDigest: MESSAGE_DIGEST, LSDBSummary: MESSAGE_SUMMARY, LSARequest: MESSAGE_REQUEST}
+MAX_DATAGRAM = 1472  # 以太网MTU减去IP和UDP头，超过该大小的批次拆成多个数据报
+_DOUBLE = struct.Struct("<d")
+_DIGEST = struct.Struct("<Q")
+
+def write_varint(out, value):
+    """把非负整数按LEB128追加到bytearray"""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def read_varint(data, position):
+    """从position读取一个LEB128整数，返回(值, 新位置)"""
+    result = 0
+    shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, position
+        shift += 7
+
+def _zigzag(value):
+    return value << 1 if value >= 0 else ((-value) << 1) - 1
+
+def _unzigzag(value):
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+class LSACodec:
+    """LSA和数据库同步消息的二进制编解码，节点ID与整数下标的映射由各端共享的NodeIndex提供"""
+
+    __slots__ = ('nodes',)
+
+    def __init__(self, nodes=None):
+        self.nodes = nodes if nodes is not None else NodeIndex()
+
+    def encode(self, message, out):
+        """把一条消息（LSA或数据库同步消息）追加到bytearray"""
+        if message.__class__ is not LSA:
+            self._encode_sync(message, out)
+            return
+        lsa = message
+        intern = self.nodes.intern
+        write_varint(out, intern(lsa.origin))
+        write_varint(out, lsa.seq)
+        write_varint(out, len(lsa))
+        previous = 0
+        for neighbor, cost in lsa.items():
+            i = intern(neighbor)
+            write_varint(out, _zigzag(i - previous))
+            previous = i
+            if isinstance(cost, int):
+                write_varint(out, _zigzag(cost) << 1)
+            else:
+                out.append(1)
+                out += _DOUBLE.pack(cost)
+
+    def _encode_sync(self, message, out):
+        intern = self.nodes.intern
+        if message.__class__ is LSDBDigest:
+            write_varint(out, message.count)
+            out += _DIGEST.pack(message.digest)
+        elif message.__class__ is LSDBSummary:
+            out.append(1 if message.respond else 0)
+            write_varint(out, len(message.entries))
+            for origin, seq in message.entries:
+                write_varint(out, intern(origin))
+                write_varint(out, seq)
+        else:
+            write_varint(out, len(message.origins))
+            for origin in message.origins:
+                write_varint(out, intern(origin))
+
+    def decode(self, data, position=0, kind=MESSAGE_LSA):
+        """从position解码一条kind类型的消息，返回(消息, 新位置)"""
+        if kind != MESSAGE_LSA:
+            return self._decode_sync(data, position, kind)
+        ids = self.nodes.ids
+        origin, position = read_varint(data, position)
+        seq, position = read_varint(data, position)
+        count, position = read_varint(data, position)
+        pairs = []
+        previous = 0
+        for _ in range(count):
+            delta, position = read_varint(data, position)
+            previous += _unzigzag(delta)
+            cost, position = read_varint(data, position)
+            if cost & 1:
+                cost = _DOUBLE.unpack_from(data, position)[0]
+                position += _DOUBLE.size
+            else:
+                cost = _unzigzag(cost >> 1)
+            pairs.append((ids[previous], cost))
+        return LSA(ids[origin], seq, pairs), position
+
+    def _decode_sync(self, data, position, kind):
+        ids = self.nodes.ids
+        if kind == MESSAGE_DIGEST:
+            count, position = read_varint(data, position)
+            digest = _DIGEST.unpack_from(data, position)[0]
+            return LSDBDigest(count, digest), position + _DIGEST.size
+        if kind == MESSAGE_SUMMARY:
+            respond = bool(data[position])
+            count, position = read_varint(data, position + 1)
+            entries = []
+            for _ in range(count):
+                origin, position = read_varint(data, position)
+                seq, position = read_varint(data, position)
+                entries.append((ids[origin], seq))
+            return LSDBSummary(tuple(entries), respond), position
+        if kind == MESSAGE_REQUEST:
+            count, position = read_varint(data, position)
+            origins = []
+            for _ in range(count):
+                origin, position = read_varint(data, position)
+                origins.append(ids[origin])
+            return LSARequest(tuple(origins)), position
+        raise ValueError(f"未知的消息类型: {kind}")
+
+    def encode_batch(self, sender, messages, max_size=MAX_DATAGRAM):
+        """
+        把发往同一邻居的一批消息按顺序编码为数据报
+
+        返回:
+            bytes列表。消息类型变化或超过max_size时开始新的数据报；
+            单条消息超过max_size时独占一个数据报
+        """
+        datagrams = []
+        sender = self.nodes.intern(sender)
+        header_size = 2 + 5 + 5  # 版本、类型、发送方和消息数的上限
+        kind = None
+        body = bytearray()
+        count = 0
+        for message in messages:
+            message_kind = MESSAGE_TYPES[message.__class__]
+            if count and message_kind != kind:
+                datagrams.append(self._datagram(kind, sender, count, body))
+                body = bytearray()
+                count = 0
+            kind = message_kind
+            start = len(body)
+            self.encode(message, body)
+            if count and header_size + len(body) > max_size:
+                datagrams.append(self._datagram(kind, sender, count, body[:start]))
+                del body[:start]
+                count = 0
+            count += 1
+        if count:
+            datagrams.append(self._datagram(kind, sender, count, body))
+        return datagrams
+
+    @staticmethod
+    def _datagram(kind, sender, count, body):
+        out = bytearray((WIRE_VERSION, kind))
+        write_varint(out, sender)
+        write_varint(out, count)
+        out += body
+        return bytes(out)
+
+    def decode_batch(self, data):
+        """解码一个数据报，返回(发送方ID, [消息, ...])"""
+        if data[0] != WIRE_VERSION:
+            raise ValueError(f"不支持的编码版本: {data[0]}")
+        kind = data[1]
+        sender, position = read_varint(data, 2)
+        count, position = read_varint(data, position)
+        messages = []
+        for _ in range(count):
+            message, position = self.decode(data, position, kind)
+            messages.append(message)
+        return self.nodes.ids[sender], messages
+
+
+class UdpTransport:
+    """
+    经回环UDP套接字传输LSA的运行时包装
+
+    每个路由器在第一次收发时绑定一个127.0.0.1上的UDP套接字（路由器很多时注意
+    文件描述符上限）。send只把消息放入 (路由器, 邻居) 的发送批次，每个刷新间隔
+    由一个定时器统一编码发送；数据报在回环接口上同步到达，发送后立即从接收方
+    套接字读出、解码，再按链路时延交给邻居路由器。读不到的数据报记为丢失，
+    由协议周期性的LSDB摘要比对发现后补发，与真实网络中的丢包相同。
+    记为丢失的数据报可能稍后才到达，接收方套接字在下次发送前先清空，
+    读出的数据报还要核对发送方地址，迟到的数据报不会被算作之后的批次。
+    """
+
+    def __init__(self, runtime, flush_interval=0.001, max_datagram=MAX_DATAGRAM, nodes=None):
+        """
+        参数:
+            runtime: 提供定时器和时钟的运行时（EventScheduler或AsyncioRuntime）
+            flush_interval: 批次的最长等待时间（秒），为0时每次send后立即在下一个事件发送
+            max_datagram: 单个数据报的最大字节数
+            nodes: 节点ID与线上整数ID的映射(NodeIndex)，默认新建
+        """
+        self.runtime = runtime
+        self.flush_interval = flush_interval
+        self.max_datagram = max_datagram
+        self.codec = LSACodec(nodes)
+        self.sockets = {}  # {节点ID: 绑定的UDP套接字}
+        self.addresses = {}  # {节点ID: (地址, 端口)}
+        self.batches = {}  # 待发送的批次 {(路由器, 邻居ID): [LSA, ...]}
+        self.flush_scheduled = False
+        self.stale = set()  # 有数据报记为丢失、可能还会迟到的接收方节点ID
+        self.lsas = {}  # 解码得到的最新LSA {源节点: LSA}，同一LSA实例在本进程内只保留一个对象
+        self.messages_sent = 0
+        self.messages_received = 0
+        self.datagrams_sent = 0
+        self.datagrams_lost = 0
+        self.bytes_sent = 0
+
+    @property
+    def now(self):
+        return self.runtime.now
+
+    @property
+    def random(self):
+        return self.runtime.random
+
+    def call_later(self, delay, callback, *args):
+        self.runtime.call_later(delay, callback, *args)
+
+    def call_periodic(self, delay, callback, *args):
+        self.runtime.call_periodic(delay, callback, *args)
+
+    def _socket(self, node_id):
+        sock = self.sockets.get(node_id)
+        if sock is None:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.bind(("127.0.0.1", 0))
+            sock.setblocking(False)
+            self.sockets[node_id] = sock
+            self.addresses[node_id] = sock.getsockname()
+        return sock
+
+    def send(self, router, neighbor, lsa_data):
+        """运行时接口：把LSA或同步消息放入发往邻居的批次，在下一次刷新时发送"""
+        key = (router, neighbor)
+        batch = self.batches.get(key)
+        if batch is None:
+            self.batches[key] = [lsa_data]
+        else:
+            batch.append(lsa_data)
+        if not self.flush_scheduled:
+            self.flush_scheduled = True
+            self.runtime.call_later(self.flush_interval, self.flush)
+
+    def flush(self):
+        """编码并发送所有待发送的批次"""
+        batches, self.batches = self.batches, {}
+        self.flush_scheduled = False
+        for (router, neighbor), messages in batches.items():
+            network = router.network
+            if network.nodes.get_existing(neighbor) is None:
+                continue  # 尚未创建的路由器没有运行协议
+            sender = self._socket(router.node_id)
+            receiver = self._socket(neighbor)
+            sender_address = self.addresses[router.node_id]
+            latency = network.get_link_latency(router.node_id, neighbor, self.runtime.default_latency)
+            for datagram in self.codec.encode_batch(router.node_id, messages, self.max_datagram):
+                if neighbor in self.stale:
+                    self._drain(receiver)
+                    self.stale.discard(neighbor)
+                sender.sendto(datagram, self.addresses[neighbor])
+                self.datagrams_sent += 1
+                self.bytes_sent += len(datagram)
+                data = self._recv_from(receiver, sender_address)
+                if data is None:
+                    self.datagrams_lost += 1
+                    self.stale.add(neighbor)
+                    continue
+                self._receive(network, neighbor, data, latency)
+            self.messages_sent += len(messages)
+
+    @staticmethod
+    def _drain(sock):
+        """丢弃套接字中迟到的数据报（发送时已记为丢失）"""
+        try:
+            while True:
+                sock.recv(65535)
+        except BlockingIOError:
+            pass
+
+    @staticmethod
+    def _recv_from(sock, address):
+        """读出来自address的数据报，跳过其他来源的数据报；没有时返回None"""
+        try:
+            while True:
+                data, source = sock.recvfrom(65535)
+                if source == address:
+                    return data
+        except BlockingIOError:
+            return None
+
+    def _receive(self, network, neighbor, data, latency):
+        """解码收到的数据报并按链路时延投递给邻居路由器"""
+        source_id, messages = self.codec.decode_batch(data)
+        known_lsas = self.lsas
+        for message in messages:
+            if message.__class__ is LSA:
+                # 解码得到的是新对象，换成已有的同一实例，使各路由器的LSDB共享引用
+                known = known_lsas.get(message.origin)
+                if known is not None and known.seq == message.seq:
+                    message = known
+                elif known is None or known.seq < message.seq:
+                    known_lsas[message.origin] = message
+            self.runtime.call_later(latency, self._deliver, network, source_id, neighbor, message)
+        self.messages_received += len(messages)
+
+    @staticmethod
+    def _deliver(network, source_id, neighbor, lsa_data):
+        neighbor_router = network.nodes.get_existing(neighbor)
+        if neighbor_router is not None:
+            neighbor_router.receive_lsa(source_id, lsa_data)
+
+    def stats(self):
+        """传输统计：消息数、数据报数、字节数和平均每个数据报的消息数"""
+        return {
+            "messages_sent": self.messages_sent,
+            "messages_received": self.messages_received,
+            "datagrams_sent": self.datagrams_sent,
+            "datagrams_lost": self.datagrams_lost,
+            "bytes_sent": self.bytes_sent,
+            "messages_per_datagram": self.messages_sent / self.datagrams_sent if self.datagrams_sent else 0.0,
+            "bytes_per_message": self.bytes_sent / self.messages_sent if self.messages_sent else 0.0,
+        }
+
+    def close(self):
+        """关闭所有套接字"""
+        for sock in self.sockets.values():
+            sock.close()
+        self.sockets.clear()
+        self.addresses.clear()
+        self.stale.clear()
\ No newline at end of file
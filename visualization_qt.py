@@ -1,474 +1,1041 @@
-import sys
-import networkx as nx
-import numpy as np
-from PyQt5.QtWidgets import (QMainWindow, QApplication, QWidget, QPushButton, QVBoxLayout, 
-                            QHBoxLayout, QLabel, QComboBox, QTreeWidget, QTreeWidgetItem,
-                            QDialog, QLineEdit, QGridLayout, QMessageBox, QGroupBox,
-                            QSplitter, QFrame, QHeaderView, QInputDialog, QFileDialog)
-from PyQt5.QtCore import Qt, QTimer
-from PyQt5.QtGui import QPainter, QBrush, QPen, QColor, QFont, QPainterPath
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-import threading
-
-
-class NetworkVizCanvas(FigureCanvas):
-    """PyQt网络可视化画布，使用matplotlib绘制网络拓扑"""
-    def __init__(self, parent=None, width=8, height=6, dpi=100):
-        self.fig = Figure(figsize=(width, height), dpi=dpi, tight_layout=True)
-        self.axes = self.fig.add_subplot(111)
-        self.axes.set_axis_off()  # 隐藏坐标轴
-        
-        super(NetworkVizCanvas, self).__init__(self.fig)
-        self.setParent(parent)
-        
-        self.graph = nx.Graph()
-        self.pos = None
-    
-    def draw_network(self, nodes, links):
-        """绘制网络拓扑"""
-        self.axes.clear()
-        self.graph.clear()
-        
-        # 添加节点和边
-        for node_id in nodes:
-            self.graph.add_node(node_id)
-        
-        for (src, dst), cost in links.items():
-            self.graph.add_edge(src, dst, weight=cost)
-        
-        # 计算节点位置
-        self.pos = nx.spring_layout(self.graph)
-        
-        # 绘制节点
-        nx.draw_networkx_nodes(self.graph, self.pos, ax=self.axes, node_size=700, 
-                              node_color='lightblue', edgecolors='black')
-        
-        # 绘制节点标签
-        nx.draw_networkx_labels(self.graph, self.pos, ax=self.axes, font_size=14, font_weight='bold')
-        
-        # 绘制边
-        nx.draw_networkx_edges(self.graph, self.pos, ax=self.axes, width=2.0, alpha=0.7)
-        
-        # 绘制边标签
-        edge_labels = {(src, dst): cost for (src, dst), cost in links.items()}
-        nx.draw_networkx_edge_labels(self.graph, self.pos, edge_labels=edge_labels, 
-                                    ax=self.axes, font_size=12, font_color='red')
-        
-        self.fig.canvas.draw()
-
-
-class AddLinkDialog(QDialog):
-    """添加链路对话框"""
-    def __init__(self, parent, nodes):
-        super().__init__(parent)
-        self.setWindowTitle("添加链路")
-        self.setMinimumWidth(300)
-        self.result_data = None
-        self.nodes = nodes
-        
-        layout = QGridLayout()
-        self.setLayout(layout)
-        
-        # 第一个节点选择器
-        layout.addWidget(QLabel("选择第一个节点:"), 0, 0)
-        self.node1_combo = QComboBox()
-        self.node1_combo.addItems(nodes)
-        layout.addWidget(self.node1_combo, 0, 1)
-        
-        # 第二个节点选择器
-        layout.addWidget(QLabel("选择第二个节点:"), 1, 0)
-        self.node2_combo = QComboBox()
-        self.node2_combo.addItems(nodes)
-        if len(nodes) > 1:
-            self.node2_combo.setCurrentIndex(1)
-        layout.addWidget(self.node2_combo, 1, 1)
-        
-        # 代价输入框
-        layout.addWidget(QLabel("链路代价:"), 2, 0)
-        self.cost_edit = QLineEdit("1")
-        layout.addWidget(self.cost_edit, 2, 1)
-        
-        # 按钮
-        btn_layout = QHBoxLayout()
-        ok_btn = QPushButton("确定")
-        cancel_btn = QPushButton("取消")
-        
-        ok_btn.clicked.connect(self.on_ok)
-        cancel_btn.clicked.connect(self.reject)
-        
-        btn_layout.addWidget(ok_btn)
-        btn_layout.addWidget(cancel_btn)
-        layout.addLayout(btn_layout, 3, 0, 1, 2)
-    
-    def on_ok(self):
-        """确定按钮处理"""
-        node1 = self.node1_combo.currentText()
-        node2 = self.node2_combo.currentText()
-        
-        try:
-            cost = float(self.cost_edit.text())
-            if cost <= 0:
-                raise ValueError("代价必须大于0")
-        except ValueError as e:
-            QMessageBox.critical(self, "错误", f"无效的代价: {e}")
-            return
-        
-        if node1 == node2:
-            QMessageBox.critical(self, "错误", "不能连接相同的节点")
-            return
-        
-        self.result_data = (node1, node2, cost)
-        self.accept()
-
-
-class UpdateLinkDialog(QDialog):
-    """更新链路代价对话框"""
-    def __init__(self, parent, links):
-        super().__init__(parent)
-        self.setWindowTitle("更新链路代价")
-        self.setMinimumWidth(300)
-        self.result_data = None
-        self.links = links
-        
-        layout = QGridLayout()
-        self.setLayout(layout)
-        
-        # 链路选择器
-        layout.addWidget(QLabel("选择链路:"), 0, 0)
-        self.link_combo = QComboBox()
-        link_strs = [f"{src} - {dst} (当前代价: {cost})" for (src, dst), cost in links]
-        self.link_combo.addItems(link_strs)
-        layout.addWidget(self.link_combo, 0, 1)
-        
-        # 代价输入框
-        layout.addWidget(QLabel("新链路代价:"), 1, 0)
-        self.cost_edit = QLineEdit("1")
-        layout.addWidget(self.cost_edit, 1, 1)
-        
-        # 按钮
-        btn_layout = QHBoxLayout()
-        ok_btn = QPushButton("确定")
-        cancel_btn = QPushButton("取消")
-        
-        ok_btn.clicked.connect(self.on_ok)
-        cancel_btn.clicked.connect(self.reject)
-        
-        btn_layout.addWidget(ok_btn)
-        btn_layout.addWidget(cancel_btn)
-        layout.addLayout(btn_layout, 2, 0, 1, 2)
-    
-    def on_ok(self):
-        """确定按钮处理"""
-        index = self.link_combo.currentIndex()
-        if index < 0 or index >= len(self.links):
-            QMessageBox.critical(self, "错误", "请选择一个链路")
-            return
-        
-        link_info, old_cost = self.links[index]
-        
-        try:
-            cost = float(self.cost_edit.text())
-            if cost <= 0:
-                raise ValueError("代价必须大于0")
-        except ValueError as e:
-            QMessageBox.critical(self, "错误", f"无效的代价: {e}")
-            return
-        
-        self.result_data = (link_info, cost)
-        self.accept()
-
-
-class RemoveLinkDialog(QDialog):
-    """删除链路对话框"""
-    def __init__(self, parent, links):
-        super().__init__(parent)
-        self.setWindowTitle("删除链路")
-        self.setMinimumWidth(300)
-        self.result_data = None
-        self.links = links
-        
-        layout = QGridLayout()
-        self.setLayout(layout)
-        
-        # 链路选择器
-        layout.addWidget(QLabel("选择要删除的链路:"), 0, 0)
-        self.link_combo = QComboBox()
-        link_strs = [f"{src} - {dst} (代价: {cost})" for (src, dst), cost in links]
-        self.link_combo.addItems(link_strs)
-        layout.addWidget(self.link_combo, 0, 1)
-        
-        # 按钮
-        btn_layout = QHBoxLayout()
-        ok_btn = QPushButton("确定")
-        cancel_btn = QPushButton("取消")
-        
-        ok_btn.clicked.connect(self.on_ok)
-        cancel_btn.clicked.connect(self.reject)
-        
-        btn_layout.addWidget(ok_btn)
-        btn_layout.addWidget(cancel_btn)
-        layout.addLayout(btn_layout, 1, 0, 1, 2)
-    
-    def on_ok(self):
-        """确定按钮处理"""
-        index = self.link_combo.currentIndex()
-        if index < 0 or index >= len(self.links):
-            QMessageBox.critical(self, "错误", "请选择一个链路")
-            return
-        
-        (src, dst), _ = self.links[index]
-        self.result_data = (src, dst)
-        self.accept()
-
-
-class NetworkVisualizerQt(QMainWindow):
-    """基于PyQt的网络拓扑可视化类"""
-    
-    def __init__(self, network):
-        super().__init__()
-        self.network = network
-        self.protocol_running = False
-        
-        self.init_ui()
-        
-        # 刷新界面
-        self.update_graph()
-        self.update_node_selector()
-    
-    def init_ui(self):
-        """初始化UI界面"""
-        self.setWindowTitle("链路状态路由协议仿真系统")
-        self.setGeometry(100, 100, 1200, 800)
-        
-        # 创建中央部件
-        central_widget = QWidget()
-        self.setCentralWidget(central_widget)
-        
-        # 主布局
-        main_layout = QVBoxLayout(central_widget)
-        
-        # 创建顶部控制面板
-        control_frame = QFrame()
-        control_layout = QHBoxLayout(control_frame)
-        
-        # 添加各种按钮
-        self.add_node_btn = QPushButton("添加节点")
-        self.add_node_btn.clicked.connect(self.add_node)
-        control_layout.addWidget(self.add_node_btn)
-        
-        self.add_link_btn = QPushButton("添加链路")
-        self.add_link_btn.clicked.connect(self.add_link)
-        control_layout.addWidget(self.add_link_btn)
-        
-        self.update_link_btn = QPushButton("修改链路代价")
-        self.update_link_btn.clicked.connect(self.update_link_cost)
-        control_layout.addWidget(self.update_link_btn)
-        
-        self.remove_link_btn = QPushButton("删除链路")
-        self.remove_link_btn.clicked.connect(self.remove_link)
-        control_layout.addWidget(self.remove_link_btn)
-        
-        self.toggle_protocol_btn = QPushButton("启动路由协议")
-        self.toggle_protocol_btn.clicked.connect(self.toggle_protocol)
-        control_layout.addWidget(self.toggle_protocol_btn)
-        
-        self.save_topo_btn = QPushButton("保存拓扑")
-        self.save_topo_btn.clicked.connect(self.save_topology)
-        control_layout.addWidget(self.save_topo_btn)
-        
-        self.load_topo_btn = QPushButton("加载拓扑")
-        self.load_topo_btn.clicked.connect(self.load_topology)
-        control_layout.addWidget(self.load_topo_btn)
-        
-        main_layout.addWidget(control_frame)
-        
-        # 创建拓扑图和路由表的分割器
-        splitter = QSplitter(Qt.Horizontal)
-        
-        # 拓扑图区域
-        graph_group = QGroupBox("网络拓扑")
-        graph_layout = QVBoxLayout(graph_group)
-        
-        self.canvas = NetworkVizCanvas()
-        graph_layout.addWidget(self.canvas)
-        
-        # 路由表区域
-        route_group = QGroupBox("路由表")
-        route_layout = QVBoxLayout(route_group)
-        
-        # 节点选择器
-        node_selector_layout = QHBoxLayout()
-        node_selector_layout.addWidget(QLabel("选择节点:"))
-        self.node_selector = QComboBox()
-        self.node_selector.currentIndexChanged.connect(self.update_routing_table_display)
-        node_selector_layout.addWidget(self.node_selector)
-        route_layout.addLayout(node_selector_layout)
-        
-        # 路由表显示
-        self.routing_table = QTreeWidget()
-        self.routing_table.setHeaderLabels(["目的节点", "下一跳", "代价"])
-        self.routing_table.header().setSectionResizeMode(QHeaderView.Stretch)
-        
-        # 设置每列的最小宽度，确保表头文字完整显示
-        self.routing_table.setColumnWidth(0, 100)
-        self.routing_table.setColumnWidth(1, 100)
-        self.routing_table.setColumnWidth(2, 80)
-        
-        route_layout.addWidget(self.routing_table)
-        
-        # 添加到分割器
-        splitter.addWidget(graph_group)
-        splitter.addWidget(route_group)
-        splitter.setStretchFactor(0, 1)  # 拓扑图占比改为2
-        splitter.setStretchFactor(1, 1)  # 路由表占比维持1
-        
-        main_layout.addWidget(splitter)
-        
-        # 设置定时器
-        self.update_timer = QTimer()
-        self.update_timer.timeout.connect(self.update_routing_table_display)
-    
-    def update_graph(self):
-        """更新网络拓扑图"""
-        self.canvas.draw_network(
-            self.network.get_all_nodes(),
-            self.network.get_all_links()
-        )
-    
-    def update_node_selector(self):
-        """更新节点选择器"""
-        self.node_selector.blockSignals(True)
-        current_text = self.node_selector.currentText()
-        self.node_selector.clear()
-        
-        nodes = self.network.get_all_nodes()
-        self.node_selector.addItems(nodes)
-        
-        # 尝试保持当前选择
-        if current_text in nodes:
-            index = self.node_selector.findText(current_text)
-            self.node_selector.setCurrentIndex(index)
-        elif nodes:
-            self.node_selector.setCurrentIndex(0)
-            
-        self.node_selector.blockSignals(False)
-        self.update_routing_table_display()
-    
-    def update_routing_table_display(self):
-        """更新路由表显示"""
-        self.routing_table.clear()
-        
-        # 获取选中节点
-        node_id = self.node_selector.currentText()
-        if not node_id or node_id not in self.network.nodes:
-            return
-        
-        # 获取该节点的路由表
-        router = self.network.nodes[node_id]
-        routing_table = router.get_routing_table()
-        
-        # 添加到表格
-        for destination, (next_hop, cost) in routing_table.items():
-            item = QTreeWidgetItem([destination, next_hop, str(cost)])
-            self.routing_table.addTopLevelItem(item)
-    
-    def add_node(self):
-        """添加新节点"""
-        node_id, ok = QInputDialog.getText(self, "添加节点", "输入节点ID:")
-        if ok and node_id:
-            if self.network.add_node(node_id):
-                self.update_graph()
-                self.update_node_selector()
-            else:
-                QMessageBox.critical(self, "错误", f"节点 {node_id} 已存在")
-    
-    def add_link(self):
-        """添加新链路"""
-        nodes = self.network.get_all_nodes()
-        if len(nodes) < 2:
-            QMessageBox.critical(self, "错误", "至少需要两个节点才能添加链路")
-            return
-        
-        dialog = AddLinkDialog(self, nodes)
-        if dialog.exec_() == QDialog.Accepted and dialog.result_data:
-            node1, node2, cost = dialog.result_data
-            if self.network.add_link(node1, node2, cost):
-                self.update_graph()
-            else:
-                QMessageBox.critical(self, "错误", "添加链路失败")
-    
-    def update_link_cost(self):
-        """更新链路代价"""
-        links = list(self.network.get_all_links().items())
-        if not links:
-            QMessageBox.critical(self, "错误", "没有可修改的链路")
-            return
-        
-        dialog = UpdateLinkDialog(self, links)
-        if dialog.exec_() == QDialog.Accepted and dialog.result_data:
-            (src, dst), cost = dialog.result_data
-            if self.network.update_link_cost(src, dst, cost):
-                self.update_graph()
-            else:
-                QMessageBox.critical(self, "错误", "更新链路代价失败")
-    
-    def remove_link(self):
-        """删除链路"""
-        links = list(self.network.get_all_links().items())
-        if not links:
-            QMessageBox.critical(self, "错误", "没有可删除的链路")
-            return
-        
-        dialog = RemoveLinkDialog(self, links)
-        if dialog.exec_() == QDialog.Accepted and dialog.result_data:
-            src, dst = dialog.result_data
-            if self.network.remove_link(src, dst):
-                self.update_graph()
-            else:
-                QMessageBox.critical(self, "错误", "删除链路失败")
-    
-    def toggle_protocol(self):
-        """启动/停止路由协议"""
-        if self.protocol_running:
-            self.network.stop_all_routers()
-            self.protocol_running = False
-            self.toggle_protocol_btn.setText("启动路由协议")
-            self.update_timer.stop()
-        else:
-            self.network.start_all_routers()
-            self.protocol_running = True
-            self.toggle_protocol_btn.setText("停止路由协议")
-            self.update_timer.start(1000)  # 每秒更新一次路由表
-    
-    def save_topology(self):
-        """保存拓扑到文件"""
-        filename, _ = QFileDialog.getSaveFileName(
-            self, "保存拓扑", "topology/custom.json", "JSON Files (*.json)"
-        )
-        
-        if filename:
-            self.network.save_to_file(filename)
-            QMessageBox.information(self, "成功", f"拓扑已保存到 {filename}")
-    
-    def load_topology(self):
-        """从文件加载拓扑"""
-        filename, _ = QFileDialog.getOpenFileName(
-            self, "加载拓扑", "topology/default.json", "JSON Files (*.json)"
-        )
-        
-        if filename:
-            if self.network.load_from_file(filename):
-                # 如果协议正在运行，先停止
-                if self.protocol_running:
-                    self.network.stop_all_routers()
-                    self.protocol_running = False
-                    self.toggle_protocol_btn.setText("启动路由协议")
-                    self.update_timer.stop()
-                
-                self.update_graph()
-                self.update_node_selector()
-                QMessageBox.information(self, "成功", f"已加载拓扑 {filename}")
-            else:
-                QMessageBox.critical(self, "错误", f"无法加载拓扑 {filename}")
+import sys
+import networkx as nx
+import numpy as np
+from PyQt5.QtWidgets import (QMainWindow, QApplication, QWidget, QPushButton, QVBoxLayout, 
+                            QHBoxLayout, QLabel, QComboBox,
+                            QDialog, QLineEdit, QGridLayout, QMessageBox, QGroupBox,
+                            QSplitter, QFrame, QHeaderView, QInputDialog, QFileDialog,
+                            QGraphicsView, QGraphicsScene, QGraphicsEllipseItem,
+                            QGraphicsSimpleTextItem, QGraphicsPathItem, QTableView, QCheckBox)
+from PyQt5.QtCore import Qt, QTimer, QThread, pyqtSignal, pyqtSlot, QObject, QAbstractTableModel, QModelIndex
+from PyQt5.QtGui import QPainter, QBrush, QPen, QColor, QFont, QPainterPath
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+import threading
+import time
+from graph_layout import IncrementalLayout
+
+
+class LayoutWorker(QThread):
+    """后台布局线程：在界面线程之外运行增量布局，完成后发出layout_ready信号"""
+    layout_ready = pyqtSignal(object)  # {节点ID: (x, y)}
+    
+    def __init__(self, layout, parent=None):
+        super().__init__(parent)
+        self.layout = layout
+        self.condition = threading.Condition()
+        self.pending = None  # 等待布局的最新拓扑，布局期间的多次请求只保留最后一次
+        self.stopping = False
+    
+    def request(self, nodes, links):
+        """
+        请求按给定拓扑布局
+        
+        返回:
+            bool: 拓扑与上一次布局相同时返回True，可以直接使用缓存的位置；
+                  否则提交给后台线程并返回False，完成后发出layout_ready
+        """
+        if self.layout.is_current(nodes, links):
+            return True
+        with self.condition:
+            self.pending = (list(nodes), list(links))
+            self.condition.notify()
+        if not self.isRunning():
+            self.start()
+        return False
+    
+    def run(self):
+        while True:
+            with self.condition:
+                while self.pending is None and not self.stopping:
+                    self.condition.wait()
+                if self.stopping:
+                    return
+                nodes, links = self.pending
+                self.pending = None
+            self.layout_ready.emit(self.layout.update(nodes, links))
+    
+    def stop(self):
+        """停止后台线程并等待其退出"""
+        with self.condition:
+            self.stopping = True
+            self.condition.notify()
+        self.wait()
+
+
+class NetworkVizCanvas(FigureCanvas):
+    """PyQt网络可视化画布，使用matplotlib绘制网络拓扑"""
+    def __init__(self, parent=None, width=8, height=6, dpi=100, detail_limit=100):
+        self.fig = Figure(figsize=(width, height), dpi=dpi, tight_layout=True)
+        self.axes = self.fig.add_subplot(111)
+        self.axes.set_axis_off()  # 隐藏坐标轴
+        
+        super(NetworkVizCanvas, self).__init__(self.fig)
+        self.setParent(parent)
+        
+        self.graph = nx.Graph()
+        self.pos = {}
+        self.nodes = []
+        self.links = {}
+        self.detail_limit = detail_limit  # 超过此节点数时不绘制节点标签和链路代价
+        
+        # 节点位置缓存在布局对象中，拓扑变化时在后台线程增量更新
+        self.graph_layout = IncrementalLayout()
+        self.layout_worker = LayoutWorker(self.graph_layout, self)
+        self.layout_worker.layout_ready.connect(self.on_layout_ready)
+    
+    def draw_network(self, nodes, links):
+        """绘制网络拓扑，拓扑结构变化时等后台布局完成后再重绘"""
+        self.nodes = nodes
+        self.links = links
+        if self.layout_worker.request(nodes, links):
+            self.redraw()
+    
+    def on_layout_ready(self, positions):
+        """后台布局完成"""
+        self.pos = positions
+        self.redraw()
+    
+    def redraw(self):
+        """用缓存的节点位置重绘，跳过还没有位置的节点"""
+        self.axes.clear()
+        self.graph.clear()
+        
+        pos = self.pos
+        links = {(src, dst): cost for (src, dst), cost in self.links.items()
+                 if src in pos and dst in pos}
+        
+        # 添加节点和边
+        for node_id in self.nodes:
+            if node_id in pos:
+                self.graph.add_node(node_id)
+        
+        for (src, dst), cost in links.items():
+            self.graph.add_edge(src, dst, weight=cost)
+        
+        detailed = self.graph.number_of_nodes() <= self.detail_limit
+        
+        # 绘制节点
+        nx.draw_networkx_nodes(self.graph, pos, ax=self.axes, node_size=700 if detailed else 20, 
+                              node_color='lightblue', edgecolors='black')
+        
+        # 绘制边
+        nx.draw_networkx_edges(self.graph, pos, ax=self.axes, width=2.0 if detailed else 0.5, alpha=0.7)
+        
+        if detailed:
+            # 绘制节点标签
+            nx.draw_networkx_labels(self.graph, pos, ax=self.axes, font_size=14, font_weight='bold')
+            
+            # 绘制边标签
+            nx.draw_networkx_edge_labels(self.graph, pos, edge_labels=links, 
+                                        ax=self.axes, font_size=12, font_color='red')
+        
+        self.fig.canvas.draw_idle()
+    
+    def close_layout(self):
+        """停止后台布局线程"""
+        self.layout_worker.stop()
+
+
+class NetworkSceneView(QGraphicsView):
+    """
+    基于QGraphicsScene的拓扑视图，适合上万节点的拓扑
+    
+    每个节点是一个图元，全部链路合并为一条路径，重绘时只移动已有图元、增删变化的部分。
+    按缩放比例决定细节：缩小时隐藏链路代价和节点标签并关闭抗锯齿。
+    滚轮缩放，拖动平移。
+    """
+    SCALE = 60.0  # 布局坐标（理想边长为1）到场景坐标的缩放
+    NODE_RADIUS = 12.0
+    NODE_LABEL_LOD = 0.4  # 缩放比例低于此值时隐藏节点标签
+    EDGE_LABEL_LOD = 0.8  # 缩放比例低于此值时隐藏链路代价并关闭抗锯齿
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setScene(QGraphicsScene(self))
+        self.setDragMode(QGraphicsView.ScrollHandDrag)
+        self.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
+        self.setOptimizationFlag(QGraphicsView.DontSavePainterState)
+        
+        self.pos = {}
+        self.nodes = []
+        self.links = {}
+        self.node_items = {}  # {节点ID: 节点图元}
+        self.node_labels = {}  # {节点ID: 节点标签图元}
+        self.edge_labels = {}  # {(src, dst): 链路代价图元}
+        self.edge_item = QGraphicsPathItem()
+        self.edge_item.setPen(QPen(QColor(80, 80, 80), 1.5))
+        self.edge_item.setZValue(-1)
+        self.scene().addItem(self.edge_item)
+        self.show_node_labels = True
+        self.show_edge_labels = True
+        self.fitted = False
+        
+        self.node_pen = QPen(Qt.black, 1.5)
+        self.node_brush = QBrush(QColor("lightblue"))
+        self.node_font = QFont()
+        self.node_font.setBold(True)
+        self.edge_brush = QBrush(Qt.red)
+        
+        self.graph_layout = IncrementalLayout()
+        self.layout_worker = LayoutWorker(self.graph_layout, self)
+        self.layout_worker.layout_ready.connect(self.on_layout_ready)
+        self.apply_level_of_detail()
+    
+    def draw_network(self, nodes, links):
+        """绘制网络拓扑，拓扑结构变化时等后台布局完成后再重绘"""
+        self.nodes = nodes
+        self.links = links
+        if self.layout_worker.request(nodes, links):
+            self.redraw()
+    
+    def on_layout_ready(self, positions):
+        """后台布局完成"""
+        self.pos = positions
+        self.redraw()
+    
+    def redraw(self):
+        """按缓存的位置同步场景中的图元，跳过还没有位置的节点"""
+        scene = self.scene()
+        pos = self.pos
+        scale = self.SCALE
+        
+        # 删除已不存在的节点和链路
+        for node_id in set(self.node_items).difference(self.nodes):
+            scene.removeItem(self.node_items.pop(node_id))
+            del self.node_labels[node_id]
+        for key in set(self.edge_labels).difference(self.links):
+            scene.removeItem(self.edge_labels.pop(key))
+        
+        for node_id in self.nodes:
+            p = pos.get(node_id)
+            if p is None:
+                continue
+            item = self.node_items.get(node_id)
+            if item is None:
+                item = self._create_node(node_id)
+            item.setPos(p[0] * scale, p[1] * scale)
+        
+        path = QPainterPath()
+        for key, cost in self.links.items():
+            p1 = pos.get(key[0])
+            p2 = pos.get(key[1])
+            if p1 is None or p2 is None:
+                continue
+            x1, y1, x2, y2 = p1[0] * scale, p1[1] * scale, p2[0] * scale, p2[1] * scale
+            path.moveTo(x1, y1)
+            path.lineTo(x2, y2)
+            
+            text = str(cost)
+            label = self.edge_labels.get(key)
+            if label is None:
+                label = QGraphicsSimpleTextItem(text)
+                label.setBrush(self.edge_brush)
+                label.setVisible(self.show_edge_labels)
+                scene.addItem(label)
+                self.edge_labels[key] = label
+            elif label.text() != text:
+                label.setText(text)
+            rect = label.boundingRect()
+            label.setPos((x1 + x2 - rect.width()) / 2, (y1 + y2 - rect.height()) / 2)
+        self.edge_item.setPath(path)
+        
+        if not self.fitted and self.node_items:
+            self.fitted = True
+            self.fitInView(scene.itemsBoundingRect(), Qt.KeepAspectRatio)
+            self.apply_level_of_detail()
+    
+    def _create_node(self, node_id):
+        """创建节点图元及其标签"""
+        r = self.NODE_RADIUS
+        item = QGraphicsEllipseItem(-r, -r, 2 * r, 2 * r)
+        item.setPen(self.node_pen)
+        item.setBrush(self.node_brush)
+        item.setToolTip(node_id)
+        
+        label = QGraphicsSimpleTextItem(node_id, item)
+        label.setFont(self.node_font)
+        rect = label.boundingRect()
+        label.setPos(-rect.width() / 2, -rect.height() / 2)
+        label.setVisible(self.show_node_labels)
+        
+        self.scene().addItem(item)
+        self.node_items[node_id] = item
+        self.node_labels[node_id] = label
+        return item
+    
+    def apply_level_of_detail(self):
+        """按当前缩放比例显示或隐藏标签，只在跨过阈值时逐个修改图元"""
+        lod = self.transform().m11()
+        show_node_labels = lod >= self.NODE_LABEL_LOD
+        show_edge_labels = lod >= self.EDGE_LABEL_LOD
+        if show_node_labels != self.show_node_labels:
+            self.show_node_labels = show_node_labels
+            for label in self.node_labels.values():
+                label.setVisible(show_node_labels)
+        if show_edge_labels != self.show_edge_labels:
+            self.show_edge_labels = show_edge_labels
+            for label in self.edge_labels.values():
+                label.setVisible(show_edge_labels)
+        self.setRenderHint(QPainter.Antialiasing, show_edge_labels)
+    
+    def wheelEvent(self, event):
+        """滚轮缩放"""
+        factor = 1.15 if event.angleDelta().y() > 0 else 1 / 1.15
+        self.scale(factor, factor)
+        self.apply_level_of_detail()
+    
+    def close_layout(self):
+        """停止后台布局线程"""
+        self.layout_worker.stop()
+
+
+class RouteSignalBridge(QObject):
+    """
+    把仿真线程中的路由变化转换为Qt信号
+    
+    订阅全网路由变化，RouteDelta先放入RouteChangeStream；第一个变化到达时通知界面线程
+    启动一个单次定时器，一帧之内到达的变化在定时器到期时一起取出，以routes_changed
+    信号发出，因此界面每帧最多刷新一次。队列溢出时改为发出reset_required，
+    接收方应重新读取完整路由表。
+    """
+    routes_changed = pyqtSignal(list)  # [RouteDelta, ...]，按到达顺序
+    reset_required = pyqtSignal()
+    _wake = pyqtSignal()
+    
+    FRAME_INTERVAL = 16  # 毫秒
+    
+    def __init__(self, network, maxlen=100000, parent=None):
+        super().__init__(parent)
+        self.network = network
+        self.scheduled = False
+        self.stream = network.route_changes(maxlen)
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.timeout.connect(self.flush)
+        # 仿真线程只发出_wake，定时器总是在界面线程中启动
+        self._wake.connect(self._schedule, Qt.QueuedConnection)
+        network.subscribe_routes(self._on_delta)
+    
+    def _on_delta(self, delta):
+        """在仿真线程中调用：变化已由stream入队，这里只负责唤醒界面线程一次"""
+        if not self.scheduled:
+            self.scheduled = True
+            self._wake.emit()
+    
+    def _schedule(self):
+        if not self.flush_timer.isActive():
+            self.flush_timer.start(self.FRAME_INTERVAL)
+    
+    def flush(self):
+        """取出已到达的全部变化并发出信号"""
+        # 先清除标志再取队列，取队列期间到达的变化会再次唤醒
+        self.scheduled = False
+        stream = self.stream
+        if stream.overflowed:
+            stream.overflowed = False
+            stream.deltas.clear()
+            self.reset_required.emit()
+            return
+        deltas = list(stream)
+        if deltas:
+            self.routes_changed.emit(deltas)
+    
+    def close(self):
+        """取消订阅"""
+        self.network.unsubscribe_routes(self._on_delta)
+        self.stream.close()
+        self.flush_timer.stop()
+
+
+class RoutingTableModel(QAbstractTableModel):
+    """
+    路由表模型，显示一个路由器或全网所有路由器的路由表
+    
+    行按 (路由器, 目的节点) 索引，路由变化以行为单位更新：变化的行发出dataChanged，
+    新增的行追加到末尾，删除的行用末尾的行填补，不重建整个表格。
+    全网视图按路由器分批加载（fetchMore），滚动到末尾时才读取后续路由器的路由表。
+    每个已加载的路由器记录路由表版本，忽略不比它新的RouteDelta。
+    
+    拓扑由仿真线程修改，这里是唯一的例外：在界面线程中只读地取已创建路由器的
+    路由表副本（nodes.get_existing和路由器锁保护的get_versioned_routing_table），
+    不会创建路由器；加载新拓扑后路由器被替换，调用方需要重新reload。
+    """
+    FETCH_ROWS = 5000  # 全网视图每次至少加载的行数
+    RESET_LIMIT = 1000  # 一次删除的行数超过此值时重置模型
+    
+    def __init__(self, network, parent=None):
+        super().__init__(parent)
+        self.network = network
+        self.router_ids = []  # 显示的路由器
+        self.network_wide = False
+        self.keys = []  # 行 -> (路由器ID, 目的节点)
+        self.rows = {}  # (路由器ID, 目的节点) -> 行
+        self.routes = {}  # (路由器ID, 目的节点) -> (下一跳, 代价)
+        self.versions = {}  # 已加载的路由器 -> 路由表版本
+        self.pending = []  # 尚未加载的路由器
+    
+    def show_router(self, node_id):
+        """显示一个路由器的路由表，node_id为None时清空"""
+        self.network_wide = False
+        self.router_ids = [node_id] if node_id is not None else []
+        self.reload()
+    
+    def show_network(self, router_ids):
+        """显示全网所有路由器的路由表，router_ids为当前的节点列表"""
+        self.network_wide = True
+        self.router_ids = list(router_ids)
+        self.reload()
+    
+    def reload(self):
+        """重新读取全部路由表"""
+        self.beginResetModel()
+        self.keys = []
+        self.rows = {}
+        self.routes = {}
+        self.versions = {}
+        self.pending = list(reversed(self.router_ids))
+        self._append(self._read())
+        self.endResetModel()
+    
+    def _read(self):
+        """从pending中读取路由器的路由表，直到读到至少FETCH_ROWS行或全部读完，返回 [(键, 路由)]"""
+        batch = []
+        while self.pending and len(batch) < self.FETCH_ROWS:
+            node_id = self.pending.pop()
+            router = self.network.nodes.get_existing(node_id)
+            if router is None:
+                # 尚未创建的路由器相当于版本0的空路由表，之后的RouteDelta照常应用
+                self.versions[node_id] = 0
+                continue
+            version, routing_table = router.get_versioned_routing_table()
+            self.versions[node_id] = version
+            batch.extend(((node_id, destination), route) for destination, route in routing_table.items())
+        return batch
+    
+    def _append(self, batch):
+        """把 [(键, 路由)] 追加到行末，调用方负责通知视图"""
+        keys, rows, routes = self.keys, self.rows, self.routes
+        for key, route in batch:
+            rows[key] = len(keys)
+            keys.append(key)
+            routes[key] = route
+    
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and bool(self.pending)
+    
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        batch = self._read()
+        if batch:
+            first = len(self.keys)
+            self.beginInsertRows(QModelIndex(), first, first + len(batch) - 1)
+            self._append(batch)
+            self.endInsertRows()
+    
+    def apply_deltas(self, deltas):
+        """应用一批RouteDelta：同一目的节点的多次变化只保留最后一次，再逐行更新"""
+        versions = self.versions
+        updates = {}  # (路由器ID, 目的节点) -> 新路由，None表示删除
+        for delta in deltas:
+            router_id = delta.router_id
+            version = versions.get(router_id)
+            if version is None or delta.version <= version:
+                continue  # 未加载的路由器，或加载时已包含此变化
+            versions[router_id] = delta.version
+            for destination, route in delta.added.items():
+                updates[(router_id, destination)] = route
+            for destination, (_, route) in delta.changed.items():
+                updates[(router_id, destination)] = route
+            for destination in delta.removed:
+                updates[(router_id, destination)] = None
+        if not updates:
+            return
+        
+        rows, routes = self.rows, self.routes
+        changed_rows = []
+        inserted = []
+        removed = []
+        for key, route in updates.items():
+            row = rows.get(key)
+            if route is None:
+                if row is not None:
+                    removed.append(key)
+            elif row is None:
+                inserted.append((key, route))
+            else:
+                routes[key] = route
+                changed_rows.append(row)
+        
+        if changed_rows:
+            # 一个覆盖所有变化行的dataChanged，视图只重绘其中可见的部分
+            self.dataChanged.emit(self.index(min(changed_rows), 0),
+                                  self.index(max(changed_rows), self.columnCount() - 1))
+        if removed:
+            self._remove(removed)
+        if inserted:
+            first = len(self.keys)
+            self.beginInsertRows(QModelIndex(), first, first + len(inserted) - 1)
+            self._append(inserted)
+            self.endInsertRows()
+    
+    def _remove(self, removed):
+        """删除行：少量删除时用末尾的行填补空位，大量删除时重建行列表并重置模型"""
+        keys, rows, routes = self.keys, self.rows, self.routes
+        if len(removed) > self.RESET_LIMIT:
+            self.beginResetModel()
+            for key in removed:
+                del routes[key]
+                del rows[key]
+            self.keys = keys = [key for key in keys if key in rows]
+            for row, key in enumerate(keys):
+                rows[key] = row
+            self.endResetModel()
+            return
+        last_column = self.columnCount() - 1
+        for key in removed:
+            row = rows.pop(key)
+            del routes[key]
+            last = len(keys) - 1
+            if row != last:
+                moved = keys[last]
+                keys[row] = moved
+                rows[moved] = row
+                self.dataChanged.emit(self.index(row, 0), self.index(row, last_column))
+            self.beginRemoveRows(QModelIndex(), last, last)
+            keys.pop()
+            self.endRemoveRows()
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.keys)
+    
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return 4 if self.network_wide else 3
+    
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or orientation != Qt.Horizontal:
+            return None
+        headers = ["路由器", "目的节点", "下一跳", "代价"] if self.network_wide else ["目的节点", "下一跳", "代价"]
+        return headers[section]
+    
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        key = self.keys[index.row()]
+        next_hop, cost = self.routes[key]
+        column = index.column()
+        if not self.network_wide:
+            column += 1
+        if column == 0:
+            return key[0]
+        if column == 1:
+            return key[1]
+        if column == 2:
+            return next_hop
+        return str(cost)
+
+
+class AddLinkDialog(QDialog):
+    """添加链路对话框"""
+    def __init__(self, parent, nodes):
+        super().__init__(parent)
+        self.setWindowTitle("添加链路")
+        self.setMinimumWidth(300)
+        self.result_data = None
+        self.nodes = nodes
+        
+        layout = QGridLayout()
+        self.setLayout(layout)
+        
+        # 第一个节点选择器
+        layout.addWidget(QLabel("选择第一个节点:"), 0, 0)
+        self.node1_combo = QComboBox()
+        self.node1_combo.addItems(nodes)
+        layout.addWidget(self.node1_combo, 0, 1)
+        
+        # 第二个节点选择器
+        layout.addWidget(QLabel("选择第二个节点:"), 1, 0)
+        self.node2_combo = QComboBox()
+        self.node2_combo.addItems(nodes)
+        if len(nodes) > 1:
+            self.node2_combo.setCurrentIndex(1)
+        layout.addWidget(self.node2_combo, 1, 1)
+        
+        # 代价输入框
+        layout.addWidget(QLabel("链路代价:"), 2, 0)
+        self.cost_edit = QLineEdit("1")
+        layout.addWidget(self.cost_edit, 2, 1)
+        
+        # 按钮
+        btn_layout = QHBoxLayout()
+        ok_btn = QPushButton("确定")
+        cancel_btn = QPushButton("取消")
+        
+        ok_btn.clicked.connect(self.on_ok)
+        cancel_btn.clicked.connect(self.reject)
+        
+        btn_layout.addWidget(ok_btn)
+        btn_layout.addWidget(cancel_btn)
+        layout.addLayout(btn_layout, 3, 0, 1, 2)
+    
+    def on_ok(self):
+        """确定按钮处理"""
+        node1 = self.node1_combo.currentText()
+        node2 = self.node2_combo.currentText()
+        
+        try:
+            cost = float(self.cost_edit.text())
+            if cost <= 0:
+                raise ValueError("代价必须大于0")
+        except ValueError as e:
+            QMessageBox.critical(self, "错误", f"无效的代价: {e}")
+            return
+        
+        if node1 == node2:
+            QMessageBox.critical(self, "错误", "不能连接相同的节点")
+            return
+        
+        self.result_data = (node1, node2, cost)
+        self.accept()
+
+
+class UpdateLinkDialog(QDialog):
+    """更新链路代价对话框"""
+    def __init__(self, parent, links):
+        super().__init__(parent)
+        self.setWindowTitle("更新链路代价")
+        self.setMinimumWidth(300)
+        self.result_data = None
+        self.links = links
+        
+        layout = QGridLayout()
+        self.setLayout(layout)
+        
+        # 链路选择器
+        layout.addWidget(QLabel("选择链路:"), 0, 0)
+        self.link_combo = QComboBox()
+        link_strs = [f"{src} - {dst} (当前代价: {cost})" for (src, dst), cost in links]
+        self.link_combo.addItems(link_strs)
+        layout.addWidget(self.link_combo, 0, 1)
+        
+        # 代价输入框
+        layout.addWidget(QLabel("新链路代价:"), 1, 0)
+        self.cost_edit = QLineEdit("1")
+        layout.addWidget(self.cost_edit, 1, 1)
+        
+        # 按钮
+        btn_layout = QHBoxLayout()
+        ok_btn = QPushButton("确定")
+        cancel_btn = QPushButton("取消")
+        
+        ok_btn.clicked.connect(self.on_ok)
+        cancel_btn.clicked.connect(self.reject)
+        
+        btn_layout.addWidget(ok_btn)
+        btn_layout.addWidget(cancel_btn)
+        layout.addLayout(btn_layout, 2, 0, 1, 2)
+    
+    def on_ok(self):
+        """确定按钮处理"""
+        index = self.link_combo.currentIndex()
+        if index < 0 or index >= len(self.links):
+            QMessageBox.critical(self, "错误", "请选择一个链路")
+            return
+        
+        link_info, old_cost = self.links[index]
+        
+        try:
+            cost = float(self.cost_edit.text())
+            if cost <= 0:
+                raise ValueError("代价必须大于0")
+        except ValueError as e:
+            QMessageBox.critical(self, "错误", f"无效的代价: {e}")
+            return
+        
+        self.result_data = (link_info, cost)
+        self.accept()
+
+
+class RemoveLinkDialog(QDialog):
+    """删除链路对话框"""
+    def __init__(self, parent, links):
+        super().__init__(parent)
+        self.setWindowTitle("删除链路")
+        self.setMinimumWidth(300)
+        self.result_data = None
+        self.links = links
+        
+        layout = QGridLayout()
+        self.setLayout(layout)
+        
+        # 链路选择器
+        layout.addWidget(QLabel("选择要删除的链路:"), 0, 0)
+        self.link_combo = QComboBox()
+        link_strs = [f"{src} - {dst} (代价: {cost})" for (src, dst), cost in links]
+        self.link_combo.addItems(link_strs)
+        layout.addWidget(self.link_combo, 0, 1)
+        
+        # 按钮
+        btn_layout = QHBoxLayout()
+        ok_btn = QPushButton("确定")
+        cancel_btn = QPushButton("取消")
+        
+        ok_btn.clicked.connect(self.on_ok)
+        cancel_btn.clicked.connect(self.reject)
+        
+        btn_layout.addWidget(ok_btn)
+        btn_layout.addWidget(cancel_btn)
+        layout.addLayout(btn_layout, 1, 0, 1, 2)
+    
+    def on_ok(self):
+        """确定按钮处理"""
+        index = self.link_combo.currentIndex()
+        if index < 0 or index >= len(self.links):
+            QMessageBox.critical(self, "错误", "请选择一个链路")
+            return
+        
+        (src, dst), _ = self.links[index]
+        self.result_data = (src, dst)
+        self.accept()
+
+
+class SimulationWorker(QObject):
+    """
+    仿真工作对象，移到单独的QThread中运行，独占对NetworkTopology的修改
+    
+    界面的操作以命令的形式经排队连接发送给execute，在工作线程中按提交顺序执行，
+    路由器的通知、LSA泛洪和路由计算都不再阻塞界面线程。执行结果和拓扑快照以信号
+    发回界面线程；路由表的变化仍由RouteSignalBridge逐帧送达。
+    """
+    COMMANDS = ("add_node", "add_link", "update_link_cost", "remove_link",
+                "start_all_routers", "stop_all_routers", "save_to_file", "load_from_file")
+    TOPOLOGY_COMMANDS = ("add_node", "add_link", "update_link_cost", "remove_link", "load_from_file")
+    
+    command_started = pyqtSignal(str, object)  # 命令名, 参数
+    command_finished = pyqtSignal(str, object, object, float)  # 命令名, 参数, 返回值, 用时（秒）
+    command_failed = pyqtSignal(str, object, str)  # 命令名, 参数, 异常信息
+    topology_changed = pyqtSignal(list, dict)  # 节点列表, {(src, dst): 代价}
+    
+    def __init__(self, network):
+        super().__init__()
+        self.network = network
+    
+    @pyqtSlot(str, object)
+    def execute(self, name, args):
+        """在工作线程中执行一条命令"""
+        if name not in self.COMMANDS:
+            self.command_failed.emit(name, args, f"未知的命令: {name}")
+            return
+        self.command_started.emit(name, args)
+        start = time.perf_counter()
+        try:
+            result = getattr(self.network, name)(*args)
+        except Exception as e:
+            self.command_failed.emit(name, args, str(e))
+            return
+        elapsed = time.perf_counter() - start
+        if result is not False and name in self.TOPOLOGY_COMMANDS:
+            self.topology_changed.emit(self.network.get_all_nodes(), self.network.get_all_links())
+        self.command_finished.emit(name, args, result, elapsed)
+
+
+class NetworkVisualizerQt(QMainWindow):
+    """基于PyQt的网络拓扑可视化类"""
+    
+    command_requested = pyqtSignal(str, object)  # 发给仿真线程的命令
+    
+    # 命令在状态栏中的名称，以及失败和成功时的提示（{0}为第一个参数）
+    COMMAND_NAMES = {
+        "add_node": "添加节点", "add_link": "添加链路", "update_link_cost": "修改链路代价",
+        "remove_link": "删除链路", "start_all_routers": "启动路由协议", "stop_all_routers": "停止路由协议",
+        "save_to_file": "保存拓扑", "load_from_file": "加载拓扑",
+    }
+    FAILURE_MESSAGES = {
+        "add_node": "节点 {0} 已存在", "add_link": "添加链路失败", "update_link_cost": "更新链路代价失败",
+        "remove_link": "删除链路失败", "load_from_file": "无法加载拓扑 {0}",
+    }
+    SUCCESS_MESSAGES = {"save_to_file": "拓扑已保存到 {0}", "load_from_file": "已加载拓扑 {0}"}
+    
+    def __init__(self, network, renderer="matplotlib"):
+        super().__init__()
+        self.network = network
+        self.renderer = renderer  # 拓扑绘制方式："matplotlib"，或适合大规模拓扑的"scene"（QGraphicsScene）
+        self.protocol_running = False
+        # 界面线程只使用仿真线程发来的拓扑快照，不直接读取正在被修改的拓扑
+        self.nodes = network.get_all_nodes()
+        self.links = network.get_all_links()
+        
+        self.init_ui()
+        
+        # 刷新界面
+        self.update_graph()
+        self.update_node_selector()
+        
+        # 仿真线程：之后对拓扑的修改都在这个线程中执行
+        self.sim_thread = QThread(self)
+        self.sim_worker = SimulationWorker(network)
+        self.sim_worker.moveToThread(self.sim_thread)
+        self.command_requested.connect(self.sim_worker.execute)
+        self.sim_worker.command_started.connect(self.on_command_started)
+        self.sim_worker.command_finished.connect(self.on_command_finished)
+        self.sim_worker.command_failed.connect(self.on_command_failed)
+        self.sim_worker.topology_changed.connect(self.on_topology_changed)
+        self.sim_thread.finished.connect(self.sim_worker.deleteLater)
+        self.sim_thread.start()
+    
+    def init_ui(self):
+        """初始化UI界面"""
+        self.setWindowTitle("链路状态路由协议仿真系统")
+        self.setGeometry(100, 100, 1200, 800)
+        
+        # 创建中央部件
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        
+        # 主布局
+        main_layout = QVBoxLayout(central_widget)
+        
+        # 创建顶部控制面板
+        control_frame = QFrame()
+        control_layout = QHBoxLayout(control_frame)
+        
+        # 添加各种按钮
+        self.add_node_btn = QPushButton("添加节点")
+        self.add_node_btn.clicked.connect(self.add_node)
+        control_layout.addWidget(self.add_node_btn)
+        
+        self.add_link_btn = QPushButton("添加链路")
+        self.add_link_btn.clicked.connect(self.add_link)
+        control_layout.addWidget(self.add_link_btn)
+        
+        self.update_link_btn = QPushButton("修改链路代价")
+        self.update_link_btn.clicked.connect(self.update_link_cost)
+        control_layout.addWidget(self.update_link_btn)
+        
+        self.remove_link_btn = QPushButton("删除链路")
+        self.remove_link_btn.clicked.connect(self.remove_link)
+        control_layout.addWidget(self.remove_link_btn)
+        
+        self.toggle_protocol_btn = QPushButton("启动路由协议")
+        self.toggle_protocol_btn.clicked.connect(self.toggle_protocol)
+        control_layout.addWidget(self.toggle_protocol_btn)
+        
+        self.save_topo_btn = QPushButton("保存拓扑")
+        self.save_topo_btn.clicked.connect(self.save_topology)
+        control_layout.addWidget(self.save_topo_btn)
+        
+        self.load_topo_btn = QPushButton("加载拓扑")
+        self.load_topo_btn.clicked.connect(self.load_topology)
+        control_layout.addWidget(self.load_topo_btn)
+        
+        main_layout.addWidget(control_frame)
+        
+        # 创建拓扑图和路由表的分割器
+        splitter = QSplitter(Qt.Horizontal)
+        
+        # 拓扑图区域
+        graph_group = QGroupBox("网络拓扑")
+        graph_layout = QVBoxLayout(graph_group)
+        
+        if self.renderer == "scene":
+            self.canvas = NetworkSceneView()
+        else:
+            self.canvas = NetworkVizCanvas()
+        graph_layout.addWidget(self.canvas)
+        
+        # 路由表区域
+        route_group = QGroupBox("路由表")
+        route_layout = QVBoxLayout(route_group)
+        
+        # 节点选择器
+        node_selector_layout = QHBoxLayout()
+        node_selector_layout.addWidget(QLabel("选择节点:"))
+        self.node_selector = QComboBox()
+        self.node_selector.currentIndexChanged.connect(self.update_routing_table_display)
+        node_selector_layout.addWidget(self.node_selector)
+        self.network_wide_check = QCheckBox("全网")
+        self.network_wide_check.toggled.connect(self.update_routing_table_display)
+        node_selector_layout.addWidget(self.network_wide_check)
+        route_layout.addLayout(node_selector_layout)
+        
+        # 路由表显示
+        self.routing_model = RoutingTableModel(self.network, self)
+        self.routing_table = QTableView()
+        self.routing_table.setModel(self.routing_model)
+        self.routing_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.routing_table.horizontalHeader().setMinimumSectionSize(80)  # 确保表头文字完整显示
+        # 固定行高，十万行的表格也不需要逐行计算高度
+        self.routing_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.routing_table.verticalHeader().hide()
+        
+        route_layout.addWidget(self.routing_table)
+        
+        # 添加到分割器
+        splitter.addWidget(graph_group)
+        splitter.addWidget(route_group)
+        splitter.setStretchFactor(0, 1)  # 拓扑图占比改为2
+        splitter.setStretchFactor(1, 1)  # 路由表占比维持1
+        
+        main_layout.addWidget(splitter)
+        
+        # 路由变化经信号桥按帧合并后逐行更新路由表，不再定时轮询
+        self.route_bridge = RouteSignalBridge(self.network, parent=self)
+        self.route_bridge.routes_changed.connect(self.routing_model.apply_deltas)
+        self.route_bridge.reset_required.connect(self.routing_model.reload)
+    
+    def update_graph(self):
+        """更新网络拓扑图"""
+        self.canvas.draw_network(self.nodes, self.links)
+    
+    def update_node_selector(self):
+        """更新节点选择器"""
+        self.node_selector.blockSignals(True)
+        current_text = self.node_selector.currentText()
+        self.node_selector.clear()
+        
+        nodes = self.nodes
+        self.node_selector.addItems(nodes)
+        
+        # 尝试保持当前选择
+        if current_text in nodes:
+            index = self.node_selector.findText(current_text)
+            self.node_selector.setCurrentIndex(index)
+        elif nodes:
+            self.node_selector.setCurrentIndex(0)
+            
+        self.node_selector.blockSignals(False)
+        self.update_routing_table_display()
+    
+    def update_routing_table_display(self):
+        """切换路由表显示的节点或全网视图，之后的变化由路由变化信号逐行更新"""
+        if self.network_wide_check.isChecked():
+            self.node_selector.setEnabled(False)
+            self.routing_model.show_network(self.nodes)
+            return
+        self.node_selector.setEnabled(True)
+        node_id = self.node_selector.currentText()
+        if not node_id or node_id not in self.nodes:
+            node_id = None
+        self.routing_model.show_router(node_id)
+    
+    def run_command(self, name, *args):
+        """把命令发给仿真线程，结果由on_command_finished或on_command_failed处理"""
+        self.command_requested.emit(name, args)
+    
+    def on_command_started(self, name, args):
+        """仿真线程开始执行命令"""
+        self.statusBar().showMessage(f"正在{self.COMMAND_NAMES[name]}...")
+    
+    def on_command_finished(self, name, args, result, elapsed):
+        """仿真线程执行完命令"""
+        if result is False:
+            self.statusBar().showMessage(f"{self.COMMAND_NAMES[name]}失败")
+            QMessageBox.critical(self, "错误", self.FAILURE_MESSAGES[name].format(*args))
+            return
+        self.statusBar().showMessage(f"{self.COMMAND_NAMES[name]}完成，用时 {elapsed:.2f} 秒")
+        if name == "load_from_file":
+            # 同名节点的路由器也已被替换，版本号从0重新开始，必须重新读取路由表
+            self.update_node_selector()
+            if self.protocol_running:
+                # 加载了新拓扑，如果协议正在运行，停止
+                self.toggle_protocol()
+        message = self.SUCCESS_MESSAGES.get(name)
+        if message is not None:
+            QMessageBox.information(self, "成功", message.format(*args))
+    
+    def on_command_failed(self, name, args, error):
+        """命令执行时抛出异常"""
+        self.statusBar().showMessage(f"{self.COMMAND_NAMES.get(name, name)}失败")
+        QMessageBox.critical(self, "错误", f"{self.COMMAND_NAMES.get(name, name)}失败: {error}")
+    
+    def on_topology_changed(self, nodes, links):
+        """仿真线程发来新的拓扑快照"""
+        nodes_changed = nodes != self.nodes
+        self.nodes = nodes
+        self.links = links
+        self.update_graph()
+        if nodes_changed:
+            self.update_node_selector()
+    
+    def add_node(self):
+        """添加新节点"""
+        node_id, ok = QInputDialog.getText(self, "添加节点", "输入节点ID:")
+        if ok and node_id:
+            self.run_command("add_node", node_id)
+    
+    def add_link(self):
+        """添加新链路"""
+        nodes = self.nodes
+        if len(nodes) < 2:
+            QMessageBox.critical(self, "错误", "至少需要两个节点才能添加链路")
+            return
+        
+        dialog = AddLinkDialog(self, nodes)
+        if dialog.exec_() == QDialog.Accepted and dialog.result_data:
+            node1, node2, cost = dialog.result_data
+            self.run_command("add_link", node1, node2, cost)
+    
+    def update_link_cost(self):
+        """更新链路代价"""
+        links = list(self.links.items())
+        if not links:
+            QMessageBox.critical(self, "错误", "没有可修改的链路")
+            return
+        
+        dialog = UpdateLinkDialog(self, links)
+        if dialog.exec_() == QDialog.Accepted and dialog.result_data:
+            (src, dst), cost = dialog.result_data
+            self.run_command("update_link_cost", src, dst, cost)
+    
+    def remove_link(self):
+        """删除链路"""
+        links = list(self.links.items())
+        if not links:
+            QMessageBox.critical(self, "错误", "没有可删除的链路")
+            return
+        
+        dialog = RemoveLinkDialog(self, links)
+        if dialog.exec_() == QDialog.Accepted and dialog.result_data:
+            src, dst = dialog.result_data
+            self.run_command("remove_link", src, dst)
+    
+    def toggle_protocol(self):
+        """启动/停止路由协议，命令按提交顺序执行，按钮状态立即切换"""
+        if self.protocol_running:
+            self.run_command("stop_all_routers")
+            self.protocol_running = False
+            self.toggle_protocol_btn.setText("启动路由协议")
+        else:
+            self.run_command("start_all_routers")
+            self.protocol_running = True
+            self.toggle_protocol_btn.setText("停止路由协议")
+    
+    def save_topology(self):
+        """保存拓扑到文件"""
+        filename, _ = QFileDialog.getSaveFileName(
+            self, "保存拓扑", "topology/custom.json", "JSON Files (*.json)"
+        )
+        
+        if filename:
+            self.run_command("save_to_file", filename)
+    
+    def load_topology(self):
+        """从文件加载拓扑"""
+        filename, _ = QFileDialog.getOpenFileName(
+            self, "加载拓扑", "topology/default.json", "JSON Files (*.json)"
+        )
+        
+        if filename:
+            self.run_command("load_from_file", filename)
+    
+    def closeEvent(self, event):
+        """关闭窗口时停止仿真线程和后台布局线程，并取消路由变化订阅"""
+        self.sim_thread.quit()
+        self.sim_thread.wait()
+        self.canvas.close_layout()
+        self.route_bridge.close()
+        super().closeEvent(event)
\ No newline at end of file